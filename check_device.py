@@ -1,35 +1,375 @@
 #!/usr/bin/env python3
 
-# TODO: get some docstrings in here!
+"""
+Headless validation of device definition files.  Each device is loaded in a
+pool of worker processes using the offscreen Qt platform so no windows are
+shown.  Files whose content, including the files they reference, is unchanged
+since the last passing or failing check are reported from a cache instead of
+being loaded again.  Results can be written as JSON and JUnit XML reports.
+"""
 
-import epyqlib.device
-
-from PyQt5.QtWidgets import QApplication
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import sys
+import time
+import traceback
+import xml.etree.ElementTree
 
 # See file COPYING in this source tree
 __copyright__ = 'Copyright 2016, EPC Power Corp.'
 __license__ = 'GPLv2+'
 
 
-def main(args=None):
+default_cache = '.check_device_cache.json'
+cache_version = 1
+
+_app = None
+
+
+def referenced_paths(device_path):
+    """
+    Collect the files a device definition refers to so that changes to any of
+    them invalidate the cached result.  Zipped devices are self contained.
+    """
+    paths = [device_path]
+
+    if os.path.splitext(device_path)[1].casefold() in ('.epz', '.zip'):
+        return paths
+
+    try:
+        with open(device_path) as f:
+            d = json.load(f)
+    except (OSError, ValueError):
+        return paths
+
+    directory = os.path.dirname(os.path.abspath(device_path))
+
+    def add(value):
+        if isinstance(value, str):
+            path = os.path.join(directory, value)
+            if os.path.isfile(path):
+                paths.append(path)
+        elif isinstance(value, dict):
+            for v in value.values():
+                add(v)
+        elif isinstance(value, list):
+            for v in value:
+                add(v)
+
+    for key in ('can_path', 'ui_path', 'ui_paths', 'menu', 'module'):
+        add(d.get(key))
+
+    return paths
+
+
+def content_hash(device_path, library_version):
+    sha = hashlib.sha256()
+    sha.update(str(library_version).encode('utf-8'))
+
+    for path in referenced_paths(device_path):
+        sha.update(os.path.abspath(path).encode('utf-8'))
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(block)
+
+    return sha.hexdigest()
+
+
+def _initialize_worker():
+    global _app
+
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+
+    from PyQt5.QtWidgets import QApplication
+
     # TODO: CAMPid 9757656124812312388543272342377
-    app = QApplication(sys.argv)
-    app.setOrganizationName('EPC Power Corp.')
-    app.setApplicationName('EPyQ')
+    _app = QApplication([sys.argv[0]])
+    _app.setOrganizationName('EPC Power Corp.')
+    _app.setApplicationName('EPyQ')
+
+    import epyq.symcache
+
+    epyq.symcache.install()
+
+
+def check(device_path):
+    """
+    Load one device, run in a worker process.
+
+    Returns:
+        dict: ``path``, ``passed``, ``parse_time`` for the CAN database,
+        ``load_time`` for the full device and ``error``.
+    """
+    import epyq.symcache
+    import epyqlib.device
+
+    result = {
+        'path': device_path,
+        'passed': False,
+        'parse_time': None,
+        'load_time': None,
+        'error': None,
+        'sym_cache': None,
+    }
+
+    try:
+        if os.path.splitext(device_path)[1].casefold() not in ('.epz', '.zip'):
+            start = time.perf_counter()
+            with open(device_path) as f:
+                d = json.load(f)
+            can_path = d.get('can_path')
+            if can_path is not None:
+                hits = epyq.symcache.statistics.hits
+                epyqlib.device.load_matrix(
+                    os.path.join(os.path.dirname(device_path), can_path),
+                )
+                hit = epyq.symcache.statistics.hits > hits
+                result['sym_cache'] = 'hit' if hit else 'miss'
+            result['parse_time'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        device = epyqlib.device.Device(file=device_path)
+        result['load_time'] = time.perf_counter() - start
+        device.terminate()
+    except Exception:
+        result['error'] = traceback.format_exc()
+    else:
+        result['passed'] = True
+
+    return result
+
+
+def incomplete(device_path, exception):
+    """
+    The result for a device whose check did not complete, such as when its
+    worker process died.
+    """
+    return {
+        'path': device_path,
+        'passed': False,
+        'parse_time': None,
+        'load_time': None,
+        'error': ''.join(traceback.format_exception(
+            type(exception), exception, exception.__traceback__,
+        )),
+        'sym_cache': None,
+        'completed': False,
+    }
+
+
+def load_cache(path):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if cache.get('version') != cache_version:
+        return {}
+
+    return cache.get('results', {})
+
 
+def merge_cache(cache, results):
+    """
+    Update the loaded cache with the results of this run.  Entries for
+    devices not checked this time are kept unless their file is gone and a
+    crash says nothing about the device so it is checked again next time.
+    """
+    merged = {
+        device_path: entry
+        for device_path, entry in cache.items()
+        if os.path.exists(device_path)
+    }
+
+    for result in results:
+        if result['cached']:
+            continue
+
+        if result.get('completed', True):
+            merged[result['path']] = {
+                k: v for k, v in result.items() if k != 'cached'
+            }
+        else:
+            merged.pop(result['path'], None)
+
+    return merged
+
+
+def save_cache(path, results):
+    with open(path, 'w') as f:
+        json.dump({'version': cache_version, 'results': results}, f, indent=4)
+
+
+def skipped(result):
+    # a cached failure is still reported as a failure, not as skipped
+    return result['cached'] and result['passed']
+
+
+def write_junit(path, results, elapsed):
+    suite = xml.etree.ElementTree.Element(
+        'testsuite',
+        name='check_device',
+        tests=str(len(results)),
+        failures=str(sum(not r['passed'] for r in results)),
+        skipped=str(sum(skipped(r) for r in results)),
+        time='{:.3f}'.format(elapsed),
+    )
+
+    for result in results:
+        case = xml.etree.ElementTree.SubElement(
+            suite,
+            'testcase',
+            classname='check_device',
+            name=result['path'],
+            time='{:.3f}'.format(result['load_time'] or 0),
+        )
+
+        if not result['passed']:
+            failure = xml.etree.ElementTree.SubElement(
+                case,
+                'failure',
+                message='Failed to load device',
+            )
+            failure.text = result['error']
+        elif skipped(result):
+            xml.etree.ElementTree.SubElement(
+                case,
+                'skipped',
+                message='Unchanged since a passing check',
+            )
+
+        properties = xml.etree.ElementTree.SubElement(case, 'properties')
+        for name in ('parse_time', 'load_time', 'cached', 'hash'):
+            xml.etree.ElementTree.SubElement(
+                properties,
+                'property',
+                name=name,
+                value=str(result[name]),
+            )
+
+    xml.etree.ElementTree.ElementTree(suite).write(
+        path,
+        encoding='utf-8',
+        xml_declaration=True,
+    )
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('devices', nargs='+')
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=os.cpu_count(),
+        help='Number of worker processes',
+    )
+    parser.add_argument('--report', help='Write a JSON report to this path')
+    parser.add_argument('--junit', help='Write a JUnit XML report to this path')
+    parser.add_argument(
+        '--cache',
+        default=default_cache,
+        help='Results cache keyed by content hash (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Check all devices even when unchanged',
+    )
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
     if args is None:
-        import argparse
+        args = sys.argv[1:]
+
+    args = parse_args(args)
+
+    import epyqlib
+
+    library_version = getattr(epyqlib, '__version__', None)
 
-        parser = argparse.ArgumentParser()
+    start = time.perf_counter()
 
-        parser.add_argument('devices', nargs='+')
-        args = parser.parse_args()
+    cache = load_cache(args.cache)
+    results = {}
+    to_check = {}
 
     for device_path in args.devices:
-        print(' - - - - - - Checking {}'.format(device_path))
-        epyqlib.device.Device(file=device_path)
+        digest = content_hash(device_path, library_version=library_version)
+        cached = None if args.force else cache.get(device_path)
+
+        if cached is not None and cached['hash'] == digest:
+            results[device_path] = dict(cached, cached=True)
+        else:
+            to_check[device_path] = digest
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=max(1, args.jobs),
+        initializer=_initialize_worker,
+    ) as executor:
+        futures = {
+            executor.submit(check, device_path): device_path
+            for device_path in to_check
+        }
+
+        for future in concurrent.futures.as_completed(futures):
+            device_path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = incomplete(device_path, e)
+            result['hash'] = to_check[device_path]
+            result['cached'] = False
+            results[device_path] = result
+
+    elapsed = time.perf_counter() - start
+
+    results = [results[device_path] for device_path in args.devices]
+
+    for result in results:
+        status = 'PASS' if result['passed'] else 'FAIL'
+        if result['cached']:
+            status += ' (cached)'
+
+        print(' - - - - - - {} {}'.format(status, result['path']))
+        if result['load_time'] is not None:
+            print('    load: {:.3f} s'.format(result['load_time']))
+        if result['parse_time'] is not None:
+            print('    parse: {:.3f} s'.format(result['parse_time']))
+        if result['sym_cache'] is not None:
+            print('    CAN database cache: {}'.format(result['sym_cache']))
+        if result['error'] is not None:
+            print(result['error'])
+
+    save_cache(args.cache, merge_cache(cache, results))
+
+    if args.report is not None:
+        with open(args.report, 'w') as f:
+            json.dump(
+                {'elapsed': elapsed, 'results': results},
+                f,
+                indent=4,
+            )
+
+    if args.junit is not None:
+        write_junit(args.junit, results, elapsed=elapsed)
+
+    failures = sum(not result['passed'] for result in results)
+    print('{} checked, {} cached, {} failed in {:.1f} s'.format(
+        len(to_check),
+        len(results) - len(to_check),
+        failures,
+        elapsed,
+    ))
+
+    return 1 if failures > 0 else 0
 
 
 if __name__ == '__main__':
-    import sys
     sys.exit(main())
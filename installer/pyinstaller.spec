@@ -40,8 +40,16 @@ for dir_name, subdirs, files in os.walk(search_in):
         py = py.replace(os.path.sep, '.')
         hidden_imports.add(py)
 
+# Only bundle the CAN database formats devices use.  canmatrix imports every
+# format it can find at startup and skips those that are missing.
+can_formats = {'sym', 'dbc', 'json'}
+excludes = []
 for format in canmatrix.formats.moduleList:
-    hidden_imports.add('canmatrix.formats.' + format)
+    module = 'canmatrix.formats.' + format
+    if format in can_formats:
+        hidden_imports.add(module)
+    else:
+        excludes.append(module)
 
 data_files.append(('PCANBasic.dll', '.'))
 data_files.append((
@@ -62,7 +70,7 @@ a = Analysis(
     hiddenimports=list(hidden_imports),
     hookspath=[],
     runtime_hooks=[],
-    excludes=[],
+    excludes=excludes,
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
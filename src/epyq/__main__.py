@@ -5,47 +5,38 @@ Main entry point for ST (aka EPyQ), pulls in and creates the windows for the UI
 the main.ui file
 """
 
-# TODO: CAMPid 98852142341263132467998754961432
-import epyqlib.tee
+import epyq.startup
+
 import os
 import pathlib
 import sys
 
-from epyqlib.tabs.files.aws_login_manager import AwsLoginManager
-from epyqlib.tabs.files.sync_config import SyncConfig, Vars
-
-# TODO: CAMPid 953295425421677545429542967596754
-log = open(os.path.join(os.getcwd(), "epyq.log"), "w", encoding="utf-8", buffering=1)
-
-if sys.stdout is None:
-    sys.stdout = log
-else:
-    sys.stdout = epyqlib.tee.Tee([sys.stdout, log])
-
-if sys.stderr is None:
-    sys.stderr = log
-else:
-    sys.stderr = epyqlib.tee.Tee([sys.stderr, log])
-
 import logging
 
 logging.basicConfig(format="%(asctime)s - %(levelname)s - %(message)s")
 
-import attr
 import epyq
+import epyq.asynclog
+import epyq.binlog
+import epyq.busthreads
+import epyq.canlog
+import epyq.canlogexport
+import epyq.dashboards
+import epyq.memoryreads
+import epyq.metrics
+import epyq.profiling
+import epyq.registry
+import epyq.stalls
+import epyq.symbolindex
+import epyq.symcache
+import epyq.updatescheduler
 import epyqlib.canneo
-import epyqlib.csvwindow
-import epyqlib.scripting
-import epyqlib.scriptingview
-import epyqlib.tests.common
 import epyqlib.txrx
 import epyqlib.utils.qt
-import epyqlib.utils.canlog
-import epyqlib.widgets.progressbar
-import epyqlib.widgets.lcd
-import epyqlib.widgets.led
+import epyqlib.utils.twisted
 import functools
 import signal
+import twisted.internet.threads
 
 from PyQt5 import QtCore, QtWidgets, QtGui
 from PyQt5.QtCore import QFileInfo, Qt, pyqtSlot
@@ -77,14 +68,27 @@ class Window(QtWidgets.QMainWindow):
     Args:
         parent (QWidget, optional): Used for call to inherited class QMainWindow's init.
         Defaults to None
+        update_rate (float, optional): Maximum dashboard widget updates per second,
+        zero for no limit.  Defaults to epyq.updatescheduler.default_rate
+        stall_detector (epyq.stalls.StallDetector, optional): Its loop lag
+        histogram is shown with the performance metrics.
+        bus_threads (bool, optional): Decode received frames in each bus's
+        receive thread and apply the values in batches.  Defaults to False
     """
 
-    def __init__(self, parent=None):
+    def __init__(
+        self,
+        parent=None,
+        update_rate=epyq.updatescheduler.default_rate,
+        stall_detector=None,
+        bus_threads=False,
+    ):
         super().__init__(parent=parent)
 
-        self.aws_login_manager = AwsLoginManager.get_instance()
-        self.aws_login_manager.register_listener(self.update_logged_in_state)
-        self.files_config = SyncConfig.get_instance()
+        # AWS sync support pulls in boto3 so it is loaded the first time
+        # the menu holding its actions is opened.
+        self.aws_login_manager = None
+        self.files_config = None
 
         # TODO: CAMPid 980567566238416124867857834291346779
         ico_file = os.path.join(QFileInfo.absolutePath(QFileInfo(__file__)), "icon.ico")
@@ -107,17 +111,33 @@ class Window(QtWidgets.QMainWindow):
         self.ui.action_start_can_log.triggered.connect(self.start_can_log)
         self.ui.action_stop_can_log.triggered.connect(self.stop_can_log)
         self.ui.action_export_can_log.triggered.connect(self.export_can_log)
+        self.ui.action_export_merged_can_log.triggered.connect(
+            self.export_merged_can_log
+        )
         self.can_logs = {}
+        self.can_log_export = None
 
         self.ui.action_login_to_sync.triggered.connect(self.login_to_sync_clicked)
         self.ui.action_auto_sync_files.triggered.connect(self.auto_sync_clicked)
-        self.update_logged_in_state()
+        self.ui.menu_Tools.aboutToShow.connect(self.load_sync)
 
         device_tree = epyqlib.devicetree.Tree()
         self.device_tree_model = epyqlib.devicetree.Model(root=device_tree)
         self.device_tree_model.device_removed.connect(self._remove_device)
+        self.device_tree_model.rowsInserted.connect(self._devices_inserted)
         self.ui.device_tree.setModel(self.device_tree_model)
+        self.device_registry = epyq.registry.DeviceRegistry(
+            model=self.device_tree_model,
+        )
+        self.device_registry.connect()
         self.ui.device_tree.device_selected.connect(self.set_current_device)
+        self.tab_subscriptions = {}
+        if update_rate > 0:
+            self.update_scheduler = epyq.updatescheduler.UpdateScheduler(
+                rate=update_rate,
+            )
+        else:
+            self.update_scheduler = None
 
         self.ui.collapse_button.clicked.connect(self.collapse_expand)
         size_hint = self.ui.collapse_button.sizeHint()
@@ -137,17 +157,91 @@ class Window(QtWidgets.QMainWindow):
 
         self.scripting_window = None
 
+        if bus_threads:
+            self.dispatcher = epyq.busthreads.Dispatcher(model=self.device_tree_model)
+            self.dispatcher.start()
+        else:
+            self.dispatcher = None
+
+        self.metrics = epyq.metrics.Metrics(
+            model=self.device_tree_model,
+            scheduler=self.update_scheduler,
+            stall_detector=stall_detector,
+            dispatcher=self.dispatcher,
+            memory_reads=epyq.memoryreads.statistics,
+        )
+        self.metrics_dock = None
+        self.metrics_timer = QtCore.QTimer(self)
+        self.metrics_timer.setInterval(1000)
+        self.metrics_timer.timeout.connect(self.sample_metrics)
+        self.ui.action_performance.triggered.connect(self.show_performance)
+        self.ui.action_dump_metrics.triggered.connect(self.dump_metrics)
+
+    def start_metrics(self):
+        """
+        Install the performance probes on the buses and devices, if not already,
+        and sample them each second.
+        """
+        if self.metrics.started is None:
+            self.metrics.start()
+            self.metrics_timer.start()
+
+    def sample_metrics(self):
+        self.metrics.sample()
+        if self.metrics_dock is not None:
+            self.metrics_dock.refresh()
+
+    def show_performance(self):
+        """
+        Show the dockable performance window, creating it the first time.
+        """
+        self.start_metrics()
+
+        if self.metrics_dock is None:
+            import epyq.metricsview
+
+            self.metrics_dock = epyq.metricsview.MetricsDock(
+                metrics=self.metrics,
+                dump=self.dump_metrics,
+                parent=self,
+            )
+            self.addDockWidget(Qt.RightDockWidgetArea, self.metrics_dock)
+
+        self.metrics_dock.show()
+        self.metrics_dock.raise_()
+        self.sample_metrics()
+
+    def dump_metrics(self):
+        """
+        Save the current performance metrics to a user specified JSON file.
+        """
+        self.start_metrics()
+
+        filters = [("JSON", ["json"]), ("All Files", ["*"])]
+        filename = epyqlib.utils.qt.file_dialog(
+            filters=filters,
+            parent=self,
+            save=True,
+        )
+
+        if filename is not None:
+            self.metrics.sample()
+            self.metrics.dump(filename)
+
     def start_can_log(self):
         """
         Initializes the CAN logs for each tree model child that has a bus interface.
+        Frames are streamed to segment files on disk so memory use stays bounded
+        regardless of the capture length.
         """
         self.stop_can_log()
+        self.close_can_logs()
 
         self.can_logs = {}
         for bus in self.device_tree_model.root.children:
             if bus.interface is not None:
                 name = bus.fields.name
-                log = epyqlib.utils.canlog.Log(name=name)
+                log = epyq.canlog.StreamingLog(name=name)
                 bus.bus.notifier.add(log)
                 bus.bus.tx_notifier.add(log)
                 self.can_logs[bus.bus] = log
@@ -161,59 +255,202 @@ class Window(QtWidgets.QMainWindow):
         for bus, log in self.can_logs.items():
             log.stop()
             bus.notifier.discard(log)
+            bus.tx_notifier.discard(log)
+
+            if log.dropped > 0:
+                logging.warning(
+                    "CAN log of '%s' dropped %d frames", log.name, log.dropped
+                )
+
+    def close_can_logs(self):
+        """
+        Releases the writer threads and segment files of the CAN logs.
+        """
+        for log in self.can_logs.values():
+            log.close()
+
+        self.can_logs = {}
+
+    def nonempty_can_logs(self):
+        """
+        Returns:
+            dict: The CAN logs that have recorded messages keyed by bus along with the
+            earliest receive timestamp across them.
+        """
+        nonempty_logs = {bus: log for bus, log in self.can_logs.items() if len(log) > 0}
+
+        first_message_time = min(
+            (
+                log.minimum_timestamp()
+                for log in nonempty_logs.values()
+                if log.minimum_timestamp() is not None
+            ),
+            default=0,
+        )
+
+        return nonempty_logs, first_message_time
 
     def export_can_log(self):
         """
-        Determines the logs that have recorded messages and saves them to a user specified file.
+        Determines the logs that have recorded messages and saves them to user specified
+        files as TRC or native binary logs depending on the extension.  Formatting
+        and writing happen in a background job with a cancellable progress dialog
+        so the Qt thread and reactor keep servicing the buses.
         """
-        nonempty_logs = {
-            bus: log for bus, log in self.can_logs.items() if len(log.messages) > 0
-        }
+        if self.can_log_export is not None:
+            # TODO: notify user that an export is already running
+            return
+
+        nonempty_logs, first_message_time = self.nonempty_can_logs()
 
         if len(nonempty_logs) == 0:
             # TODO: notify user that nothing will be done
             return
 
-        first_message_time = min(
-            log.minimum_timestamp()
-            for log in nonempty_logs.values()
-            if len(log.messages) > 0
-        )
-
+        targets = []
         for bus, log in nonempty_logs.items():
-            if len(log.messages) > 0:
-                QMessageBox.information(
-                    self,
-                    "EPyQ",
-                    "Pick a file to save log of '{}'".format(log.name),
-                )
+            QMessageBox.information(
+                self,
+                "EPyQ",
+                "Pick a file to save log of '{}'".format(log.name),
+            )
+
+            filters = [
+                ("PCAN", ["trc"]),
+                ("EPyQ CAN Log", [epyq.binlog.extension]),
+                ("All Files", ["*"]),
+            ]
+            filename = epyqlib.utils.qt.file_dialog(
+                filters=filters,
+                parent=self,
+                save=True,
+            )
 
-                filters = [("PCAN", ["trc"]), ("All Files", ["*"])]
-                filename = epyqlib.utils.qt.file_dialog(
-                    filters=filters,
-                    parent=self,
-                    save=True,
+            if filename is not None:
+                log.flush()
+                targets.append(
+                    epyq.canlogexport.Target(log=log, path=filename, count=len(log))
                 )
 
-                if filename is not None:
-                    messages = (
-                        attr.evolve(
-                            message,
-                            time=(
-                                message.time - first_message_time
-                                if message.time is not None
-                                else 0
-                            ),
-                            type=(
-                                epyqlib.utils.canlog.MessageType.Rx
-                                if message.time is not None
-                                else epyqlib.utils.canlog.MessageType.Tx
-                            ),
-                        )
-                        for message in log.messages
-                    )
-                    with open(filename, "w") as f:
-                        epyqlib.utils.canlog.to_trc_v1_1(messages, f)
+        if len(targets) == 0:
+            return
+
+        self.run_can_log_export(
+            job_factory=functools.partial(
+                epyq.canlogexport.for_targets,
+                targets=targets,
+                time_offset=first_message_time,
+            ),
+        )
+
+    def export_merged_can_log(self):
+        """
+        Saves the recorded messages of all buses to a single user specified file in time
+        order with a bus column.  The logs are merged while streaming them back from disk.
+        """
+        if self.can_log_export is not None:
+            # TODO: notify user that an export is already running
+            return
+
+        nonempty_logs, first_message_time = self.nonempty_can_logs()
+
+        if len(nonempty_logs) == 0:
+            # TODO: notify user that nothing will be done
+            return
+
+        filters = [("PCAN", ["trc"]), ("All Files", ["*"])]
+        filename = epyqlib.utils.qt.file_dialog(
+            filters=filters,
+            parent=self,
+            save=True,
+        )
+
+        if filename is None:
+            return
+
+        targets = []
+        for log in nonempty_logs.values():
+            log.flush()
+            targets.append(epyq.canlogexport.Target(log=log, path=None, count=len(log)))
+
+        self.run_can_log_export(
+            job_factory=functools.partial(
+                epyq.canlogexport.MergedTrcExport,
+                targets=targets,
+                path=filename,
+                time_offset=first_message_time,
+            ),
+        )
+
+    def run_can_log_export(self, job_factory):
+        """
+        Runs a CAN log export job in a thread while showing a cancellable progress dialog.
+
+        Args:
+            job_factory (callable): Creates the job given a ``progress`` callback.
+        """
+        from twisted.internet import reactor
+
+        progress = epyqlib.utils.qt.progress_dialog(parent=self, cancellable=True)
+        progress.setLabelText("Exporting CAN log...")
+
+        job = job_factory(
+            progress=lambda done, total: reactor.callFromThread(
+                progress.setValue, done
+            ),
+        )
+        progress.setMaximum(job.total())
+        progress.canceled.connect(job.cancel)
+        progress.show()
+
+        export_actions = (
+            self.ui.action_export_can_log,
+            self.ui.action_export_merged_can_log,
+        )
+
+        self.can_log_export = job
+        for action in export_actions:
+            action.setEnabled(False)
+
+        def finished(result):
+            self.can_log_export = None
+            for action in export_actions:
+                action.setEnabled(True)
+            progress.close()
+
+            return result
+
+        def completed(statistics):
+            QMessageBox.information(
+                self,
+                "EPyQ",
+                "CAN log exported: {}".format(statistics.summary()),
+            )
+
+        d = twisted.internet.threads.deferToThread(job.run)
+        d.addBoth(finished)
+        d.addCallback(completed)
+        d.addErrback(
+            lambda failure: failure.trap(epyq.canlogexport.CanceledError),
+        )
+        d.addErrback(epyqlib.utils.twisted.errbackhook)
+
+    def load_sync(self):
+        """
+        Create the AWS login manager and sync configuration if they have not
+        been already and show the current login state.
+        """
+        if self.aws_login_manager is not None:
+            return
+
+        from epyqlib.tabs.files.aws_login_manager import AwsLoginManager
+        from epyqlib.tabs.files.sync_config import SyncConfig
+
+        self.aws_login_manager = AwsLoginManager.get_instance()
+        self.aws_login_manager.register_listener(self.update_logged_in_state)
+        self.files_config = SyncConfig.get_instance()
+
+        self.update_logged_in_state()
 
     def update_logged_in_state(self, logged_in: bool = None):
         """
@@ -223,6 +460,8 @@ class Window(QtWidgets.QMainWindow):
         Args:
             logged_in (bool, optional): Sets the text around the method. Defaults to None.
         """
+        from epyqlib.tabs.files.sync_config import Vars
+
         if logged_in is None:
             logged_in = self.aws_login_manager.is_logged_in()
 
@@ -248,6 +487,8 @@ class Window(QtWidgets.QMainWindow):
             self.aws_login_manager.show_login_window()
 
     def auto_sync_clicked(self):
+        from epyqlib.tabs.files.sync_config import Vars
+
         auto_sync: QAction = self.ui.action_auto_sync_files
         self.files_config.set(Vars.auto_sync, auto_sync.isChecked())
 
@@ -294,6 +535,11 @@ class Window(QtWidgets.QMainWindow):
         window.setWindowTitle(title)
 
     def closeEvent(self, event):
+        self.stop_can_log()
+        self.close_can_logs()
+        self.metrics_timer.stop()
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
         self.device_tree_model.terminate()
         if self.scripting_window is not None:
             self.scripting_window.close()
@@ -336,15 +582,19 @@ class Window(QtWidgets.QMainWindow):
 
     def chart_log(self):
         """
-        Pulls in log data from a CSV file and displays it in a subwindow
+        Pulls in log data from a CSV file and displays it in a subwindow.  Parsed columns
+        are cached in a sidecar file and the charts are decimated to the visible range.
         """
         filters = [("CSV", ["csv"]), ("All Files", ["*"])]
         filename = epyqlib.utils.qt.file_dialog(filters, parent=self)
 
         if filename is not None:
+            import epyq.chartlog
+            import epyq.csvcache
+
             filename = pathlib.Path(filename)
-            data = epyqlib.csvwindow.read_csv(filename)
-            window = epyqlib.csvwindow.QtChartWindow(data=data)
+            table = epyq.csvcache.load(filename)
+            window = epyq.chartlog.ChartWindow(table=table)
             self.set_title(detail=filename.name, window=window)
             self.subwindows.add(window)
             window.closing.connect(functools.partial(self.subwindows.discard, window))
@@ -359,18 +609,12 @@ class Window(QtWidgets.QMainWindow):
             self.scripting_window.raise_()
             return
 
+        import epyqlib.scripting
+        import epyqlib.scriptingview
+
         self.scripting_window = epyqlib.scriptingview.ScriptingView()
         scripting_model = epyqlib.scripting.Model(
-            get_devices=lambda: {
-                device.device.nickname: device.device
-                for device in self.device_tree_model.root.nodes_by_filter(
-                    filter=lambda node: isinstance(
-                        node,
-                        epyqlib.devicetree.Device,
-                    ),
-                )
-                if len(device.device.nickname) > 0
-            }
+            get_devices=self.device_registry.by_nickname,
         )
         self.scripting_window.set_model(scripting_model)
         self.scripting_window.closing.connect(self.scripting_closing)
@@ -382,15 +626,65 @@ class Window(QtWidgets.QMainWindow):
 
     @pyqtSlot(object)
     def _remove_device(self, device):
+        subscriptions = self.tab_subscriptions.pop(device, None)
+        if subscriptions is not None:
+            subscriptions.close()
+
         self.ui.stacked.removeWidget(device.ui)
         device.ui.setParent(None)
         device.terminate()
 
+    def _devices_inserted(self, parent, first, last):
+        # Devices which are never selected must not keep updating their
+        # widgets either so subscriptions start paused as devices are added
+        for node in self.device_tree_model.node_from_index(parent).children[
+            first : last + 1
+        ]:
+            device = getattr(node, "device", None)
+            if device is not None:
+                self._subscribe_tabs(device)
+
+    def _subscribe_tabs(self, device):
+        subscriptions = self.tab_subscriptions.get(device)
+        if subscriptions is None:
+            subscriptions = epyq.dashboards.TabSubscriptions(
+                tabs=device.ui.tabs,
+                scheduler=self.update_scheduler,
+                visible=self.ui.stacked.currentWidget() is device.ui,
+            )
+            self.tab_subscriptions[device] = subscriptions
+
+        return subscriptions
+
     @pyqtSlot(object)
     def set_current_device(self, device):
         self.ui.stacked.addWidget(device.ui)
         self.ui.stacked.setCurrentWidget(device.ui)
 
+        # Only the shown tab of the shown device keeps its widgets updating
+        self._subscribe_tabs(device)
+        for other, subscriptions in self.tab_subscriptions.items():
+            subscriptions.set_visible(other is device)
+
+
+class FirstPaintFilter(QtCore.QObject):
+    """
+    Application wide event filter calling ``callback`` once on the first paint
+    event of any widget and then removing itself.
+    """
+
+    def __init__(self, callback, parent=None):
+        super().__init__(parent=parent)
+
+        self.callback = callback
+
+    def eventFilter(self, watched, event):
+        if event.type() == QtCore.QEvent.Paint:
+            QApplication.instance().removeEventFilter(self)
+            self.callback()
+
+        return False
+
 
 def sigint_handler(signal_number, stack_frame):
     QApplication.exit(128 + signal_number)
@@ -408,9 +702,168 @@ def main(args=None):
         - quit-after: sets the time for the duration of the application GUI
         - load-offline: loads only the windows in the device tree denoted as offline from the
         given UI file
+        - startup-profile: prints the time and imports of each startup phase after the
+        window is first painted
+        - replay: streams a recorded TRC or native log into the offline bus
+        - replay-speed: replay rate relative to the recording, 0 for as fast as possible
+        - stall-threshold: seconds the event loop may block before the stall and the
+        blocking stack are reported, 0 to disable
+        - stall-report: rolling report file of the stalls
+        - bus-threads: decodes received frames in each bus's receive thread
+        - metrics-output: collects performance metrics and writes them as JSON at exit
+        - log-file: the log file, with stdout and stderr copied to it
+        - log-max-bytes: size at which the log file is rotated
+        - log-rotate-when: rotates the log file by time instead, such as midnight
+        - log-backups: rotated log files kept
+        - log-compress: gzip compresses rotated log files
+        - log-rate: log records per second allowed for each logger, 0 for no limit
+        - profile: profiles the whole run with cprofile, yappi or tracemalloc
+        - profile-output: directory the profile results are written to
     """
+    epyq.startup.profile.mark("imports")
+
+    import argparse
+
+    ui_default = "main.ui"
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--verbose", "-v", action="count", default=0)
+    parser.add_argument("--quit-after", type=float, default=None)
+    parser.add_argument("--load-offline", default=None)
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="Report the time and modules imported for each startup phase",
+    )
+    parser.add_argument(
+        "--build-all-dashboards",
+        action="store_true",
+        help="Build every device dashboard while loading rather than when first shown",
+    )
+    parser.add_argument(
+        "--update-rate",
+        type=float,
+        default=epyq.updatescheduler.default_rate,
+        help="Maximum dashboard widget updates per second, 0 for no limit",
+    )
+    parser.add_argument(
+        "--variable-read-chunk",
+        type=int,
+        default=epyq.memoryreads.default_max_chunk,
+        help="Most addressable units uploaded at once by a variables tab read",
+    )
+    parser.add_argument(
+        "--variable-read-gap",
+        type=int,
+        default=epyq.memoryreads.default_max_gap,
+        help="Most unwatched addressable units read to join two variables",
+    )
+    parser.add_argument(
+        "--variable-station-address",
+        type=int,
+        default=epyq.memoryreads.default_station_address,
+        help="CCP station address connected to for variables tab reads",
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        help="Stream a recorded TRC or .epcl log into the Offline bus",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1,
+        help="Replay rate relative to the recording, 0 for as fast as possible",
+    )
+    parser.add_argument(
+        "--bus-threads",
+        action="store_true",
+        help="Decode received frames in each bus's receive thread",
+    )
+    parser.add_argument(
+        "--metrics-output",
+        default=None,
+        help="Collect performance metrics and write them to this JSON file at exit",
+    )
+    parser.add_argument(
+        "--stall-threshold",
+        type=float,
+        default=0.25,
+        help="Seconds of event loop blocking reported as a stall, 0 to disable",
+    )
+    parser.add_argument(
+        "--stall-report",
+        default=None,
+        help="Rolling JSON lines report of event loop stalls",
+    )
+    parser.add_argument(
+        "--log-file",
+        default=os.path.join(os.getcwd(), epyq.asynclog.default_path),
+        help="Log file, stdout and stderr are also copied to it",
+    )
+    parser.add_argument(
+        "--log-max-bytes",
+        type=int,
+        default=epyq.asynclog.default_max_bytes,
+        help="Size at which the log file is rotated, 0 to never rotate",
+    )
+    parser.add_argument(
+        "--log-rotate-when",
+        default=None,
+        help="Rotate the log file by time instead, such as midnight or H",
+    )
+    parser.add_argument(
+        "--log-backups",
+        type=int,
+        default=epyq.asynclog.default_backups,
+        help="Rotated log files kept",
+    )
+    parser.add_argument(
+        "--log-compress",
+        action="store_true",
+        help="Compress rotated log files with gzip",
+    )
+    parser.add_argument(
+        "--log-rate",
+        type=float,
+        default=epyq.asynclog.default_rate,
+        help="Log records per second allowed for each logger, 0 for no limit",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=epyq.profiling.modes,
+        default=None,
+        help="Profile the whole run including worker threads",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default=epyq.profiling.default_output,
+        help="Directory for the --profile results",
+    )
+    if args is None:
+        args = parser.parse_args()
+    else:
+        args = parser.parse_args(args)
+
+    async_logging = epyq.asynclog.setup(
+        path=args.log_file,
+        max_bytes=args.log_max_bytes,
+        backups=args.log_backups,
+        when=args.log_rotate_when,
+        compress=args.log_compress,
+        rate=args.log_rate,
+    )
+
     print("starting epyq")
 
+    profiling_session = None
+    if args.profile is not None:
+        profiling_session = epyq.profiling.Session(
+            mode=args.profile,
+            directory=args.profile_output,
+        )
+        profiling_session.start()
+
     signal.signal(signal.SIGINT, sigint_handler)
 
     # TODO: CAMPid 9757656124812312388543272342377
@@ -431,6 +884,8 @@ def main(args=None):
     app.setOrganizationName("EPC Power Corp.")
     app.setApplicationName("EPyQ")
 
+    epyq.startup.profile.mark("QApplication")
+
     os_signal_timer = QtCore.QTimer()
     os_signal_timer.start(200)
     os_signal_timer.timeout.connect(lambda: None)
@@ -445,18 +900,7 @@ def main(args=None):
 
     qt5reactor.install()
 
-    import argparse
-
-    ui_default = "main.ui"
-
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--verbose", "-v", action="count", default=0)
-    parser.add_argument("--quit-after", type=float, default=None)
-    parser.add_argument("--load-offline", default=None)
-    if args is None:
-        args = parser.parse_args()
-    else:
-        args = parser.parse_args(args)
+    epyq.startup.profile.mark("reactor install")
 
     can_logger_modules = ("can", "can.socketcan.native")
 
@@ -480,22 +924,68 @@ def main(args=None):
         for module in can_logger_modules:
             logging.getLogger(module).setLevel(logging.DEBUG)
 
-    window = Window()
+    epyq.symcache.install()
+    epyq.symbolindex.install()
+    if not args.build_all_dashboards:
+        epyq.dashboards.install()
+    epyq.memoryreads.install(
+        max_chunk=args.variable_read_chunk,
+        max_gap=args.variable_read_gap,
+        station_address=args.variable_station_address,
+    )
+
+    stall_detector = None
+    if args.stall_threshold > 0:
+        stall_report = args.stall_report
+        if stall_report is None:
+            stall_report = epyq.stalls.default_report_path()
+
+        stall_detector = epyq.stalls.StallDetector(
+            threshold=args.stall_threshold,
+            report_path=stall_report,
+        )
+
+    window = Window(
+        update_rate=args.update_rate,
+        stall_detector=stall_detector,
+        bus_threads=args.bus_threads,
+    )
     epyqlib.utils.qt.exception_message_box_register_parent(parent=window)
 
+    epyq.startup.profile.mark("Window construction")
+
+    if args.metrics_output is not None:
+        window.start_metrics()
+
+    def first_paint():
+        epyq.startup.profile.mark("first paint")
+
+        if args.startup_profile:
+            print(epyq.startup.profile.report())
+
+    first_paint_filter = FirstPaintFilter(callback=first_paint, parent=app)
+    app.installEventFilter(first_paint_filter)
+
     window.show()
 
     if args.quit_after:
         QtCore.QTimer.singleShot(args.quit_after * 1000, app.quit)
 
+    def offline_bus_node():
+        (bus_node,) = [
+            node
+            for node in window.ui.device_tree.model.root.children
+            if node.fields.name == "Offline"
+        ]
+
+        return bus_node
+
     if args.load_offline:
 
         def load_offline():
-            (bus_node,) = [
-                node
-                for node in window.ui.device_tree.model.root.children
-                if node.fields.name == "Offline"
-            ]
+            import epyqlib.tests.common
+
+            bus_node = offline_bus_node()
 
             split = args.load_offline.split("_", maxsplit=1)
             if split[0] == "test":
@@ -514,21 +1004,81 @@ def main(args=None):
 
         QtCore.QTimer.singleShot(0.5 * 1000, load_offline)
 
+    replay = None
+    if args.replay:
+        import epyq.replay
+
+        def replay_finished(statistics):
+            print("replay: {}".format(statistics.summary()))
+
+        def start_replay():
+            nonlocal replay
+
+            replay = epyq.replay.Replay(
+                path=args.replay,
+                proxy=offline_bus_node().bus,
+                speed=args.replay_speed,
+                finished=replay_finished,
+                call=reactor.callFromThread,
+            )
+            replay.start()
+
+        # after any --load-offline device so it sees the whole log
+        QtCore.QTimer.singleShot(1 * 1000, start_replay)
+
     from twisted.internet import reactor
 
+    if stall_detector is not None:
+        # only once the loop is about to run so startup is not a stall
+        stall_detector.start()
+
     reactor.runReturn()
     result = app.exec()
+    if stall_detector is not None:
+        stall_detector.stop()
+        logging.debug(
+            "Event loop stalls: %d, lag: %s",
+            stall_detector.stall_count,
+            stall_detector.histogram.to_dict(),
+        )
+    if replay is not None:
+        replay.stop(timeout=1)
     if reactor.threadpool is not None:
         reactor._stopThreadPool()
         logging.debug("Thread pool stopped")
     logging.debug("Application ended")
+    logging.debug("CAN database cache: %s", epyq.symcache.statistics.summary())
+    logging.debug("Symbol index: %s", epyq.symbolindex.statistics.summary())
+    logging.debug("Variable reads: %s", epyq.memoryreads.statistics.summary())
+    if window.update_scheduler is not None:
+        logging.debug("Widget updates: %s", window.update_scheduler.statistics)
+    if window.dispatcher is not None:
+        logging.debug("Bus threads: %s", window.dispatcher.queue.statistics)
+    if args.metrics_output is not None:
+        window.metrics.sample()
+        window.metrics.dump(args.metrics_output)
+        logging.debug("Performance metrics written to %s", args.metrics_output)
     reactor.stop()
     logging.debug("Reactor stopped")
 
+    if profiling_session is not None:
+        paths = profiling_session.stop()
+        print("profile written to {}".format(os.path.abspath(args.profile_output)))
+        for path in paths:
+            logging.debug("Profile output: %s", path)
+
+    logging.debug("Logging: %s", async_logging.statistics)
+    async_logging.stop()
+
     # TODO: this should be sys.exit() but something keeps the process
     #       from terminating.  Ref T679  Ref T711
     os._exit(result)
 
 
 if __name__ == "__main__":
+    # the CAN log export formats in worker processes, also when frozen
+    import multiprocessing
+
+    multiprocessing.freeze_support()
+
     sys.exit(main())
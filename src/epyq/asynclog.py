@@ -0,0 +1,403 @@
+"""
+Asynchronous logging to a rotating file.  Records from every thread, along
+with copies of everything written to stdout and stderr, are put on a
+bounded queue without blocking and a background thread formats and writes
+them.  The file is rotated by size or time, rotated files are optionally
+gzip compressed and each logger is rate limited so a flood of records from
+one noisy logger such as ``can.socketcan.native`` is summarized rather than
+written.  If the writer falls behind, new records are dropped and counted
+instead of holding up the thread logging them.
+"""
+
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+
+import attr
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+default_path = "epyq.log"
+default_format = "%(asctime)s - %(levelname)s - %(message)s"
+default_max_bytes = 10 * 1024 * 1024
+default_backups = 5
+default_rate = 100
+default_queue_size = 10000
+
+
+@attr.s
+class Statistics:
+    """
+    Args:
+        queued (int): Records put on the queue.
+        dropped (int): Records discarded because the queue was full.
+        suppressed (int): Records discarded by the rate limit.
+    """
+
+    queued = attr.ib(default=0)
+    dropped = attr.ib(default=0)
+    suppressed = attr.ib(default=0)
+
+
+@attr.s
+class _Bucket:
+    tokens = attr.ib()
+    updated = attr.ib()
+    suppressed = attr.ib(default=0)
+
+
+@attr.s
+class RateLimitFilter:
+    """
+    A token bucket for each logger.  The first record let through after
+    some were suppressed notes how many.
+
+    Args:
+        rate (float): Records per second allowed for each logger.
+        burst (int): Records allowed at once, twice the rate if None.
+        exempt_level (int): Records at or above this level are never
+        suppressed.
+        statistics (Statistics): Where suppressed records are counted.
+        clock (callable): Monotonic time in seconds.
+    """
+
+    rate = attr.ib(default=default_rate)
+    burst = attr.ib(default=None)
+    exempt_level = attr.ib(default=logging.ERROR)
+    statistics = attr.ib(factory=Statistics)
+    clock = attr.ib(default=time.monotonic)
+    _buckets = attr.ib(factory=dict, init=False)
+    _lock = attr.ib(factory=threading.Lock, init=False)
+
+    def __attrs_post_init__(self):
+        if self.burst is None:
+            self.burst = 2 * self.rate
+
+    def filter(self, record):
+        if record.levelno >= self.exempt_level:
+            return True
+
+        now = self.clock()
+
+        with self._lock:
+            bucket = self._buckets.get(record.name)
+            if bucket is None:
+                bucket = _Bucket(tokens=self.burst, updated=now)
+                self._buckets[record.name] = bucket
+
+            bucket.tokens = min(
+                self.burst,
+                bucket.tokens + (now - bucket.updated) * self.rate,
+            )
+            bucket.updated = now
+
+            if bucket.tokens < 1:
+                bucket.suppressed += 1
+                self.statistics.suppressed += 1
+                return False
+
+            bucket.tokens -= 1
+            suppressed = bucket.suppressed
+            bucket.suppressed = 0
+
+        if suppressed > 0:
+            record.msg = "[{} earlier messages suppressed] {}".format(
+                suppressed,
+                record.getMessage(),
+            )
+            record.args = None
+
+        return True
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a bounded queue, counting those that do not fit rather
+    than waiting for room.
+    """
+
+    def __init__(self, queue, statistics):
+        super().__init__(queue)
+        self.statistics = statistics
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.statistics.dropped += 1
+        else:
+            self.statistics.queued += 1
+
+
+class Formatter(logging.Formatter):
+    """
+    Writes text copied from stdout and stderr as is and formats everything
+    else normally.
+    """
+
+    def format(self, record):
+        if getattr(record, "stream_copy", False):
+            return record.getMessage()
+
+        return super().format(record)
+
+
+def _not_stream_copy(record):
+    return not getattr(record, "stream_copy", False)
+
+
+def _gzip_name(name):
+    return name + ".gz"
+
+
+def _gzip_rotate(source, destination):
+    with open(source, "rb") as f_in:
+        with gzip.open(destination, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def file_handler(
+    path,
+    max_bytes=default_max_bytes,
+    backups=default_backups,
+    when=None,
+    compress=False,
+):
+    """
+    Args:
+        path (str): The log file.
+        max_bytes (int): Size at which to rotate the file, 0 never to.
+        Ignored if ``when`` is given.
+        backups (int): Rotated files kept.
+        when (str, optional): Rotate by time instead, as for
+        :class:`logging.handlers.TimedRotatingFileHandler`, such as
+        ``"midnight"`` or ``"H"``.
+        compress (bool): Whether to gzip rotated files.
+
+    Returns:
+        logging.Handler: The handler writing the file.
+    """
+    if when is None:
+        handler = logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=max_bytes,
+            backupCount=backups,
+            encoding="utf-8",
+        )
+    else:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            path,
+            when=when,
+            backupCount=backups,
+            encoding="utf-8",
+        )
+
+    if compress:
+        handler.namer = _gzip_name
+        handler.rotator = _gzip_rotate
+
+    return handler
+
+
+class StreamCopy:
+    """
+    Stands in for stdout or stderr, writing through to the console and
+    copying each complete line to a logger.
+
+    Args:
+        console (file, optional): The original stream, None when there is
+        no console such as for a windowed build.
+        logger (logging.Logger): Receives each line.
+        level (int): Level of the copied lines.
+    """
+
+    def __init__(self, console, logger, level=logging.INFO):
+        self.console = console
+        self.logger = logger
+        self.level = level
+        self._partial = ""
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        if self.console is not None:
+            self.console.write(text)
+
+        with self._lock:
+            lines = (self._partial + text).split("\n")
+            self._partial = lines.pop()
+
+        for line in lines:
+            self._log(line)
+
+        return len(text)
+
+    def flush(self):
+        if self.console is not None:
+            self.console.flush()
+
+        with self._lock:
+            partial = self._partial
+            self._partial = ""
+
+        if len(partial) > 0:
+            self._log(partial)
+
+    def _log(self, line):
+        self.logger.log(self.level, "%s", line, extra={"stream_copy": True})
+
+    def writable(self):
+        return True
+
+    def __getattr__(self, name):
+        # fileno(), isatty(), encoding and so on of the console
+        if self.console is None:
+            raise AttributeError(name)
+
+        return getattr(self.console, name)
+
+
+@attr.s
+class AsyncLogging:
+    """
+    Routes the root logger and optionally stdout and stderr through a queue
+    to a file and the console.
+
+    Args:
+        handler (logging.Handler): Writes the file, see :func:`file_handler`.
+        rate (float): Records per second allowed for each logger, 0 for no
+        limit.
+        queue_size (int): Records held for the writer before new ones are
+        dropped.
+        format (str): Format of the records.
+        console (file, optional): Where records are also written, None to
+        write only the file.
+    """
+
+    handler = attr.ib()
+    rate = attr.ib(default=default_rate)
+    queue_size = attr.ib(default=default_queue_size)
+    format = attr.ib(default=default_format)
+    console = attr.ib(default=None)
+    statistics = attr.ib(factory=Statistics)
+    queue_handler = attr.ib(default=None)
+    listener = attr.ib(default=None)
+    _replaced = attr.ib(factory=list, init=False)
+    _streams = attr.ib(factory=dict, init=False)
+
+    def start(self, capture_streams=True):
+        """
+        Replace the root logger's handlers and start the writer thread.
+
+        Args:
+            capture_streams (bool): Also copy stdout and stderr to the file.
+        """
+        formatter = Formatter(self.format)
+        self.handler.setFormatter(formatter)
+        handlers = [self.handler]
+
+        if self.console is not None:
+            console = logging.StreamHandler(self.console)
+            console.setFormatter(formatter)
+            console.addFilter(_not_stream_copy)
+            handlers.append(console)
+
+        self.queue_handler = QueueHandler(
+            queue=queue.Queue(self.queue_size),
+            statistics=self.statistics,
+        )
+        if self.rate > 0:
+            self.queue_handler.addFilter(
+                RateLimitFilter(rate=self.rate, statistics=self.statistics),
+            )
+
+        self.listener = logging.handlers.QueueListener(
+            self.queue_handler.queue,
+            *handlers,
+            respect_handler_level=True,
+        )
+        self.listener.start()
+
+        root = logging.getLogger()
+        self._replaced = list(root.handlers)
+        for handler in self._replaced:
+            root.removeHandler(handler)
+        root.addHandler(self.queue_handler)
+
+        if capture_streams:
+            for name in ("stdout", "stderr"):
+                original = getattr(sys, name)
+                self._streams[name] = original
+                logger = logging.getLogger("epyq." + name)
+                # copied regardless of the root logger's level
+                logger.setLevel(logging.INFO)
+                setattr(sys, name, StreamCopy(console=original, logger=logger))
+
+    def stop(self):
+        """
+        Restore stdout, stderr and the root logger's handlers and write
+        everything still queued.
+        """
+        for name, original in self._streams.items():
+            stream = getattr(sys, name)
+            if isinstance(stream, StreamCopy):
+                stream.flush()
+            setattr(sys, name, original)
+        self._streams = {}
+
+        root = logging.getLogger()
+        root.removeHandler(self.queue_handler)
+
+        self.listener.stop()
+        self.handler.close()
+
+        for handler in self._replaced:
+            root.addHandler(handler)
+        self._replaced = []
+
+
+def setup(
+    path=default_path,
+    max_bytes=default_max_bytes,
+    backups=default_backups,
+    when=None,
+    compress=False,
+    rate=default_rate,
+    queue_size=default_queue_size,
+    capture_streams=True,
+):
+    """
+    Start asynchronous logging to ``path``, see :func:`file_handler` and
+    :class:`AsyncLogging`.
+
+    Returns:
+        AsyncLogging: Stop it when the application exits.
+    """
+    console = sys.stderr
+    if isinstance(console, StreamCopy):
+        console = console.console
+
+    result = AsyncLogging(
+        handler=file_handler(
+            path=path,
+            max_bytes=max_bytes,
+            backups=backups,
+            when=when,
+            compress=compress,
+        ),
+        rate=rate,
+        queue_size=queue_size,
+        console=console,
+    )
+    result.start(capture_streams=capture_streams)
+
+    return result
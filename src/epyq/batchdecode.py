@@ -0,0 +1,724 @@
+"""
+Batch decoding of logged CAN frames into per signal columns.  A
+:class:`Database` compiles each message of a :mod:`canmatrix` matrix, such
+as loaded by :func:`epyq.symcache.load_matrix`, into shifts and masks and
+indexes them by arbitration ID and multiplexer value.  :class:`Decoder` then
+groups frames by that key and extracts, scales and maps each signal across
+the whole group at once into :class:`array.array` columns rather than
+decoding frame by frame.  :meth:`Database.decode_frame` uses the same index
+for single received frames.
+"""
+
+import array
+import collections
+import math
+import struct
+import time
+
+import attr
+
+import epyq.canrecord
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+ignored_flags = epyq.canrecord.flag_remote | epyq.canrecord.flag_error
+
+
+@attr.s(frozen=True)
+class SignalLayout:
+    """
+    Where a signal lives in a frame's eight data bytes and how to scale it.
+
+    Args:
+        name (str): The signal name.
+        shift (int): Right shift of the payload word to the signal's least
+        significant bit.
+        size (int): Width in bits.
+        big_endian (bool): Whether ``shift`` applies to the payload read as
+        a big endian word, otherwise little endian.
+        signed (bool): Two's complement raw value.
+        float_format (str, optional): :mod:`struct` format if the raw bits
+        are an IEEE float.
+        factor (float): Scale applied to the raw value.
+        offset (float): Added after scaling.
+        enumeration (dict): Labels keyed by raw value.
+    """
+
+    name = attr.ib()
+    shift = attr.ib()
+    size = attr.ib()
+    big_endian = attr.ib()
+    signed = attr.ib()
+    float_format = attr.ib()
+    factor = attr.ib()
+    offset = attr.ib()
+    enumeration = attr.ib()
+
+    @classmethod
+    def from_signal(cls, signal):
+        if signal.is_little_endian:
+            shift = signal.start_bit
+        else:
+            shift = 64 - signal.start_bit - signal.size
+
+        float_format = None
+        if signal.is_float:
+            float_format = {32: "<f", 64: "<d"}[signal.size]
+
+        return cls(
+            name=signal.name,
+            shift=shift,
+            size=signal.size,
+            big_endian=not signal.is_little_endian,
+            signed=signal.is_signed,
+            float_format=float_format,
+            factor=float(signal.factor),
+            offset=float(signal.offset),
+            enumeration=dict(signal.values),
+        )
+
+    def raw(self, big_words, little_words):
+        """
+        Extract the raw values from payload words.
+
+        Args:
+            big_words (list): Payloads as big endian integers.
+            little_words (list): Payloads as little endian integers.
+
+        Returns:
+            list: The raw integer values.
+        """
+        words = big_words if self.big_endian else little_words
+        shift = self.shift
+        mask = (1 << self.size) - 1
+        values = [(word >> shift) & mask for word in words]
+
+        if self.signed:
+            sign = 1 << (self.size - 1)
+            wrap = 1 << self.size
+            values = [value - wrap if value & sign else value for value in values]
+
+        return values
+
+    def raw_one(self, big_word, little_word):
+        """
+        Extract the raw value from a single payload, see :meth:`raw`.
+        """
+        word = big_word if self.big_endian else little_word
+        value = (word >> self.shift) & ((1 << self.size) - 1)
+
+        if self.signed and value >> (self.size - 1):
+            value -= 1 << self.size
+
+        return value
+
+    def unpack_one(self, raw):
+        """
+        Returns:
+            The raw value as :mod:`epyqlib.canneo` holds it, the float for
+            IEEE float signals and otherwise the integer itself.
+        """
+        if self.float_format is None:
+            return raw
+
+        (value,) = struct.unpack(
+            self.float_format, raw.to_bytes(self.size // 8, "little")
+        )
+
+        return value
+
+    def from_human(self, value):
+        """
+        Args:
+            value: A scaled number, or an enumeration label.
+
+        Returns:
+            int: The raw value, the IEEE bits for float signals.
+        """
+        if isinstance(value, str):
+            for raw, label in self.enumeration.items():
+                if label == value:
+                    return raw
+
+            value = float(value)
+
+        value = (value - self.offset) / self.factor
+
+        if self.float_format is not None:
+            packed = struct.pack(self.float_format, value)
+            return int.from_bytes(packed, "little")
+
+        return int(round(value))
+
+    def pack_one(self, raw):
+        """
+        Returns:
+            tuple: The big and little endian payload words holding ``raw``,
+            see :func:`encode`.
+        """
+        bits = (raw & ((1 << self.size) - 1)) << self.shift
+
+        if self.big_endian:
+            return bits, 0
+
+        return 0, bits
+
+    def scale_one(self, raw):
+        return self.unpack_one(raw) * self.factor + self.offset
+
+    def scale(self, raw):
+        """
+        Returns:
+            array.array: The scaled values as doubles.
+        """
+        if self.float_format is not None:
+            size = self.size // 8
+            unpack = struct.Struct(self.float_format).unpack
+            raw = [unpack(value.to_bytes(size, "little"))[0] for value in raw]
+
+        factor = self.factor
+        offset = self.offset
+        if factor == 1 and offset == 0:
+            return array.array("d", raw)
+
+        return array.array("d", [value * factor + offset for value in raw])
+
+    def labels(self, raw):
+        """
+        Returns:
+            list: The enumeration label for each raw value, None when not
+            enumerated.
+        """
+        get = self.enumeration.get
+        return [get(value) for value in raw]
+
+
+@attr.s(frozen=True)
+class MessageLayout:
+    """
+    Args:
+        name (str): The message name.
+        id (int): Arbitration ID.
+        multiplexer (SignalLayout, optional): The multiplexer signal.
+        branches (dict): Lists of :class:`SignalLayout` keyed by multiplexer
+        value, or by None for a message without a multiplexer.
+        branch_names (dict): Path element for each multiplexer value, its
+        enumeration label when there is one.
+        extended (bool): Whether ``id`` is a 29 bit extended ID.
+    """
+
+    name = attr.ib()
+    id = attr.ib()
+    multiplexer = attr.ib()
+    branches = attr.ib()
+    branch_names = attr.ib()
+    extended = attr.ib(default=False)
+
+    @classmethod
+    def from_frame(cls, frame):
+        multiplexer = None
+        branches = collections.defaultdict(list)
+
+        for signal in frame.signals:
+            layout = SignalLayout.from_signal(signal)
+
+            if signal.multiplex == "Multiplexor":
+                multiplexer = layout
+            else:
+                branches[signal.mux_val].append(layout)
+
+        branch_names = {}
+        if multiplexer is not None:
+            common = branches.pop(None, [])
+            for value, signals in branches.items():
+                signals[:0] = common
+                branch_names[value] = multiplexer.enumeration.get(value, str(value))
+
+        return cls(
+            name=frame.name,
+            id=frame.arbitration_id.id,
+            multiplexer=multiplexer,
+            branches=dict(branches),
+            branch_names=branch_names,
+            extended=bool(frame.arbitration_id.extended),
+        )
+
+    def path(self, value, signal):
+        """
+        Returns:
+            tuple: The signal path as used by :mod:`epyqlib.canneo`.
+        """
+        if self.multiplexer is None:
+            return (self.name, signal.name)
+
+        return (self.name, self.branch_names[value], signal.name)
+
+
+@attr.s(frozen=True)
+class Branch:
+    """
+    The signals decoded for one arbitration ID and multiplexer value.
+
+    Args:
+        message (MessageLayout): The message the branch belongs to.
+        value (int, optional): The multiplexer value, None when the message
+        is not multiplexed.
+        signals (tuple): ``(path, SignalLayout)`` pairs.
+    """
+
+    message = attr.ib()
+    value = attr.ib()
+    signals = attr.ib()
+
+
+@attr.s
+class DispatchStatistics:
+    """
+    Args:
+        frames (int): Frames passed to :meth:`Database.decode_frame`.
+        multiplexed (int): Those resolved through a multiplexer value.
+        unknown (int): Those with no matching ID or multiplexer value.
+        seconds (float): Time spent decoding.
+    """
+
+    frames = attr.ib(default=0)
+    multiplexed = attr.ib(default=0)
+    unknown = attr.ib(default=0)
+    seconds = attr.ib(default=0.0)
+
+    def frames_per_second(self):
+        if self.seconds <= 0:
+            return 0.0
+
+        return self.frames / self.seconds
+
+
+@attr.s
+class Database:
+    """
+    Compiled message layouts.
+
+    Args:
+        messages (dict): :class:`MessageLayout` keyed by arbitration ID.
+        multiplexers (dict): Multiplexer :class:`SignalLayout` keyed by the
+        arbitration ID of each multiplexed message.
+        branches (dict): :class:`Branch` keyed by ``(id, multiplexer value)``
+        with None for the value of messages that are not multiplexed.
+    """
+
+    messages = attr.ib()
+    multiplexers = attr.ib()
+    branches = attr.ib()
+    statistics = attr.ib(factory=DispatchStatistics)
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        messages = {}
+        multiplexers = {}
+        branches = {}
+
+        for frame in matrix.frames:
+            message = MessageLayout.from_frame(frame)
+            messages[message.id] = message
+
+            if message.multiplexer is not None:
+                multiplexers[message.id] = message.multiplexer
+
+            for value, signals in message.branches.items():
+                branches[(message.id, value)] = Branch(
+                    message=message,
+                    value=value,
+                    signals=tuple(
+                        (message.path(value, signal), signal) for signal in signals
+                    ),
+                )
+
+            if message.multiplexer is None and None not in message.branches:
+                branches[(message.id, None)] = Branch(
+                    message=message,
+                    value=None,
+                    signals=(),
+                )
+
+        return cls(messages=messages, multiplexers=multiplexers, branches=branches)
+
+    def renumbered(self, ids):
+        """
+        Args:
+            ids (dict): New arbitration IDs keyed by message name, such as
+            for a matrix adjusted for a device's node ID.
+
+        Returns:
+            Database: A copy with the messages named in ``ids`` moved to
+            their new IDs.
+        """
+        moved = {
+            id: attr.evolve(message, id=ids[message.name])
+            for id, message in self.messages.items()
+            if message.name in ids
+        }
+
+        def new_id(id):
+            message = moved.get(id)
+            return id if message is None else message.id
+
+        branches = {}
+        for (id, value), branch in self.branches.items():
+            message = moved.get(id)
+            if message is not None:
+                branch = attr.evolve(branch, message=message)
+            branches[(new_id(id), value)] = branch
+
+        return type(self)(
+            messages={new_id(id): moved.get(id, m) for id, m in self.messages.items()},
+            multiplexers={new_id(id): m for id, m in self.multiplexers.items()},
+            branches=branches,
+        )
+
+    def decode_frame(self, id, data, scale=True, extended=None):
+        """
+        Decode one frame with a single lookup of its ID and multiplexer value.
+
+        Args:
+            id (int): Arbitration ID.
+            data (bytes-like): Up to eight bytes of payload.
+            scale (bool): Whether to scale the values, otherwise they are
+            left as from :meth:`SignalLayout.unpack_one`.
+            extended (bool, optional): Whether the frame has an extended ID,
+            a frame whose flag differs from its message's is not decoded.
+            None skips the check.
+
+        Returns:
+            dict: Values keyed by signal path, None if the frame is not in
+            the database.
+        """
+        start = time.perf_counter()
+        statistics = self.statistics
+        statistics.frames += 1
+
+        payload = bytes(data).ljust(8, b"\0")
+        big_word = int.from_bytes(payload, "big")
+        little_word = int.from_bytes(payload, "little")
+
+        multiplexer = self.multiplexers.get(id)
+        if multiplexer is None:
+            key = (id, None)
+        else:
+            key = (id, multiplexer.raw_one(big_word, little_word))
+            statistics.multiplexed += 1
+
+        branch = self.branches.get(key)
+        if branch is not None and extended is not None:
+            if bool(extended) != branch.message.extended:
+                branch = None
+
+        if branch is None:
+            statistics.unknown += 1
+            decoded = None
+        elif scale:
+            decoded = {
+                path: signal.scale_one(signal.raw_one(big_word, little_word))
+                for path, signal in branch.signals
+            }
+        else:
+            decoded = {
+                path: signal.unpack_one(signal.raw_one(big_word, little_word))
+                for path, signal in branch.signals
+            }
+
+        statistics.seconds += time.perf_counter() - start
+
+        return decoded
+
+
+def encode(values):
+    """
+    Args:
+        values (iterable): ``(SignalLayout, raw)`` pairs.
+
+    Returns:
+        bytes: The eight byte payload holding the values.
+    """
+    big_word = 0
+    little_word = 0
+    for layout, raw in values:
+        big, little = layout.pack_one(raw)
+        big_word |= big
+        little_word |= little
+
+    return bytes(
+        a | b
+        for a, b in zip(big_word.to_bytes(8, "big"), little_word.to_bytes(8, "little"))
+    )
+
+
+@attr.s
+class Column:
+    """
+    Decoded values of one signal.
+
+    Args:
+        times (array.array): Frame timestamps.
+        values (array.array): Scaled values.
+        raw (array.array): Raw integer values.
+        labels (list, optional): Enumeration labels for enumerated signals.
+    """
+
+    times = attr.ib(factory=lambda: array.array("d"))
+    values = attr.ib(factory=lambda: array.array("d"))
+    raw = attr.ib(factory=lambda: array.array("q"))
+    labels = attr.ib(default=None)
+
+    def __len__(self):
+        return len(self.times)
+
+
+@attr.s
+class Decoder:
+    """
+    Accumulates decoded columns over any number of batches.
+
+    Args:
+        database (Database): The compiled CAN database.
+        bus (int, optional): The only bus decoded when batches carry bus
+        numbers.  None requires that all their frames are on one bus.
+        last_time (float): Time given to untimed frames until a timed frame
+        is fed, NaN to skip them.
+    """
+
+    database = attr.ib()
+    bus = attr.ib(default=None)
+    last_time = attr.ib(default=math.nan)
+    columns = attr.ib(factory=dict, init=False)
+    unknown = attr.ib(default=0, init=False)
+    skipped = attr.ib(default=0, init=False)
+    _buses = attr.ib(factory=set, init=False)
+
+    def feed(self, times, ids, data, flags=None, buses=None):
+        """
+        Decode a batch of frames.  Frames with a NaN time, as transmitted
+        frames are logged, take the time of the frame before them.
+
+        Args:
+            times (sequence): Timestamps.
+            ids (sequence): Arbitration IDs.
+            data (bytes-like): Eight bytes of payload per frame, zero padded.
+            flags (sequence, optional): :mod:`epyq.canrecord` flags.  Remote
+            and error frames are skipped and the extended flag must match
+            the message's.
+            buses (sequence, optional): Bus numbers, see :attr:`bus`.
+
+        Returns:
+            int: The number of frames decoded.
+
+        Raises:
+            ValueError: For frames from several buses and no :attr:`bus`.
+        """
+        data = memoryview(data).cast("B")
+        times = self._timed(times)
+
+        if buses is not None and self.bus is None:
+            self._buses.update(buses)
+            if len(self._buses) > 1:
+                raise ValueError(
+                    "Frames from buses {}, choose one to decode".format(
+                        ", ".join(str(bus) for bus in sorted(self._buses)),
+                    )
+                )
+
+        groups = collections.defaultdict(list)
+        for index, id in enumerate(ids):
+            if self.bus is not None and buses is not None and buses[index] != self.bus:
+                continue
+
+            extended = None
+            if flags is not None:
+                frame_flags = flags[index]
+                if frame_flags & ignored_flags:
+                    self.skipped += 1
+                    continue
+                extended = bool(frame_flags & epyq.canrecord.flag_extended)
+
+            if math.isnan(times[index]):
+                self.skipped += 1
+                continue
+
+            groups[(id, extended)].append(index)
+
+        decoded = 0
+        for (id, extended), indexes in groups.items():
+            message = self.database.messages.get(id)
+            if message is None or (
+                extended is not None and extended != message.extended
+            ):
+                self.unknown += len(indexes)
+                continue
+
+            payloads = [bytes(data[8 * i : 8 * i + 8]) for i in indexes]
+            big_words = [int.from_bytes(payload, "big") for payload in payloads]
+            little_words = [int.from_bytes(payload, "little") for payload in payloads]
+            group_times = [times[i] for i in indexes]
+
+            multiplexer = self.database.multiplexers.get(id)
+            if multiplexer is None:
+                self._decode(
+                    branch=self.database.branches[(id, None)],
+                    times=group_times,
+                    big_words=big_words,
+                    little_words=little_words,
+                )
+                decoded += len(indexes)
+                continue
+
+            branches = collections.defaultdict(list)
+            for position, value in enumerate(multiplexer.raw(big_words, little_words)):
+                branches[value].append(position)
+
+            for value, positions in branches.items():
+                branch = self.database.branches.get((id, value))
+                if branch is None:
+                    self.unknown += len(positions)
+                    continue
+
+                self._decode(
+                    branch=branch,
+                    times=[group_times[p] for p in positions],
+                    big_words=[big_words[p] for p in positions],
+                    little_words=[little_words[p] for p in positions],
+                )
+                decoded += len(positions)
+
+        return decoded
+
+    def _timed(self, times):
+        # as epyq.canlogexport.timed_frames
+        timed = []
+        last_time = self.last_time
+        for time_ in times:
+            if math.isnan(time_):
+                time_ = last_time
+            else:
+                last_time = time_
+            timed.append(time_)
+
+        self.last_time = last_time
+
+        return timed
+
+    def _decode(self, branch, times, big_words, little_words):
+        for path, signal in branch.signals:
+            column = self.columns.get(path)
+            if column is None:
+                column = Column()
+                if len(signal.enumeration) > 0:
+                    column.labels = []
+                self.columns[path] = column
+
+            raw = signal.raw(big_words, little_words)
+            column.times.extend(times)
+            column.raw.extend(raw)
+            column.values.extend(signal.scale(raw))
+            if column.labels is not None:
+                column.labels.extend(signal.labels(raw))
+
+
+def decode_frames(database, frames):
+    """
+    Args:
+        database (Database): The compiled CAN database.
+        frames (iterable): ``(time, id, data)`` tuples.
+
+    Returns:
+        dict: :class:`Column` keyed by signal path.
+    """
+    times = array.array("d")
+    ids = array.array("L")
+    data = bytearray()
+
+    for time_, id, payload in frames:
+        times.append(time_)
+        ids.append(id)
+        data += bytes(payload).ljust(8, b"\0")[:8]
+
+    decoder = Decoder(database=database)
+    decoder.feed(times=times, ids=ids, data=data)
+
+    return decoder.columns
+
+
+def decode_binlog(database, reader, bus=None):
+    """
+    Decode every chunk of a binary CAN log, see :mod:`epyq.binlog`.
+
+    Args:
+        database (Database): The compiled CAN database.
+        reader (epyq.binlog.Reader): The open log.
+        bus (int, optional): The bus to decode from a merged log, see
+        :class:`Decoder`.
+
+    Returns:
+        dict: :class:`Column` keyed by signal path.
+    """
+    first_time = reader.first_time()
+    decoder = Decoder(
+        database=database,
+        bus=bus,
+        last_time=math.nan if first_time is None else first_time,
+    )
+
+    for chunk in range(len(reader.index)):
+        columns = reader.columns(chunk)
+        try:
+            decoder.feed(
+                times=columns.times,
+                ids=columns.ids,
+                data=columns.data,
+                flags=columns.flags,
+                buses=columns.buses,
+            )
+        finally:
+            for view in attr.astuple(columns, recurse=False):
+                view.release()
+
+    return decoder.columns
+
+
+def benchmark(matrix, frames):
+    """
+    Time batch decoding and :meth:`Database.decode_frame` against decoding
+    each frame through :meth:`canmatrix.Frame.decode`.
+
+    Args:
+        matrix (canmatrix.CanMatrix): The CAN database.
+        frames (list): ``(time, id, data)`` tuples.
+
+    Returns:
+        dict: Seconds taken by ``compile``, ``batch``, ``dispatch`` and
+        ``per_frame``.
+    """
+    start = time.perf_counter()
+    database = Database.from_matrix(matrix)
+    compiled = time.perf_counter()
+    decode_frames(database=database, frames=frames)
+    batch = time.perf_counter()
+
+    for time_, id, payload in frames:
+        database.decode_frame(id, payload)
+    dispatch = time.perf_counter()
+
+    by_id = {frame.arbitration_id.id: frame for frame in matrix.frames}
+    for time_, id, payload in frames:
+        frame = by_id.get(id)
+        if frame is not None:
+            frame.decode(bytes(payload)[: frame.size])
+    per_frame = time.perf_counter()
+
+    return {
+        "compile": compiled - start,
+        "batch": batch - compiled,
+        "dispatch": dispatch - batch,
+        "per_frame": per_frame - dispatch,
+    }
@@ -0,0 +1,531 @@
+"""
+End to end CAN throughput benchmarks on a python-can virtual bus.  A device
+or a bare CAN database is attached to a :class:`epyqlib.busproxy.BusProxy` on
+a virtual channel and generated traffic is injected at a controlled rate
+from a second bus on the same channel.  Receive throughput, the latency from
+a frame being sent until its signals and widgets have updated, the jitter of
+cyclically transmitted frames and the memory growth while receiving are
+measured and can be compared against stored baselines.
+
+Run ``python -m epyq.benchmark --baseline benchmarks.json`` to check for
+regressions and add ``--update-baseline`` to record new baselines.
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import pathlib
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+import attr
+import can
+
+import epyq.batchdecode
+import epyq.canrecord
+import epyq.replay
+import epyq.symcache
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+root = pathlib.Path(__file__).resolve().parents[2]
+default_targets = (
+    root / "example.epc",
+    pathlib.Path(__file__).resolve().parent / "AFE_CAN_ID247_FACTORY.sym",
+)
+
+_channels = itertools.count()
+
+
+@attr.s(frozen=True)
+class Metric:
+    """
+    Args:
+        name (str): Key in the results.
+        higher_is_better (bool): Direction of an improvement.
+        slack (float): Absolute change always tolerated, to keep small
+        and noisy values from failing on relative changes alone.
+    """
+
+    name = attr.ib()
+    higher_is_better = attr.ib(default=False)
+    slack = attr.ib(default=0)
+
+
+metrics = (
+    Metric(name="receive_frames_per_second", higher_is_better=True),
+    Metric(name="latency_p50_ms", slack=1),
+    Metric(name="latency_p95_ms", slack=2),
+    Metric(name="latency_p99_ms", slack=5),
+    Metric(name="tx_jitter_p50_ms", slack=1),
+    Metric(name="tx_jitter_p99_ms", slack=5),
+    Metric(name="memory_growth_kib", slack=256),
+)
+
+
+def percentile(values, fraction):
+    """
+    Returns:
+        float: The nearest rank percentile of ``values``, None when empty.
+    """
+    if len(values) == 0:
+        return None
+
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+
+    return ordered[index]
+
+
+def regressions(results, baseline, tolerance=0.25):
+    """
+    Compare results against a baseline.
+
+    Args:
+        results (dict): Measured values keyed by metric name.
+        baseline (dict): Baseline values keyed by metric name.  Metrics
+        without a baseline or result are not compared.
+        tolerance (float): Relative change tolerated beyond each metric's
+        slack.
+
+    Returns:
+        list: A description of each regressed metric.
+    """
+    found = []
+
+    for metric in metrics:
+        result = results.get(metric.name)
+        reference = baseline.get(metric.name)
+        if result is None or reference is None:
+            continue
+
+        if metric.higher_is_better:
+            limit = reference * (1 - tolerance) - metric.slack
+            regressed = result < limit
+        else:
+            limit = reference * (1 + tolerance) + metric.slack
+            regressed = result > limit
+
+        if regressed:
+            found.append(
+                "{name}: {result:.3f} against baseline {reference:.3f}"
+                " (limit {limit:.3f})".format(
+                    name=metric.name,
+                    result=result,
+                    reference=reference,
+                    limit=limit,
+                )
+            )
+
+    return found
+
+
+def traffic(matrix, count, seed=0):
+    """
+    Generate random frames for the messages of a CAN database.  Multiplexed
+    messages are given a multiplexer value defined in the database.
+
+    Args:
+        matrix (canmatrix.CanMatrix): The CAN database.
+        count (int): Number of frames.
+        seed (int): Seed for repeatable traffic.
+
+    Returns:
+        list: ``(id, flags, data)`` tuples.
+    """
+    database = epyq.batchdecode.Database.from_matrix(matrix)
+    generator = random.Random(seed)
+    frames = [frame for frame in matrix.frames if frame.size > 0]
+    values = {}
+    for id, value in database.branches:
+        if value is not None:
+            values.setdefault(id, []).append(value)
+
+    generated = []
+    for _ in range(count):
+        frame = generator.choice(frames)
+        id = frame.arbitration_id.id
+        data = bytes(generator.getrandbits(8) for _ in range(8))
+
+        multiplexer = database.multiplexers.get(id)
+        if multiplexer is not None and id in values:
+            order = "big" if multiplexer.big_endian else "little"
+            mask = ((1 << multiplexer.size) - 1) << multiplexer.shift
+            raw = generator.choice(values[id]) & ((1 << multiplexer.size) - 1)
+            word = int.from_bytes(data, order) & ~mask | raw << multiplexer.shift
+            data = word.to_bytes(8, order)
+
+        flags = 0
+        if frame.arbitration_id.extended:
+            flags |= epyq.canrecord.flag_extended
+
+        generated.append((id, flags, data[: frame.size]))
+
+    return generated
+
+
+def process_events_until(predicate, timeout):
+    """
+    Run the Qt event loop until ``predicate`` returns true.
+
+    Returns:
+        bool: Whether ``predicate`` was satisfied before the timeout.
+    """
+    from PyQt5 import QtCore
+
+    deadline = time.monotonic() + timeout
+
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+
+        QtCore.QCoreApplication.processEvents(QtCore.QEventLoop.AllEvents, 10)
+        time.sleep(0.0005)
+
+    return True
+
+
+@attr.s
+class Rig:
+    """
+    A bus proxy on a virtual channel with a second bus to inject traffic.
+
+    Args:
+        proxy (epyqlib.busproxy.BusProxy): Set to the receiving virtual bus.
+    """
+
+    proxy = attr.ib()
+    channel = attr.ib(
+        factory=lambda: "epyq-benchmark-{}".format(next(_channels)),
+    )
+    injector = attr.ib(default=None, init=False)
+
+    def __attrs_post_init__(self):
+        self.proxy.set_bus(
+            bus=can.interface.Bus(bustype="virtual", channel=self.channel),
+        )
+        self.injector = can.interface.Bus(bustype="virtual", channel=self.channel)
+
+    def shutdown(self):
+        self.proxy.set_bus()
+        self.injector.shutdown()
+
+    def drain(self):
+        """
+        Discard frames transmitted by the proxy that queued up on the
+        injecting bus.
+        """
+        while self.injector.recv(timeout=0) is not None:
+            pass
+
+    def inject(self, frames, rate=None):
+        """
+        Send frames from another thread.
+
+        Args:
+            frames (list): ``(id, flags, data)`` tuples.
+            rate (float, optional): Frames per second, as fast as possible
+            when not given.
+
+        Returns:
+            threading.Thread: The started sending thread.
+        """
+        interval = 0 if rate is None else 1 / rate
+        replayer = epyq.replay.Replayer(
+            frames=[
+                (i * interval, 0, id, flags, len(data), data)
+                for i, (id, flags, data) in enumerate(frames)
+            ],
+            send=self.injector.send,
+            speed=0 if rate is None else 1,
+        )
+        thread = threading.Thread(target=replayer.run, daemon=True)
+        thread.start()
+
+        return thread
+
+
+@attr.s
+class Receiver:
+    """
+    Records the latency of each frame delivered to a neo.  Its slots are
+    connected after those of the frames so they run once the signals, and
+    the widgets connected to them, have been updated.
+    """
+
+    latencies = attr.ib(factory=list)
+    first = attr.ib(default=None)
+    last = attr.ib(default=None)
+
+    def connect(self, neo):
+        for frame in neo.frames:
+            if frame.mux_name is None:
+                frame.message_received_signal.connect(self.received)
+
+    def disconnect(self, neo):
+        for frame in neo.frames:
+            if frame.mux_name is None:
+                frame.message_received_signal.disconnect(self.received)
+
+    def received(self, message):
+        now = time.time()
+        if self.first is None:
+            self.first = message.timestamp
+        self.last = now
+        self.latencies.append(now - message.timestamp)
+
+    def reset(self):
+        self.latencies = []
+        self.first = None
+        self.last = None
+
+
+def measure_receive(rig, neo, frames, rate=None, timeout=30):
+    """
+    Returns:
+        dict: Receive throughput and latency percentiles.
+    """
+    receiver = Receiver()
+    receiver.connect(neo)
+    try:
+        rig.inject(frames=frames, rate=rate)
+        process_events_until(
+            lambda: len(receiver.latencies) >= len(frames),
+            timeout=timeout,
+        )
+    finally:
+        receiver.disconnect(neo)
+
+    received = len(receiver.latencies)
+    results = {"received": received, "sent": len(frames)}
+    if received > 0:
+        seconds = receiver.last - receiver.first
+        results["receive_frames_per_second"] = received / seconds if seconds else 0
+        for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            value = percentile(receiver.latencies, fraction)
+            results["latency_{}_ms".format(name)] = 1000 * value
+
+    return results
+
+
+def measure_memory(rig, neo, frames, timeout=30):
+    """
+    Receive the frames once to warm up and again while tracing allocations.
+
+    Returns:
+        dict: The growth in KiB of traced memory over the second pass.
+    """
+    measure_receive(rig=rig, neo=neo, frames=frames, timeout=timeout)
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        rig.drain()
+        gc.collect()
+        before, _ = tracemalloc.get_traced_memory()
+        measure_receive(rig=rig, neo=neo, frames=frames, timeout=timeout)
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    return {"memory_growth_kib": (after - before) / 1024}
+
+
+def measure_transmit(rig, neo, period=0.01, duration=2):
+    """
+    Cyclically send the first sendable frame and record its intervals as
+    seen on the bus.
+
+    Returns:
+        dict: Percentiles of the absolute deviation from ``period``.
+    """
+    frames = [frame for frame in neo.frames if frame.mux_name is None]
+    frame = next((frame for frame in frames if frame.sendable), frames[0])
+
+    sniffer = can.interface.Bus(bustype="virtual", channel=rig.channel)
+    times = []
+
+    def received(message):
+        if message.arbitration_id == frame.id:
+            times.append(message.timestamp)
+
+    notifier = can.Notifier(bus=sniffer, listeners=[received])
+    try:
+        frame.cyclic_request(rig, period)
+        deadline = time.monotonic() + duration
+        process_events_until(lambda: time.monotonic() > deadline, timeout=duration)
+        frame.cyclic_request(rig, None)
+    finally:
+        notifier.stop()
+        sniffer.shutdown()
+
+    deviations = [abs(b - a - period) for a, b in zip(times, times[1:])]
+    results = {"transmitted": len(times)}
+    if len(deviations) > 0:
+        results["tx_jitter_p50_ms"] = 1000 * percentile(deviations, 0.5)
+        results["tx_jitter_p99_ms"] = 1000 * percentile(deviations, 0.99)
+
+    return results
+
+
+def can_path(target):
+    """
+    Returns:
+        str: The CAN database of a device file, or ``target`` itself when it
+        is a CAN database.
+    """
+    target = str(target)
+    if os.path.splitext(target)[1].casefold() != ".epc":
+        return target
+
+    with open(target) as f:
+        path = json.load(f)["can_path"]
+
+    return os.path.join(os.path.dirname(target), path)
+
+
+def run(target, count=5000, rate=2000, tx_period=0.01, tx_duration=2):
+    """
+    Run all measurements against a device file or a CAN database.
+
+    Args:
+        target (str): A ``.epc`` device file or a CAN database.
+        count (int): Frames injected for each receive measurement.
+        rate (float): Frames per second for the latency measurement.
+        tx_period (float): Seconds between cyclic transmissions.
+        tx_duration (float): Seconds to transmit for.
+
+    Returns:
+        dict: Results keyed by metric name.
+    """
+    import epyqlib.busproxy
+    import epyqlib.canneo
+    import epyqlib.device
+
+    matrix = epyq.symcache.load_matrix(can_path(target))
+    frames = traffic(matrix=matrix, count=count)
+
+    proxy = epyqlib.busproxy.BusProxy()
+    rig = Rig(proxy=proxy)
+    device = None
+    try:
+        if str(target).casefold().endswith(".epc"):
+            device = epyqlib.device.Device(file=str(target), bus=proxy, node_id=247)
+            neo = device.neo_frames
+        else:
+            neo = epyqlib.canneo.Neo(matrix=matrix, bus=proxy)
+            proxy.notifier.add(neo)
+
+        results = {}
+        throughput = measure_receive(rig=rig, neo=neo, frames=frames)
+        results["receive_frames_per_second"] = throughput.get(
+            "receive_frames_per_second"
+        )
+        results["dropped"] = throughput["sent"] - throughput["received"]
+
+        latency = measure_receive(rig=rig, neo=neo, frames=frames, rate=rate)
+        results.update(
+            (key, value) for key, value in latency.items() if key.startswith("latency_")
+        )
+
+        results.update(measure_transmit(rig=rig, neo=neo, period=tx_period))
+        results.update(
+            measure_memory(rig=rig, neo=neo, frames=frames[: max(1, count // 5)])
+        )
+    finally:
+        if device is not None:
+            device.terminate()
+        rig.shutdown()
+
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        default=[str(target) for target in default_targets],
+        help="Device files or CAN databases to benchmark",
+    )
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=2000,
+        help="Frames per second while measuring latency",
+    )
+    parser.add_argument("--tx-period", type=float, default=0.01)
+    parser.add_argument("--baseline", default=None, help="Baseline JSON file")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store the results as the new baseline",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(args)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5 import QtWidgets
+
+    app = QtWidgets.QApplication.instance()
+    if app is None:
+        app = QtWidgets.QApplication([])
+
+    epyq.symcache.install()
+
+    baseline = {}
+    if args.baseline is not None and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    failed = False
+    for target in args.targets:
+        name = os.path.basename(target)
+        result = run(
+            target=target,
+            count=args.count,
+            rate=args.rate,
+            tx_period=args.tx_period,
+        )
+        results[name] = result
+
+        print(name)
+        for key, value in sorted(result.items()):
+            print("    {}: {}".format(key, value))
+
+        if not args.update_baseline:
+            for regression in regressions(
+                results=result,
+                baseline=baseline.get(name, {}),
+                tolerance=args.tolerance,
+            ):
+                failed = True
+                print("    regression: {}".format(regression))
+
+    if args.update_baseline:
+        if args.baseline is None:
+            parser.error("--update-baseline requires --baseline")
+
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=4, sort_keys=True)
+            f.write("\n")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
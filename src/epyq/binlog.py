@@ -0,0 +1,410 @@
+"""
+Native binary CAN log format.  Frames are stored in chunks of columns
+(timestamps, IDs, buses, flags, DLCs and data) with an index of the chunks at
+the end of the file.  Files are read through :mod:`mmap` and the columns are
+exposed as zero copy :class:`memoryview` casts so reloading a log does not
+parse anything per frame.
+
+Layout, all little endian::
+
+    header     magic, version, metadata length, JSON metadata (bus names)
+    chunk...   times f8[n], ids u4[n], buses u1[n], flags u1[n],
+               dlcs u1[n], data u1[8 * n] with each column 8 byte aligned
+    index      (offset u8, count u4, first time f8, last time f8) per chunk
+    footer     index offset u8, chunk count u4, magic
+"""
+
+import itertools
+import json
+import math
+import mmap
+import struct
+import sys
+
+import attr
+
+import epyq.canrecord
+import epyq.trc
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+extension = "epcl"
+magic = b"EPYQCANL"
+version = 1
+
+header_struct = struct.Struct("<8sHI")
+index_struct = struct.Struct("<QIdd")
+footer_struct = struct.Struct("<QI8s")
+
+column_widths = (8, 4, 1, 1, 1, 8)
+column_formats = ("d", "I", "B", "B", "B", "B")
+
+
+class FormatError(Exception):
+    pass
+
+
+def _padding(size):
+    return -size % 8
+
+
+@attr.s(frozen=True)
+class ChunkIndex:
+    offset = attr.ib()
+    count = attr.ib()
+    first_time = attr.ib()
+    last_time = attr.ib()
+
+
+@attr.s(frozen=True)
+class Columns:
+    """
+    The columns of one chunk.  Each is a :class:`memoryview` with one element
+    per frame except ``data`` which has eight bytes per frame.
+    """
+
+    times = attr.ib()
+    ids = attr.ib()
+    buses = attr.ib()
+    flags = attr.ib()
+    dlcs = attr.ib()
+    data = attr.ib()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def frames(self):
+        """
+        Yields:
+            tuple: ``(time, bus, id, flags, dlc, data)``
+        """
+        data = self.data
+        for i, (time, bus, id, flags, dlc) in enumerate(
+            zip(self.times, self.buses, self.ids, self.flags, self.dlcs)
+        ):
+            yield (time, bus, id, flags, dlc, bytes(data[8 * i : 8 * i + 8]))
+
+
+class Writer:
+    """
+    Write a binary CAN log.  Use as a context manager or call :meth:`close`
+    to write the chunk index.
+
+    Args:
+        f (binary file): Opened for writing at its start.
+        buses (dict): Bus names keyed by bus number.
+    """
+
+    def __init__(self, f, buses):
+        self.f = f
+        self.index = []
+
+        metadata = json.dumps(
+            {"buses": {str(number): name for number, name in buses.items()}},
+        ).encode("utf-8")
+        self._write(header_struct.pack(magic, version, len(metadata)))
+        self._write(metadata)
+        self._align()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write(self, data):
+        self.f.write(data)
+
+    def _align(self):
+        self._write(bytes(_padding(self.f.tell())))
+
+    def write_records(self, chunk, bus):
+        """
+        Write packed records from a single bus as one chunk.
+
+        Args:
+            chunk (bytes): Whole records as packed by
+            :data:`epyq.canrecord.record`.
+            bus (int): Bus number of all the records.
+
+        Returns:
+            int: The number of records written.
+        """
+        times, ids, flags, dlcs, data = epyq.canrecord.to_columns(chunk)
+
+        return self.write_columns(
+            times=times,
+            ids=ids,
+            buses=bytes([bus]) * len(flags),
+            flags=flags,
+            dlcs=dlcs,
+            data=data,
+        )
+
+    def write_frames(self, frames):
+        """
+        Write frames as one chunk.
+
+        Args:
+            frames (list): ``(time, bus, id, flags, dlc, data)`` tuples.
+
+        Returns:
+            int: The number of frames written.
+        """
+        count = len(frames)
+        times = struct.pack("<{}d".format(count), *(frame[0] for frame in frames))
+        ids = struct.pack("<{}I".format(count), *(frame[2] for frame in frames))
+
+        return self.write_columns(
+            times=times,
+            ids=ids,
+            buses=bytes(frame[1] for frame in frames),
+            flags=bytes(frame[3] for frame in frames),
+            dlcs=bytes(frame[4] for frame in frames),
+            data=b"".join(bytes(frame[5]).ljust(8, b"\0")[:8] for frame in frames),
+        )
+
+    def write_columns(self, times, ids, buses, flags, dlcs, data):
+        """
+        Write already columnar data as one chunk, see :class:`Columns`.
+
+        Returns:
+            int: The number of frames written.
+        """
+        count = len(flags)
+        if count == 0:
+            return 0
+
+        offset = self.f.tell()
+
+        for column, width in zip((times, ids, buses, flags, dlcs, data), column_widths):
+            if len(column) != count * width:
+                raise FormatError(
+                    "Column length {} does not match {} frames".format(
+                        len(column), count
+                    ),
+                )
+
+            self._write(column)
+            self._align()
+
+        valid_times = [
+            time
+            for time in struct.unpack_from("<{}d".format(count), times)
+            if not math.isnan(time)
+        ]
+        self.index.append(
+            ChunkIndex(
+                offset=offset,
+                count=count,
+                first_time=min(valid_times, default=math.nan),
+                last_time=max(valid_times, default=math.nan),
+            )
+        )
+
+        return count
+
+    def close(self):
+        index_offset = self.f.tell()
+
+        for chunk in self.index:
+            self._write(
+                index_struct.pack(
+                    chunk.offset,
+                    chunk.count,
+                    chunk.first_time,
+                    chunk.last_time,
+                )
+            )
+
+        self._write(footer_struct.pack(index_offset, len(self.index), magic))
+
+
+class Reader:
+    """
+    Memory map a binary CAN log for reading.  Use as a context manager or
+    call :meth:`close`.  Columns handed out must be released before closing.
+
+    Args:
+        path (str or pathlib.Path): The log to read.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise FormatError("Binary CAN logs are only supported on little endian")
+
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            self._file.close()
+            raise FormatError("Empty file: {}".format(path)) from e
+
+        self._view = memoryview(self._map)
+
+        try:
+            self._load(path=path)
+        except BaseException:
+            self.close()
+            raise
+
+    def _load(self, path):
+        file_magic, file_version, metadata_length = header_struct.unpack_from(
+            self._map, 0
+        )
+        if file_magic != magic:
+            raise FormatError("Not an EPyQ binary CAN log: {}".format(path))
+        if file_version != version:
+            raise FormatError(
+                "Unsupported binary CAN log version {}: {}".format(file_version, path),
+            )
+
+        metadata = bytes(
+            self._map[header_struct.size : header_struct.size + metadata_length]
+        )
+        metadata = json.loads(metadata.decode("utf-8"))
+        self.buses = {int(number): name for number, name in metadata["buses"].items()}
+
+        index_offset, chunk_count, footer_magic = footer_struct.unpack_from(
+            self._map, len(self._map) - footer_struct.size
+        )
+        if footer_magic != magic:
+            raise FormatError("Truncated binary CAN log: {}".format(path))
+
+        self.index = [
+            ChunkIndex(*index_struct.unpack_from(self._map, offset))
+            for offset in range(
+                index_offset,
+                index_offset + chunk_count * index_struct.size,
+                index_struct.size,
+            )
+        ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return sum(chunk.count for chunk in self.index)
+
+    def columns(self, chunk):
+        """
+        Args:
+            chunk (int): Index of the chunk to access.
+
+        Returns:
+            Columns: Views directly onto the mapped file.
+        """
+        chunk = self.index[chunk]
+        offset = chunk.offset
+        views = []
+
+        for width, format in zip(column_widths, column_formats):
+            size = chunk.count * width
+            views.append(self._view[offset : offset + size].cast(format))
+            offset += size + _padding(size)
+
+        return Columns(*views)
+
+    def frames(self):
+        """
+        Iterate over all frames in file order.
+
+        Yields:
+            tuple: ``(time, bus, id, flags, dlc, data)``
+        """
+        for chunk in range(len(self.index)):
+            yield from self.columns(chunk).frames()
+
+    def first_time(self):
+        return min(
+            (
+                chunk.first_time
+                for chunk in self.index
+                if not math.isnan(chunk.first_time)
+            ),
+            default=None,
+        )
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+
+def from_trc(trc_path, path, chunk_frames=100000):
+    """
+    Convert a TRC v1.1 or v2.1 file to a binary CAN log.
+
+    Returns:
+        int: The number of frames converted.
+    """
+    count = 0
+
+    with open(trc_path, "r") as trc, open(path, "wb") as f:
+        buses = epyq.trc.parse_buses(trc)
+        trc.seek(0)
+        frames = epyq.trc.parse(trc)
+
+        with Writer(f=f, buses=buses) as writer:
+            while True:
+                chunk = list(itertools.islice(frames, chunk_frames))
+                if len(chunk) == 0:
+                    break
+
+                count += writer.write_frames(chunk)
+
+    return count
+
+
+def to_trc(path, trc_path, chunk_frames=100000):
+    """
+    Convert a binary CAN log to a TRC v2.1 file.  Frames without a timestamp
+    take the time of the frame before them.
+
+    Returns:
+        int: The number of frames converted.
+    """
+    count = 0
+
+    with Reader(path) as reader, open(trc_path, "w") as trc:
+        time_offset = reader.first_time()
+        if time_offset is None:
+            time_offset = 0
+
+        trc.write(epyq.trc.format_header_v2_1(path=trc.name, buses=reader.buses))
+
+        last_time = time_offset
+
+        def timed():
+            nonlocal last_time
+
+            for time, bus, id, flags, dlc, data in reader.frames():
+                if math.isnan(time):
+                    time = last_time
+                else:
+                    last_time = time
+
+                yield (time, bus, id, flags, dlc, data)
+
+        frames = timed()
+        while True:
+            chunk = list(itertools.islice(frames, chunk_frames))
+            if len(chunk) == 0:
+                break
+
+            trc.write(
+                epyq.trc.format_frames_v2_1(
+                    chunk,
+                    first_number=count + 1,
+                    time_offset=time_offset,
+                )
+            )
+            count += len(chunk)
+
+    return count
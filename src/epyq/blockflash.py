@@ -0,0 +1,1019 @@
+"""
+Windowed firmware download to the CCP bootloader.  :mod:`epyqlib.flash`
+waits for the acknowledgement of every six byte download message before
+sending the next and builds a checksum every five messages.  A
+:class:`Flasher` instead splits the image into blocks, each a set MTA, its
+download messages and a build checksum carrying the block's CRC, and keeps
+up to a window of commands outstanding.  Replies are matched to commands by
+their command counter.  A block counts as verified once the bootloader
+acknowledges its checksum so no readback is needed.  After a bus error, a
+timeout or a rejected command the outstanding commands are drained and the
+download resumes from the first block not yet verified.
+
+By default a window of one and blocks of 30 bytes, a build checksum every
+five download messages, keep to the stop and wait flow of
+:mod:`epyqlib.flash`.  Deeper windows and larger blocks rely on the
+bootloader taking back to back commands and are opted into with
+``--window`` and ``--block-size``.
+
+A :class:`Target` emulates the bootloader on a python-can virtual bus so
+throughput and recovery can be measured without hardware::
+
+    python -m epyq.blockflash --benchmark --window 1 8 16 --drop-rate 0.001
+    python -m epyq.blockflash --file ul1741.latest.out --channel can0
+    python -m epyq.blockflash --file ul1741.latest.out --window 8 --block-size 240
+"""
+
+import argparse
+import collections
+import enum
+import itertools
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+
+import attr
+import can
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+logger = logging.getLogger(__name__)
+
+# the packet layout and codes of epyqlib.twisted.cancalibrationprotocol which
+# can't be imported here without Qt
+bootloader_can_id = 0x0B081880
+reply_marker = 0xFF
+password = 0x1234
+station_address = 1
+
+default_window = 1
+default_block_size = 30
+default_timeout = 1
+default_connect_timeout = 0.2
+default_clear_timeout = 30
+default_retries = 5
+
+_channels = itertools.count()
+
+
+@enum.unique
+class CommandCode(enum.IntEnum):
+    connect = 0x01
+    set_mta = 0x02
+    download = 0x03
+    disconnect = 0x07
+    build_checksum = 0x0E
+    clear_memory = 0x10
+    unlock = 0x13
+    download_6 = 0x23
+
+
+@enum.unique
+class CommandStatus(enum.IntEnum):
+    acknowledge = 0x00
+    processor_busy = 0x10
+    unknown_command = 0x30
+    command_syntax = 0x31
+    parameters_out_of_range = 0x32
+    access_denied = 0x33
+    access_locked = 0x35
+    resource_function_unavailable = 0x36
+    operational_failure = 0x7F
+
+
+class AddressExtension(enum.IntEnum):
+    flash_memory = 0x00
+    configuration_registers = 0x01
+
+
+class FlashError(Exception):
+    pass
+
+
+def crc(data, crc=None):
+    """
+    The CRC-16 of :func:`epyqlib.twisted.cancalibrationprotocol.crc`.
+    """
+    if crc is None:
+        crc = 0xFFFF
+
+    for byte in data:
+        crc ^= byte & 0x00FF
+
+        for _ in range(8):
+            if (crc & 0x0001) != 0:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc = crc >> 1
+
+    return crc
+
+
+def swap(data):
+    """
+    Returns:
+        bytes: ``data`` with the bytes of each 16 bit word swapped, as sent.
+    """
+    swapped = bytearray(data)
+    swapped[0::2] = data[1::2]
+    swapped[1::2] = data[0::2]
+
+    return bytes(swapped)
+
+
+def command(code, counter, payload=b"", arbitration_id=bootloader_can_id):
+    data = bytearray(8)
+    data[0] = code
+    data[1] = counter
+    data[2 : 2 + len(payload)] = payload
+
+    return can.Message(arbitration_id=arbitration_id, is_extended_id=True, data=data)
+
+
+def reply(status, counter, payload=b"", arbitration_id=bootloader_can_id):
+    data = bytearray(8)
+    data[0] = reply_marker
+    data[1] = status
+    data[2] = counter
+    data[3 : 3 + len(payload)] = payload
+
+    return can.Message(arbitration_id=arbitration_id, is_extended_id=True, data=data)
+
+
+@attr.s(frozen=True)
+class Block:
+    """
+    Args:
+        address (int): Flash address of the first word, in 16 bit words.
+        data (bytes): An even number of bytes in image order.
+    """
+
+    address = attr.ib()
+    data = attr.ib()
+
+    def wire(self):
+        return swap(self.data)
+
+    def commands(self):
+        """
+        Returns:
+            list: ``(CommandCode, payload)`` of the set MTA, downloads and
+            build checksum of the block.
+        """
+        wire = self.wire()
+        commands = [
+            (
+                CommandCode.set_mta,
+                bytes([0, AddressExtension.flash_memory])
+                + self.address.to_bytes(4, "big"),
+            )
+        ]
+        for start in range(0, len(wire), 6):
+            chunk = wire[start : start + 6]
+            if len(chunk) == 6:
+                commands.append((CommandCode.download_6, chunk))
+            else:
+                commands.append((CommandCode.download, bytes([len(chunk)]) + chunk))
+        commands.append(
+            (
+                CommandCode.build_checksum,
+                len(wire).to_bytes(4, "big") + crc(wire).to_bytes(2, "big"),
+            )
+        )
+
+        return commands
+
+
+def split(sections, block_size=default_block_size):
+    """
+    Args:
+        sections (iterable): ``(address, data)`` of each loadable section,
+        address in words.
+        block_size (int): Most bytes per block, a multiple of six keeps
+        every download message full.
+
+    Returns:
+        list: The :class:`Block` covering every section in order.
+    """
+    if block_size < 2 or block_size % 2 != 0:
+        raise ValueError("Block size must be even, not {}".format(block_size))
+
+    blocks = []
+    for address, data in sections:
+        data = bytes(data)
+        if len(data) % 2 != 0:
+            data += b"\0"
+
+        for start in range(0, len(data), block_size):
+            blocks.append(
+                Block(
+                    address=address + start // 2,
+                    data=data[start : start + block_size],
+                )
+            )
+
+    return blocks
+
+
+def load_sections(file):
+    """
+    Args:
+        file: A binary stream of a TI COFF ``.out`` file.
+
+    Returns:
+        list: ``(address, data)`` of each loadable section.
+    """
+    import epyqlib.ticoff
+
+    coff = epyqlib.ticoff.Coff()
+    coff.from_stream(file)
+
+    return [
+        (section.virt_addr, bytes(section.data))
+        for section in coff.sections
+        if section.data is not None and section.virt_size > 0
+    ]
+
+
+@attr.s
+class Progress:
+    """
+    Args:
+        total_bytes (int): Bytes in the image.
+        bytes (int): Bytes in verified blocks.
+        total_blocks (int): Blocks in the image.
+        blocks (int): Verified blocks.
+        messages (int): Commands sent.
+        resumes (int): Times the download resumed from the first
+        unverified block.
+        restarts (int): Times the whole image was downloaded again because
+        the image checksum was rejected after resuming.
+        bus_errors (int): Commands the bus failed to send.
+        timeouts (int): Commands not replied to in time or passed over by
+        the reply to a later command.
+        rejected (int): Commands the bootloader did not acknowledge.
+        seconds (float): Time spent downloading blocks.
+    """
+
+    total_bytes = attr.ib(default=0)
+    bytes = attr.ib(default=0)
+    total_blocks = attr.ib(default=0)
+    blocks = attr.ib(default=0)
+    messages = attr.ib(default=0)
+    resumes = attr.ib(default=0)
+    restarts = attr.ib(default=0)
+    bus_errors = attr.ib(default=0)
+    timeouts = attr.ib(default=0)
+    rejected = attr.ib(default=0)
+    seconds = attr.ib(default=0.0)
+
+    def bytes_per_second(self):
+        if self.seconds <= 0:
+            return 0.0
+
+        return self.bytes / self.seconds
+
+    def summary(self):
+        return (
+            "{bytes}/{total_bytes} bytes in {seconds:.3f} s ({rate:.0f} bytes/s),"
+            " {messages} messages, {resumes} resumes, {restarts} restarts,"
+            " {bus_errors} bus errors,"
+            " {timeouts} timeouts, {rejected} rejected"
+        ).format(rate=self.bytes_per_second(), **attr.asdict(self))
+
+
+@attr.s
+class Pending:
+    code = attr.ib()
+    deadline = attr.ib()
+    block = attr.ib(default=None)
+    status = attr.ib(default=None)
+    payload = attr.ib(default=None)
+
+
+@attr.s
+class Flasher:
+    """
+    Args:
+        send (callable): Sends a :class:`can.Message`.
+        window (int): Most commands outstanding while downloading, one is
+        the stop and wait behavior of :mod:`epyqlib.flash`.
+        timeout (float): Seconds to wait for each reply.
+        retries (int): Times the download resumes from a block, and a
+        setup command is sent again, before giving up.
+        progress (callable, optional): Called with a :class:`Progress`
+        after each verified block.
+        clock (callable): Monotonic time in seconds.
+        tx_id (int): Arbitration ID of the commands.
+        rx_id (int): Arbitration ID of the replies.
+    """
+
+    send = attr.ib()
+    window = attr.ib(default=default_window)
+    timeout = attr.ib(default=default_timeout)
+    retries = attr.ib(default=default_retries)
+    progress = attr.ib(default=None)
+    clock = attr.ib(default=time.monotonic)
+    tx_id = attr.ib(default=bootloader_can_id)
+    rx_id = attr.ib(default=bootloader_can_id)
+    _condition = attr.ib(factory=threading.Condition, init=False)
+    _in_flight = attr.ib(factory=collections.OrderedDict, init=False)
+    _counter = attr.ib(default=-1, init=False)
+    _progress = attr.ib(factory=Progress, init=False)
+
+    def __attrs_post_init__(self):
+        # counters are eight bits so a window must not wrap onto itself
+        if not 1 <= self.window <= 128:
+            raise ValueError("Window must be 1 to 128, not {}".format(self.window))
+
+    def message_received(self, message):
+        """
+        Match a reply to its outstanding command.  Safe to call from a
+        :class:`can.Notifier` thread.
+        """
+        if (
+            message.arbitration_id != self.rx_id
+            or not message.is_extended_id
+            or len(message.data) < 3
+            or message.data[0] != reply_marker
+        ):
+            return
+
+        with self._condition:
+            pending = self._in_flight.get(message.data[2])
+            if pending is None or pending.status is not None:
+                return
+
+            pending.status = message.data[1]
+            pending.payload = bytes(message.data[3:])
+            self._condition.notify_all()
+
+    __call__ = message_received
+
+    def _send(self, code, payload, timeout, block=None):
+        self._counter = (self._counter + 1) % 256
+        pending = Pending(code=code, deadline=self.clock() + timeout, block=block)
+        self._in_flight[self._counter] = pending
+        self._progress.messages += 1
+        try:
+            self.send(
+                command(
+                    code=code,
+                    counter=self._counter,
+                    payload=payload,
+                    arbitration_id=self.tx_id,
+                )
+            )
+        except can.CanError:
+            del self._in_flight[self._counter]
+            self._progress.bus_errors += 1
+            raise
+
+        return pending
+
+    def _wait(self):
+        """
+        Wait for the oldest outstanding command to be replied to, time out
+        or be found lost and remove it.
+
+        Returns:
+            Pending: The command, with no status if it timed out.
+        """
+        counter, pending = next(iter(self._in_flight.items()))
+        while pending.status is None:
+            remaining = pending.deadline - self.clock()
+            # replies come in order so one to a later command means this
+            # command or its reply was lost
+            lost = any(other.status is not None for other in self._in_flight.values())
+            if remaining <= 0 or lost:
+                self._progress.timeouts += 1
+                break
+            self._condition.wait(remaining)
+
+        del self._in_flight[counter]
+
+        return pending
+
+    def _request(self, code, payload=b"", timeout=None, retries=None):
+        """
+        Send one command and wait for it to be acknowledged, retrying after
+        timeouts.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        if retries is None:
+            retries = self.retries
+
+        with self._condition:
+            for _ in range(retries + 1):
+                self._in_flight.clear()
+                try:
+                    self._send(code=code, payload=payload, timeout=timeout)
+                except can.CanError:
+                    continue
+                pending = self._wait()
+                if pending.status is None:
+                    continue
+                if pending.status != CommandStatus.acknowledge:
+                    self._progress.rejected += 1
+                    raise FlashError(
+                        "{} rejected: {}".format(
+                            code.name, _status_name(pending.status)
+                        )
+                    )
+
+                return pending.payload
+
+        raise FlashError("No reply to {}".format(code.name))
+
+    def flash(self, blocks, connect_timeout=default_connect_timeout):
+        """
+        Connect to the bootloader, erase the flash and download ``blocks``.
+
+        The image checksum at the end is computed over the blocks once each,
+        in order.  Whether the bootloader's own checksum also leaves out a
+        block downloaded again after resuming is not known, so when the
+        image checksum is rejected after a resume the flash is erased and
+        the whole image downloaded again, up to :attr:`retries` times.
+
+        Args:
+            blocks (list): The :class:`Block` of the image, as from
+            :func:`split`.
+            connect_timeout (float): Seconds to wait for each connect
+            while searching for the bootloader.
+
+        Returns:
+            Progress: The final counts.
+
+        Raises:
+            FlashError: If the bootloader rejects a command or a block
+            could not be verified within the retries.
+        """
+        self._progress = Progress(
+            total_bytes=sum(len(block.data) for block in blocks),
+            total_blocks=len(blocks),
+        )
+
+        self._request(
+            CommandCode.connect,
+            payload=bytes([station_address]),
+            timeout=connect_timeout,
+            retries=max(self.retries, 10),
+        )
+        self._request(
+            CommandCode.set_mta,
+            payload=bytes([0, AddressExtension.configuration_registers, 0, 0, 0, 0]),
+        )
+        self._request(
+            CommandCode.unlock, payload=bytes([2]) + password.to_bytes(2, "big")
+        )
+
+        start = self.clock()
+        while True:
+            self._clear()
+            resumes = self._progress.resumes
+            self._download(blocks, start)
+
+            try:
+                self._check_image(blocks)
+            except FlashError:
+                if (
+                    self._progress.resumes == resumes
+                    or self._progress.restarts >= self.retries
+                ):
+                    raise
+
+                logger.warning("Image checksum rejected after resuming, restarting")
+                self._progress.restarts += 1
+                self._progress.blocks = 0
+                self._progress.bytes = 0
+                continue
+
+            break
+
+        self._request(CommandCode.disconnect, payload=bytes([0]))
+
+        return attr.evolve(self._progress)
+
+    def _clear(self):
+        self._request(
+            CommandCode.set_mta,
+            payload=bytes([0, AddressExtension.flash_memory, 0, 0, 0, 0]),
+        )
+        self._request(
+            CommandCode.clear_memory,
+            payload=(0xFF).to_bytes(4, "big"),
+            timeout=default_clear_timeout,
+            retries=1,
+        )
+
+    def _check_image(self, blocks):
+        continuous = None
+        for block in blocks:
+            continuous = crc(block.wire(), crc=continuous)
+        if continuous is not None:
+            self._request(
+                CommandCode.build_checksum,
+                payload=bytes(4) + continuous.to_bytes(2, "big"),
+            )
+
+    def _download(self, blocks, start):
+        verified = self._stream(blocks, 0, start)
+        attempts = collections.Counter()
+        while verified < len(blocks):
+            attempts[verified] += 1
+            if attempts[verified] > self.retries:
+                raise FlashError(
+                    "Block {} at 0x{:08X} not verified after {} attempts".format(
+                        verified, blocks[verified].address, attempts[verified]
+                    )
+                )
+
+            self._progress.resumes += 1
+            verified = self._stream(blocks, verified, start)
+
+    def _stream(self, blocks, first, start):
+        """
+        Send the blocks from ``first`` on keeping up to :attr:`window`
+        commands outstanding.
+
+        Returns:
+            int: Index of the first block not verified.
+        """
+        commands = (
+            (index, code, payload)
+            for index in range(first, len(blocks))
+            for code, payload in blocks[index].commands()
+        )
+        upcoming = next(commands, None)
+        verified = first
+        failed = False
+
+        with self._condition:
+            self._in_flight.clear()
+            while True:
+                while (
+                    not failed
+                    and upcoming is not None
+                    and len(self._in_flight) < self.window
+                ):
+                    index, code, payload = upcoming
+                    try:
+                        self._send(
+                            code=code,
+                            payload=payload,
+                            timeout=self.timeout,
+                            block=index,
+                        )
+                    except can.CanError:
+                        failed = True
+                        break
+                    upcoming = next(commands, None)
+
+                if len(self._in_flight) == 0:
+                    break
+
+                pending = self._wait()
+                if failed:
+                    # draining, nothing counts until resuming
+                    continue
+
+                if pending.status is None:
+                    failed = True
+                elif pending.status != CommandStatus.acknowledge:
+                    self._progress.rejected += 1
+                    failed = True
+                elif pending.code == CommandCode.build_checksum:
+                    verified = pending.block + 1
+                    self._progress.blocks = verified
+                    self._progress.bytes += len(blocks[pending.block].data)
+                    self._progress.seconds = self.clock() - start
+                    if self.progress is not None:
+                        self.progress(attr.evolve(self._progress))
+
+        self._progress.seconds = self.clock() - start
+
+        return verified
+
+
+def _status_name(status):
+    try:
+        return CommandStatus(status).name
+    except ValueError:
+        return "0x{:02X}".format(status)
+
+
+@attr.s
+class Target:
+    """
+    A software CCP bootloader answering a :class:`Flasher`.  Each set MTA
+    starts a block and an acknowledged build checksum accepts it.  The
+    checksum of the whole image covers the accepted blocks in the order they
+    were last accepted, or every acceptance with ``recount``.  Which of the
+    two the real bootloader does is not known.
+
+    Args:
+        send (callable): Sends a :class:`can.Message`.
+        frame_time (float): Seconds spent on each received command,
+        standing in for bus time and flash programming.
+        drop (callable, optional): Called with each received command,
+        returning True loses it as a bus error would.
+        recount (bool): Blocks accepted again count again in the checksum
+        of the whole image.
+        tx_id (int): Arbitration ID of the replies.
+        rx_id (int): Arbitration ID of the commands.
+    """
+
+    send = attr.ib()
+    frame_time = attr.ib(default=0)
+    drop = attr.ib(default=None)
+    recount = attr.ib(default=False)
+    tx_id = attr.ib(default=bootloader_can_id)
+    rx_id = attr.ib(default=bootloader_can_id)
+    memory = attr.ib(factory=dict)
+    accepted = attr.ib(factory=collections.OrderedDict)
+    acceptances = attr.ib(factory=list)
+    connected = attr.ib(default=False)
+    unlocked = attr.ib(default=False)
+    verified = attr.ib(default=False)
+    received = attr.ib(default=0)
+    dropped = attr.ib(default=0)
+    _mta = attr.ib(default=0)
+    _block = attr.ib(default=None)
+
+    def message_received(self, message):
+        if (
+            message.arbitration_id != self.rx_id
+            or not message.is_extended_id
+            or len(message.data) != 8
+            or message.data[0] == reply_marker
+        ):
+            return
+
+        self.received += 1
+        if self.drop is not None and self.drop(message):
+            self.dropped += 1
+            return
+
+        if self.frame_time > 0:
+            time.sleep(self.frame_time)
+
+        data = bytes(message.data)
+        status, payload = self.handle(code=data[0], payload=data[2:])
+        self.send(
+            reply(
+                status=status,
+                counter=data[1],
+                payload=payload,
+                arbitration_id=self.tx_id,
+            )
+        )
+
+    __call__ = message_received
+
+    def handle(self, code, payload):
+        """
+        Returns:
+            tuple: The :class:`CommandStatus` and reply payload.
+        """
+        if code == CommandCode.connect:
+            self.connected = True
+            return CommandStatus.acknowledge, bytes([1, 0, 0x00, 0x9E])
+
+        if not self.connected:
+            return CommandStatus.access_denied, b""
+
+        if code == CommandCode.disconnect:
+            self.connected = False
+            self.unlocked = False
+        elif code == CommandCode.set_mta:
+            self._mta = int.from_bytes(payload[2:6], "big")
+            self._block = (self._mta, bytearray())
+        elif code == CommandCode.unlock:
+            if int.from_bytes(payload[1:3], "big") != password:
+                return CommandStatus.access_denied, b""
+            self.unlocked = True
+        elif not self.unlocked:
+            return CommandStatus.access_locked, b""
+        elif code == CommandCode.clear_memory:
+            self.memory.clear()
+            self.accepted.clear()
+            self.acceptances.clear()
+            self.verified = False
+        elif code in (CommandCode.download, CommandCode.download_6):
+            if code == CommandCode.download_6:
+                chunk = payload
+            else:
+                if payload[0] > 5 or payload[0] % 2 != 0:
+                    return CommandStatus.command_syntax, b""
+                chunk = payload[1 : 1 + payload[0]]
+            if self._block is None:
+                return CommandStatus.command_syntax, b""
+            for offset in range(0, len(chunk), 2):
+                self.memory[self._mta] = chunk[offset : offset + 2]
+                self._mta += 1
+            self._block[1].extend(chunk)
+        elif code == CommandCode.build_checksum:
+            length = int.from_bytes(payload[0:4], "big")
+            checksum = int.from_bytes(payload[4:6], "big")
+            if length == 0:
+                covered = self.acceptances if self.recount else self.accepted.values()
+                self.verified = crc(b"".join(covered)) == checksum
+                if not self.verified:
+                    return CommandStatus.parameters_out_of_range, b""
+            else:
+                block, self._block = self._block, None
+                if block is None:
+                    return CommandStatus.command_syntax, b""
+                address, wire = block
+                if length != len(wire) or crc(wire) != checksum:
+                    return CommandStatus.parameters_out_of_range, b""
+                self.accepted.pop(address, None)
+                self.accepted[address] = bytes(wire)
+                self.acceptances.append(bytes(wire))
+        else:
+            return CommandStatus.unknown_command, b""
+
+        return CommandStatus.acknowledge, b""
+
+    def read(self, address, length):
+        """
+        Returns:
+            bytes: ``length`` bytes of programmed flash from the word
+            ``address`` in image byte order, None if any is not programmed.
+        """
+        words = [self.memory.get(address + offset) for offset in range(length // 2)]
+        if None in words:
+            return None
+
+        return swap(b"".join(words))
+
+
+@attr.s
+class DelayedSend:
+    """
+    Send each message a fixed delay after it was handed over, in order, as
+    the latency of a USB CAN adapter would.
+
+    Args:
+        send (callable): Sends a :class:`can.Message`.
+        delay (float): Seconds.
+    """
+
+    send = attr.ib()
+    delay = attr.ib()
+    _queue = attr.ib(factory=queue.Queue, init=False)
+    _thread = attr.ib(default=None, init=False)
+
+    def __attrs_post_init__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __call__(self, message):
+        self._queue.put((time.monotonic() + self.delay, message))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            due, message = item
+            remaining = due - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+            self.send(message)
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+
+def random_drop(rate, seed=0):
+    """
+    Returns:
+        callable: A :attr:`Target.drop` losing about ``rate`` of the
+        commands, reproducibly for a seed.
+    """
+    generator = random.Random(seed)
+
+    return lambda message: generator.random() < rate
+
+
+@attr.s
+class Rig:
+    """
+    A :class:`Flasher` and a :class:`Target` on their own virtual channel.
+
+    Args:
+        latency (float): Seconds each reply is delayed.
+    """
+
+    flasher_kwargs = attr.ib(factory=dict)
+    target_kwargs = attr.ib(factory=dict)
+    latency = attr.ib(default=0)
+
+    def __attrs_post_init__(self):
+        channel = "epyq-blockflash-{}".format(next(_channels))
+        self.host = can.interface.Bus(bustype="virtual", channel=channel)
+        self.device = can.interface.Bus(bustype="virtual", channel=channel)
+        self.flasher = Flasher(send=self.host.send, **self.flasher_kwargs)
+        send = self.device.send
+        self.delayed = None
+        if self.latency > 0:
+            self.delayed = DelayedSend(send=send, delay=self.latency)
+            send = self.delayed
+        self.target = Target(send=send, **self.target_kwargs)
+        # a short receive timeout keeps shutting down quick
+        self.notifiers = [
+            can.Notifier(self.host, [self.flasher], timeout=0.05),
+            can.Notifier(self.device, [self.target], timeout=0.05),
+        ]
+
+    def shutdown(self):
+        for notifier in self.notifiers:
+            notifier.stop()
+        if self.delayed is not None:
+            self.delayed.stop()
+        self.host.shutdown()
+        self.device.shutdown()
+
+
+def synthetic_sections(size, seed=0):
+    generator = random.Random(seed)
+    first = size // 3
+    first -= first % 2
+
+    return [
+        (0x3E8000, bytes(generator.getrandbits(8) for _ in range(first))),
+        (0x3F0000, bytes(generator.getrandbits(8) for _ in range(size - first))),
+    ]
+
+
+def benchmark(
+    sections,
+    windows,
+    block_size=default_block_size,
+    drop_rate=0,
+    frame_time=0,
+    latency=0,
+    timeout=0.1,
+    seed=0,
+):
+    """
+    Flash ``sections`` to a :class:`Target` once per window size.
+
+    Returns:
+        dict: :class:`Progress` keyed by window size.
+
+    Raises:
+        FlashError: If flashing failed or the target's flash does not
+        match.
+    """
+    blocks = split(sections, block_size=block_size)
+    results = {}
+    for window in windows:
+        target_kwargs = {"frame_time": frame_time}
+        if drop_rate > 0:
+            target_kwargs["drop"] = random_drop(rate=drop_rate, seed=seed)
+        rig = Rig(
+            flasher_kwargs={"window": window, "timeout": timeout, "retries": 20},
+            target_kwargs=target_kwargs,
+            latency=latency,
+        )
+        try:
+            results[window] = rig.flasher.flash(blocks, connect_timeout=timeout)
+            matches = all(
+                rig.target.read(block.address, len(block.data)) == block.data
+                for block in blocks
+            )
+            if not rig.target.verified or not matches:
+                raise FlashError(
+                    "Target flash does not match with window {}".format(window)
+                )
+        finally:
+            rig.shutdown()
+
+    return results
+
+
+def _print_progress(progress):
+    sys.stderr.write(
+        "\r{blocks}/{total_blocks} blocks ({rate:.0f} bytes/s)".format(
+            rate=progress.bytes_per_second(), **attr.asdict(progress)
+        )
+    )
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Flash firmware with several blocks outstanding",
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", "-f", type=argparse.FileType("rb"))
+    source.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Flash a virtual target instead of a device",
+    )
+    parser.add_argument("--interface", "-i", default="socketcan")
+    parser.add_argument("--channel", "-c", default="can0")
+    parser.add_argument("--bitrate", "-b", type=int, default=250000)
+    parser.add_argument(
+        "--window",
+        type=int,
+        nargs="+",
+        default=[default_window],
+        help="Commands outstanding, more than one needs a bootloader taking"
+        " back to back commands, several for --benchmark",
+    )
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=default_block_size,
+        help="Bytes per build checksum",
+    )
+    parser.add_argument("--timeout", type=float, default=None)
+    parser.add_argument("--retries", type=int, default=default_retries)
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=64 * 1024,
+        help="Bytes of the benchmark image when no --file is given",
+    )
+    parser.add_argument(
+        "--drop-rate",
+        type=float,
+        default=0,
+        help="Fraction of commands the virtual target loses",
+    )
+    parser.add_argument(
+        "--frame-time",
+        type=float,
+        default=0.0005,
+        help="Seconds the virtual target spends per command",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.001,
+        help="Seconds the virtual target's replies are delayed",
+    )
+    args = parser.parse_args(args)
+
+    if args.benchmark:
+        kwargs = {}
+        if args.timeout is not None:
+            kwargs["timeout"] = args.timeout
+        results = benchmark(
+            sections=synthetic_sections(size=args.size),
+            windows=args.window,
+            block_size=args.block_size,
+            drop_rate=args.drop_rate,
+            frame_time=args.frame_time,
+            latency=args.latency,
+            **kwargs,
+        )
+        for window, progress in results.items():
+            print("window {:3}: {}".format(window, progress.summary()))
+
+        return 0
+
+    (window,) = args.window
+    blocks = split(load_sections(args.file), block_size=args.block_size)
+    bus = can.interface.Bus(
+        bustype=args.interface, channel=args.channel, bitrate=args.bitrate
+    )
+    flasher = Flasher(
+        send=bus.send,
+        window=window,
+        timeout=default_timeout if args.timeout is None else args.timeout,
+        retries=args.retries,
+        progress=_print_progress,
+    )
+    notifier = can.Notifier(bus, [flasher])
+    try:
+        progress = flasher.flash(blocks)
+    except FlashError as e:
+        sys.stderr.write("\n")
+        print("Flashing failed: {}".format(e))
+        return 1
+    finally:
+        notifier.stop()
+        bus.shutdown()
+
+    sys.stderr.write("\n")
+    print("Flashing completed successfully")
+    print(progress.summary())
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,703 @@
+"""
+Pipelined bulk reads and writes of device parameters.  Parameters travel in
+the multiplexed parameter messages of a device's CAN database, such as
+``CommandSetNVParam`` requests answered by ``StatusNVParam`` responses, one
+multiplexer value per group of parameters.  Rather than one request and
+response round trip at a time, a :class:`Transfer` keeps a window of
+requests for different groups outstanding.  Responses are matched to their
+request by multiplexer value and command as they arrive and only the
+requests that time out are sent again.
+
+Parameter sets use the JSON layout of ``test.json``, values keyed by
+parameter name::
+
+    python -m epyq.bulkparams example.sym --channel can0 --write test.json
+
+See :mod:`epyq.paramsync` for writing only the parameters that changed.
+"""
+
+import argparse
+import collections
+import json
+import sys
+import threading
+import time
+
+import attr
+import can
+
+import epyq.batchdecode
+import epyq.symcache
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+default_set_frame = "CommandSetNVParam"
+default_status_frame = "StatusNVParam"
+default_window = 8
+default_timeout = 0.5
+default_retries = 3
+
+read_label = "Read"
+write_label = "Write"
+error_label = "Error"
+
+
+class ParameterError(Exception):
+    pass
+
+
+def _command(layouts):
+    commands = [
+        layout
+        for layout in layouts
+        if {read_label, write_label} <= set(layout.enumeration.values())
+    ]
+    if len(commands) != 1:
+        return None
+
+    (command,) = commands
+
+    return command
+
+
+def _raw(enumeration, label):
+    (raw,) = [raw for raw, other in enumeration.items() if other == label]
+
+    return raw
+
+
+@attr.s(frozen=True)
+class Group:
+    """
+    The parameters carried by one multiplexer value.
+
+    Args:
+        value (int): The multiplexer value.
+        name (str): The multiplexer label of the request message.
+        command (epyq.batchdecode.SignalLayout): The read or write command
+        of the request.
+        parameters (dict): Request :class:`epyq.batchdecode.SignalLayout`
+        keyed by parameter name.
+        status_command (epyq.batchdecode.SignalLayout): The command echoed
+        in the response.
+        status (dict): Response :class:`epyq.batchdecode.SignalLayout`
+        in the same bits, keyed by request parameter name.
+        constants (tuple): ``(SignalLayout, raw)`` pairs of other request
+        signals, such as a meta selector, sent as zero.
+    """
+
+    value = attr.ib()
+    name = attr.ib()
+    command = attr.ib()
+    parameters = attr.ib()
+    status_command = attr.ib()
+    status = attr.ib()
+    constants = attr.ib(default=())
+
+
+@attr.s
+class ParameterMap:
+    """
+    Args:
+        request (epyq.batchdecode.MessageLayout): The request message.
+        response (epyq.batchdecode.MessageLayout): The response message.
+        groups (dict): :class:`Group` keyed by multiplexer value.
+    """
+
+    request = attr.ib()
+    response = attr.ib()
+    groups = attr.ib()
+    by_name = attr.ib(factory=dict)
+
+    def __attrs_post_init__(self):
+        for group in self.groups.values():
+            for name in group.parameters:
+                self.by_name[name] = group
+
+    @classmethod
+    def from_matrix(
+        cls,
+        matrix,
+        set_frame=default_set_frame,
+        status_frame=default_status_frame,
+        request_id=None,
+        response_id=None,
+    ):
+        """
+        Args:
+            matrix (canmatrix.CanMatrix): The device's CAN database.
+            set_frame (str): Name of the request message.
+            status_frame (str): Name of the response message.
+            request_id (int, optional): Arbitration ID of the requests if
+            not as in the database, such as for another node ID.
+            response_id (int, optional): Likewise for the responses.
+        """
+        database = epyq.batchdecode.Database.from_matrix(matrix)
+        ids = {}
+        if request_id is not None:
+            ids[set_frame] = request_id
+        if response_id is not None:
+            ids[status_frame] = response_id
+        database = database.renumbered(ids=ids)
+
+        messages = {message.name: message for message in database.messages.values()}
+        try:
+            request = messages[set_frame]
+            response = messages[status_frame]
+        except KeyError as e:
+            raise ParameterError("No parameter message {}".format(e)) from e
+
+        groups = {}
+        for value, layouts in request.branches.items():
+            status_layouts = response.branches.get(value)
+            if status_layouts is None:
+                continue
+
+            command = _command(layouts)
+            status_command = _command(status_layouts)
+            if command is None or status_command is None:
+                # not a parameter group, such as a save to EEPROM command
+                continue
+
+            # as in epyqlib.nv, the response signal is the one in the same bits
+            by_bits = {
+                (layout.shift, layout.size): layout
+                for layout in status_layouts
+                if layout is not status_command
+            }
+            parameters = {}
+            status = {}
+            constants = []
+            for layout in layouts:
+                if layout is command:
+                    continue
+                status_layout = by_bits.get((layout.shift, layout.size))
+                if status_layout is not None:
+                    parameters[layout.name] = layout
+                    status[layout.name] = status_layout
+                else:
+                    constants.append((layout, 0))
+
+            groups[value] = Group(
+                value=value,
+                name=request.branch_names[value],
+                command=command,
+                parameters=parameters,
+                status_command=status_command,
+                status=status,
+                constants=tuple(constants),
+            )
+
+        return cls(request=request, response=response, groups=groups)
+
+    def groups_for(self, names):
+        """
+        Returns:
+            list: The groups holding the named parameters, in multiplexer
+            order.
+
+        Raises:
+            ParameterError: For names not in any group.
+        """
+        unknown = sorted(set(names) - set(self.by_name))
+        if len(unknown) > 0:
+            raise ParameterError("Unknown parameters: {}".format(", ".join(unknown)))
+
+        values = {self.by_name[name].value for name in names}
+
+        return [self.groups[value] for value in sorted(values)]
+
+    def to_raw(self, values):
+        """
+        Args:
+            values (dict): Human values, or enumeration labels, keyed by
+            parameter name.
+
+        Returns:
+            dict: The raw values keyed by parameter name.
+        """
+        return {
+            name: self.by_name[name].parameters[name].from_human(value)
+            for name, value in values.items()
+        }
+
+    def encode(self, group, read, values=None):
+        """
+        Args:
+            group (Group): The parameters to access.
+            read (bool): A read, otherwise a write.
+            values (dict): Raw values keyed by parameter name, for writes.
+
+        Returns:
+            can.Message: The request.
+        """
+        label = read_label if read else write_label
+        raw = [
+            (self.request.multiplexer, group.value),
+            (group.command, _raw(group.command.enumeration, label)),
+        ]
+        raw.extend(group.constants)
+        if not read:
+            raw.extend(
+                (layout, values[name]) for name, layout in group.parameters.items()
+            )
+
+        return can.Message(
+            arbitration_id=self.request.id,
+            is_extended_id=self.request.extended,
+            data=epyq.batchdecode.encode(raw),
+        )
+
+    def decode(self, message):
+        """
+        Returns:
+            tuple: The multiplexer value, command label and raw values keyed
+            by parameter name of a response, None for other messages.
+        """
+        if (
+            message.arbitration_id != self.response.id
+            or bool(message.is_extended_id) != self.response.extended
+        ):
+            return None
+
+        payload = bytes(message.data).ljust(8, b"\0")
+        big_word = int.from_bytes(payload, "big")
+        little_word = int.from_bytes(payload, "little")
+
+        value = self.response.multiplexer.raw_one(big_word, little_word)
+        group = self.groups.get(value)
+        if group is None:
+            return None
+
+        command = group.status_command.raw_one(big_word, little_word)
+        values = {
+            name: layout.raw_one(big_word, little_word)
+            for name, layout in group.status.items()
+        }
+
+        return value, group.status_command.enumeration.get(command), values
+
+
+@attr.s
+class Job:
+    group = attr.ib()
+    read = attr.ib()
+    values = attr.ib(default=None)
+    attempts = attr.ib(default=0)
+    deadline = attr.ib(default=None)
+    response = attr.ib(default=None)
+    error = attr.ib(default=None)
+
+
+@attr.s
+class Progress:
+    """
+    Args:
+        total (int): Parameters to transfer.
+        done (int): Parameters transferred.
+        failed (int): Parameters that could not be transferred.
+        requests (int): Requests sent, including retries.
+        retries (int): Requests sent again after timing out.
+        seconds (float): Time since the transfer started.
+    """
+
+    total = attr.ib(default=0)
+    done = attr.ib(default=0)
+    failed = attr.ib(default=0)
+    requests = attr.ib(default=0)
+    retries = attr.ib(default=0)
+    seconds = attr.ib(default=0.0)
+
+    def parameters_per_second(self):
+        if self.seconds <= 0:
+            return 0.0
+
+        return self.done / self.seconds
+
+    def summary(self):
+        return (
+            "{done}/{total} parameters, {failed} failed, {requests} requests"
+            " ({retries} retries) in {seconds:.3f} s, {rate:.1f} parameters/s"
+        ).format(rate=self.parameters_per_second(), **attr.asdict(self))
+
+
+@attr.s
+class Result:
+    """
+    Args:
+        values (dict): Human values reported by the device keyed by
+        parameter name.
+        failed (dict): Reasons keyed by parameter name.
+        progress (Progress): The final counts.
+        raw (dict): Raw values reported by the device keyed by parameter
+        name.
+    """
+
+    values = attr.ib(factory=dict)
+    failed = attr.ib(factory=dict)
+    progress = attr.ib(factory=Progress)
+    raw = attr.ib(factory=dict)
+
+
+@attr.s
+class Transfer:
+    """
+    Args:
+        parameters (ParameterMap): The device's parameter messages.
+        send (callable): Sends a :class:`can.Message`.
+        window (int): Most requests outstanding at once.
+        timeout (float): Seconds to wait for each response.
+        retries (int): Times a timed out request is sent again.
+        progress (callable, optional): Called with a :class:`Progress`
+        after each response or failure.
+        clock (callable): Monotonic time in seconds.
+    """
+
+    parameters = attr.ib()
+    send = attr.ib()
+    window = attr.ib(default=default_window)
+    timeout = attr.ib(default=default_timeout)
+    retries = attr.ib(default=default_retries)
+    progress = attr.ib(default=None)
+    clock = attr.ib(default=time.monotonic)
+    _condition = attr.ib(factory=threading.Condition, init=False)
+    _in_flight = attr.ib(factory=dict, init=False)
+
+    def message_received(self, message):
+        """
+        Match a response to its outstanding request.  Safe to call from a
+        :class:`can.Notifier` thread.
+        """
+        decoded = self.parameters.decode(message)
+        if decoded is None:
+            return
+
+        value, command, values = decoded
+
+        with self._condition:
+            job = self._in_flight.get(value)
+            if job is None:
+                return
+
+            expected = read_label if job.read else write_label
+            if command == error_label:
+                job.error = "the device responded with an error"
+            elif command != expected:
+                return
+            else:
+                job.response = values
+
+            del self._in_flight[value]
+            self._condition.notify_all()
+
+    __call__ = message_received
+
+    def read(self, names=None):
+        """
+        Args:
+            names (iterable, optional): The parameters to read, all if None.
+
+        Returns:
+            Result: The values read.
+        """
+        if names is None:
+            groups = list(self.parameters.groups.values())
+            names = list(self.parameters.by_name)
+        else:
+            names = list(names)
+            groups = self.parameters.groups_for(names)
+
+        progress = Progress(total=len(names))
+        result = Result(progress=progress)
+        self._run(
+            jobs=[Job(group=group, read=True) for group in groups],
+            result=result,
+            names=set(names),
+        )
+
+        return result
+
+    def write(self, values, current=None, human=True):
+        """
+        Write parameters, first reading the others in any partly written
+        group so they keep their values.
+
+        Args:
+            values (dict): Human values, or enumeration labels, keyed by
+            parameter name.
+            current (dict, optional): Raw values known to be on the device
+            keyed by parameter name.  Partly written groups are only read
+            for parameters not in here.
+            human (bool): ``values`` are human, otherwise already raw.
+
+        Returns:
+            Result: The values the device reports after writing.
+        """
+        groups = self.parameters.groups_for(values)
+        if human:
+            raw = self.parameters.to_raw(values)
+        else:
+            raw = dict(values)
+
+        if current is not None:
+            for group in groups:
+                for name in group.parameters:
+                    if name in current:
+                        raw.setdefault(name, current[name])
+
+        progress = Progress(total=len(values))
+        result = Result(progress=progress)
+
+        partial = [group for group in groups if not set(group.parameters) <= set(raw)]
+        if len(partial) > 0:
+            current = Result()
+            self._run(
+                jobs=[Job(group=group, read=True) for group in partial],
+                result=current,
+                names=None,
+            )
+            for name, reason in current.failed.items():
+                result.failed[name] = "unable to read before writing: " + reason
+            for name in current.raw:
+                raw.setdefault(name, current.raw[name])
+
+        jobs = []
+        for group in groups:
+            if any(name in result.failed for name in group.parameters):
+                continue
+            jobs.append(
+                Job(
+                    group=group,
+                    read=False,
+                    values={name: raw[name] for name in group.parameters},
+                )
+            )
+
+        progress.failed = len(set(result.failed) & set(values))
+        self._run(jobs=jobs, result=result, names=set(values))
+
+        return result
+
+    def _run(self, jobs, result, names):
+        """
+        Send ``jobs`` keeping up to :attr:`window` outstanding, filling
+        ``result`` with the values of ``names``, or every parameter of the
+        groups if None.
+        """
+        progress = result.progress
+        pending = collections.deque(jobs)
+        start = self.clock()
+
+        def wanted(job):
+            return [
+                name for name in job.group.parameters if names is None or name in names
+            ]
+
+        def finish(job):
+            if job.error is None and job.response is None:
+                job.error = "no response after {} attempts".format(job.attempts)
+
+            for name in wanted(job):
+                if job.error is not None:
+                    result.failed[name] = job.error
+                    progress.failed += 1
+                    continue
+
+                raw = job.response[name]
+                result.raw[name] = raw
+                if not job.read and raw != job.values[name]:
+                    result.failed[name] = "the device kept {}".format(raw)
+                    progress.failed += 1
+                else:
+                    progress.done += 1
+                result.values[name] = job.group.status[name].scale_one(raw)
+
+        with self._condition:
+            sent = []
+            while len(pending) > 0 or len(sent) > 0:
+                while len(pending) > 0 and len(self._in_flight) < self.window:
+                    job = pending.popleft()
+                    if job.attempts > 0:
+                        progress.retries += 1
+                    job.attempts += 1
+                    job.deadline = self.clock() + self.timeout
+                    self._in_flight[job.group.value] = job
+                    sent.append(job)
+                    progress.requests += 1
+                    self.send(self.parameters.encode(job.group, job.read, job.values))
+
+                now = self.clock()
+                changed = False
+                for job in list(sent):
+                    if self._in_flight.get(job.group.value) is not job:
+                        sent.remove(job)
+                        finish(job)
+                        changed = True
+                    elif now >= job.deadline:
+                        del self._in_flight[job.group.value]
+                        sent.remove(job)
+                        if job.attempts <= self.retries:
+                            # only this request is sent again, first
+                            pending.appendleft(job)
+                        else:
+                            finish(job)
+                        changed = True
+
+                if changed:
+                    progress.seconds = self.clock() - start
+                    if self.progress is not None:
+                        self.progress(attr.evolve(progress))
+                    continue
+
+                if len(sent) > 0:
+                    deadline = min(job.deadline for job in sent)
+                    self._condition.wait(max(0, deadline - self.clock()))
+
+        progress.seconds = self.clock() - start
+
+
+def load_values(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _print_progress(progress):
+    sys.stderr.write(
+        "\r{done}/{total} ({rate:.0f}/s)".format(
+            done=progress.done + progress.failed,
+            total=progress.total,
+            rate=progress.parameters_per_second(),
+        )
+    )
+
+
+def main(args=None):
+    import epyq.paramsync
+
+    parser = argparse.ArgumentParser(
+        description="Read or write a device's parameters in bulk",
+    )
+    parser.add_argument("database", help="The device's .sym CAN database")
+    parser.add_argument("--interface", default="socketcan")
+    parser.add_argument("--channel", default="can0")
+    parser.add_argument("--bitrate", type=int, default=None)
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--read", help="Write the parameters read to this JSON file")
+    action.add_argument("--write", help="Write the parameters in this JSON file")
+    action.add_argument(
+        "--sync",
+        help="Write only the parameters in this JSON file that differ",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Read back the parameters changed by --sync",
+    )
+    parser.add_argument(
+        "--snapshot",
+        help="Use the device's parameter snapshot in this file, by default"
+        " one per device in the user cache directory is only saved",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=None,
+        help="Use snapshot values up to this many seconds old",
+    )
+    parser.add_argument("--window", type=int, default=default_window)
+    parser.add_argument("--timeout", type=float, default=default_timeout)
+    parser.add_argument("--retries", type=int, default=default_retries)
+    parser.add_argument("--set-frame", default=default_set_frame)
+    parser.add_argument("--status-frame", default=default_status_frame)
+    args = parser.parse_args(args)
+
+    parameters = ParameterMap.from_matrix(
+        epyq.symcache.load_matrix(args.database),
+        set_frame=args.set_frame,
+        status_frame=args.status_frame,
+    )
+
+    snapshot_path = args.snapshot
+    if snapshot_path is None:
+        snapshot_path = epyq.paramsync.snapshot_path(
+            database=args.database,
+            interface=args.interface,
+            channel=args.channel,
+            request_id=parameters.request.id,
+        )
+    snapshot = epyq.paramsync.Snapshot.load(
+        snapshot_path,
+        trust=args.snapshot is not None or args.max_age is not None,
+        max_age=args.max_age,
+    )
+
+    values = None
+    if args.read is None:
+        values = load_values(args.write if args.sync is None else args.sync)
+        for name in sorted(set(values) - set(parameters.by_name)):
+            sys.stderr.write("Skipping {}, not in the database\n".format(name))
+            del values[name]
+
+    kwargs = {}
+    if args.bitrate is not None:
+        kwargs["bitrate"] = args.bitrate
+    bus = can.interface.Bus(bustype=args.interface, channel=args.channel, **kwargs)
+    transfer = Transfer(
+        parameters=parameters,
+        send=bus.send,
+        window=args.window,
+        timeout=args.timeout,
+        retries=args.retries,
+        progress=_print_progress,
+    )
+    notifier = can.Notifier(bus, [transfer])
+    try:
+        if args.sync is not None:
+            result = epyq.paramsync.sync(
+                transfer=transfer,
+                snapshot=snapshot,
+                values=values,
+                verify=args.verify,
+            )
+        else:
+            if args.read is not None:
+                result = transfer.read()
+            else:
+                result = transfer.write(values)
+            snapshot.invalidate(result.failed)
+            snapshot.update(
+                {
+                    name: raw
+                    for name, raw in result.raw.items()
+                    if name not in result.failed
+                }
+            )
+    finally:
+        notifier.stop()
+        bus.shutdown()
+        snapshot.save(snapshot_path)
+
+    sys.stderr.write("\n")
+    if args.sync is not None:
+        print(result.summary())
+    else:
+        print(result.progress.summary())
+    for name, reason in sorted(result.failed.items()):
+        print("{}: {}".format(name, reason))
+
+    if args.read is not None:
+        with open(args.read, "w", encoding="utf-8") as f:
+            json.dump(
+                {name: str(value) for name, value in sorted(result.values.items())},
+                f,
+                indent=4,
+            )
+
+    return 1 if len(result.failed) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,477 @@
+"""
+Decoding of received frames in the receive thread of each bus.  Every
+connected bus already has its own python-can notifier thread but the frames
+it reads are posted one by one to the Qt thread and decoded there by each
+device's :class:`epyqlib.canneo.Neo`, so a few busy buses starve the event
+loop and frames back up.
+
+With a :class:`Dispatcher` running, a :class:`BusDecoder` in each bus's
+notifier thread decodes the frames for the devices on that bus through
+:mod:`epyq.batchdecode` and puts the values into one shared
+:class:`UpdateQueue`.  The queue keeps only the latest value of each signal
+and the Qt thread applies everything queued in one batch per tick.  The
+devices' own decoding of the frames is then skipped while their other
+listeners still get each frame.
+"""
+
+import functools
+import logging
+import threading
+import time
+
+import attr
+
+import epyq.batchdecode
+import epyq.metrics
+import epyq.symcache
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+logger = logging.getLogger(__name__)
+
+default_interval = 0.010
+default_capacity = 10000
+
+
+@attr.s
+class Statistics:
+    """
+    Args:
+        enqueued (int): Values put into the queue.
+        coalesced (int): Values replaced by a newer one before being applied.
+        dropped (int): New values discarded because the queue was full.
+        batches (int): Drains that applied values.
+        applied (int): Values applied in the Qt thread.
+        largest_batch (int): Most values applied in one drain.
+        errors (int): Values that failed to apply.
+    """
+
+    enqueued = attr.ib(default=0)
+    coalesced = attr.ib(default=0)
+    dropped = attr.ib(default=0)
+    batches = attr.ib(default=0)
+    applied = attr.ib(default=0)
+    largest_batch = attr.ib(default=0)
+    errors = attr.ib(default=0)
+
+
+@attr.s
+class UpdateQueue:
+    """
+    Thread safe hand-off of the latest value for each key.
+
+    Args:
+        capacity (int): Most distinct keys held between drains.
+    """
+
+    capacity = attr.ib(default=default_capacity)
+    statistics = attr.ib(factory=Statistics)
+    _pending = attr.ib(factory=dict, init=False)
+    _lock = attr.ib(factory=threading.Lock, init=False)
+
+    def put(self, key, apply, value):
+        """
+        Queue ``apply(value)`` to be called in the draining thread, replacing
+        any value still queued for ``key``.
+
+        Returns:
+            bool: False if the value was dropped.
+        """
+        statistics = self.statistics
+
+        with self._lock:
+            statistics.enqueued += 1
+            if key in self._pending:
+                statistics.coalesced += 1
+            elif len(self._pending) >= self.capacity:
+                statistics.dropped += 1
+                return False
+
+            self._pending[key] = (apply, value)
+
+        return True
+
+    def drain(self):
+        """
+        Returns:
+            list: The queued ``(apply, value)`` pairs, oldest key first.
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+
+        return list(pending.values())
+
+    def depth(self):
+        return len(self._pending)
+
+
+def _set_last_received(frame, timestamp):
+    frame.last_received = timestamp
+
+
+@attr.s
+class DeviceDecoder:
+    """
+    Decodes the frames of one device into values for the signals of its
+    :class:`epyqlib.canneo.Neo`.
+
+    Args:
+        database (epyq.batchdecode.Database): The device's messages at the
+        IDs its neo uses.
+        signals (dict): ``(signal, frame)`` pairs of the neo keyed by
+        signal path.
+    """
+
+    database = attr.ib()
+    signals = attr.ib()
+
+    @classmethod
+    def from_device(cls, device):
+        import epyqlib.canneo
+
+        neo = device.neo_frames
+        matrix = epyq.symcache.load_matrix(device.can_path)
+        database = epyq.batchdecode.Database.from_matrix(matrix).renumbered(
+            ids={frame.name: frame.id for frame in neo.frames},
+        )
+
+        signals = {}
+        for branch in database.branches.values():
+            for path, _ in branch.signals:
+                try:
+                    signal = neo.signal_by_path(*path)
+                except epyqlib.canneo.NotFoundError:
+                    continue
+
+                signals[path] = (signal, signal.frame)
+
+        return cls(database=database, signals=signals)
+
+    def decode(self, message, queue):
+        """
+        Queue the values of the signals in ``message``.
+
+        Returns:
+            bool: Whether the message belongs to the device.
+        """
+        decoded = self.database.decode_frame(
+            message.arbitration_id,
+            message.data,
+            scale=False,
+            extended=message.is_extended_id,
+        )
+        if decoded is None:
+            return False
+
+        frame = None
+        for path, value in decoded.items():
+            target = self.signals.get(path)
+            if target is None:
+                continue
+
+            signal, frame = target
+            queue.put(signal, signal.set_value, value)
+
+        if frame is not None:
+            queue.put(
+                frame,
+                functools.partial(_set_last_received, frame),
+                message.timestamp,
+            )
+
+        return True
+
+
+@attr.s
+class BusDecoder:
+    """
+    A :class:`can.Notifier` listener decoding in the notifier's thread for
+    the devices on one bus.
+
+    Args:
+        name (str): The bus node name.
+        queue (UpdateQueue): Where the decoded values go.
+    """
+
+    name = attr.ib()
+    queue = attr.ib()
+    devices = attr.ib(factory=tuple)
+    frames = attr.ib(default=0)
+    decoded = attr.ib(default=0)
+    timing = attr.ib(factory=epyq.metrics.Timing)
+
+    def __call__(self, message):
+        start = time.perf_counter()
+        self.frames += 1
+
+        # replaced rather than modified by the Qt thread
+        for decoder in self.devices:
+            if decoder.decode(message, self.queue):
+                self.decoded += 1
+
+        self.timing.add(time.perf_counter() - start)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "frames": self.frames,
+            "decoded": self.decoded,
+            "decode": self.timing.to_dict(),
+        }
+
+
+class Decoupled(epyq.metrics.ListenerWrapper):
+    """
+    Stands in for a device's neo so the frames it would decode in the Qt
+    thread are ignored.
+    """
+
+    def emit(self, message):
+        pass
+
+
+def _splice(listeners, listener, old, new):
+    """
+    Swap ``old`` for ``new`` where it sits in the wrappers of ``listener``
+    in ``listeners``.
+    """
+    existing = epyq.metrics.find_listener(listeners, listener)
+    if existing is None:
+        return False
+
+    if existing is old:
+        return epyq.metrics.replace_listener(listeners, old, new)
+
+    wrapper = existing
+    while isinstance(wrapper, epyq.metrics.ListenerWrapper):
+        if wrapper.wrapped is old:
+            wrapper.wrapped = new
+            return True
+        wrapper = wrapper.wrapped
+
+    return False
+
+
+@attr.s
+class DeviceThread:
+    """
+    Moves the decoding of one device to its bus's :class:`BusDecoder`.
+    """
+
+    device = attr.ib()
+    decoder = attr.ib()
+    listener = attr.ib(default=None)
+
+    def install(self):
+        neo = self.device.neo_frames
+        listener = Decoupled(neo)
+        if _splice(self.device.bus.notifier.listeners, neo, neo, listener):
+            self.listener = listener
+
+    def uninstall(self):
+        if self.listener is None:
+            return
+
+        bus = self.device.bus
+        if bus is not None:
+            _splice(
+                bus.notifier.listeners,
+                self.listener,
+                self.listener,
+                self.listener.wrapped,
+            )
+        self.listener = None
+
+
+def _remove_callback(listeners, callback):
+    listeners[:] = [
+        listener
+        for listener in listeners
+        if listener is not callback
+        and getattr(listener, "wrapped", None) is not callback
+    ]
+
+
+@attr.s
+class BusThread:
+    """
+    Args:
+        proxy (epyqlib.busproxy.BusProxy): The bus node's proxy.
+        decoder (BusDecoder): Added to the proxy's python-can notifier.
+    """
+
+    proxy = attr.ib()
+    decoder = attr.ib()
+    devices = attr.ib(factory=dict)
+    _notifier = attr.ib(default=None, init=False)
+
+    def refresh(self):
+        """
+        Follow the python-can notifier, which is replaced each time the bus
+        is connected.
+        """
+        notifier = getattr(self.proxy, "real_notifier", None)
+        if notifier is self._notifier:
+            return
+
+        self._detach()
+        self._notifier = notifier
+        if notifier is not None:
+            notifier.listeners.append(self.decoder)
+
+    def _detach(self):
+        if self._notifier is not None:
+            _remove_callback(self._notifier.listeners, self.decoder)
+        self._notifier = None
+
+    def update(self, devices):
+        """
+        Args:
+            devices (iterable): The devices now on the bus.
+        """
+        devices = {device for device in devices if device.bus is not None}
+
+        for device in set(self.devices) - devices:
+            self.devices.pop(device).uninstall()
+
+        for device in devices - set(self.devices):
+            try:
+                decoder = DeviceDecoder.from_device(device)
+            except Exception:
+                logger.exception("Unable to decode %s in the bus thread", device.name)
+                continue
+
+            thread = DeviceThread(device=device, decoder=decoder)
+            thread.install()
+            self.devices[device] = thread
+
+        self.decoder.devices = tuple(
+            thread.decoder
+            for thread in self.devices.values()
+            if thread.listener is not None
+        )
+
+    def uninstall(self):
+        self._detach()
+        self.decoder.devices = ()
+        for thread in self.devices.values():
+            thread.uninstall()
+        self.devices = {}
+
+
+@attr.s
+class Dispatcher:
+    """
+    Applies the values decoded in the bus threads in the Qt thread.
+
+    Args:
+        model (epyqlib.devicetree.Model): Bus nodes are the children of its
+        root and device nodes are their children.
+        interval (float): Seconds between drains of the queue.
+        sync_interval (float): Seconds between checks for added and removed
+        buses and devices.
+        capacity (int): See :class:`UpdateQueue`.
+        timer (QTimer, optional): Drives the drains.  A timer is created if
+        not given.
+        clock (callable): Monotonic time in seconds.
+    """
+
+    model = attr.ib()
+    interval = attr.ib(default=default_interval)
+    sync_interval = attr.ib(default=1)
+    capacity = attr.ib(default=default_capacity)
+    timer = attr.ib(default=None)
+    clock = attr.ib(default=time.monotonic)
+    queue = attr.ib(default=None)
+    buses = attr.ib(factory=dict)
+    _next_sync = attr.ib(default=None, init=False)
+
+    def __attrs_post_init__(self):
+        if self.queue is None:
+            self.queue = UpdateQueue(capacity=self.capacity)
+
+    def start(self):
+        if self.timer is None:
+            from PyQt5 import QtCore
+
+            self.timer = QtCore.QTimer()
+
+        self.timer.setInterval(round(1000 * self.interval))
+        self.timer.timeout.connect(self.tick)
+        self.timer.start()
+        self.sync()
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.stop()
+
+        for bus in self.buses.values():
+            bus.uninstall()
+        self.buses = {}
+        self.drain()
+
+    def tick(self):
+        if self.clock() >= self._next_sync:
+            self.sync()
+
+        self.drain()
+
+    def sync(self):
+        """
+        Pick up added and removed buses and devices.
+        """
+        self._next_sync = self.clock() + self.sync_interval
+        bus_nodes = {node.bus: node for node in self.model.root.children}
+
+        for proxy in set(self.buses) - set(bus_nodes):
+            self.buses.pop(proxy).uninstall()
+
+        for proxy, node in bus_nodes.items():
+            bus = self.buses.get(proxy)
+            if bus is None:
+                bus = BusThread(
+                    proxy=proxy,
+                    decoder=BusDecoder(name=node.fields.name, queue=self.queue),
+                )
+                self.buses[proxy] = bus
+
+            bus.refresh()
+            bus.update(child.device for child in node.children)
+
+    def drain(self):
+        """
+        Apply everything queued by the bus threads.
+
+        Returns:
+            int: The number of values applied.
+        """
+        batch = self.queue.drain()
+        if len(batch) == 0:
+            return 0
+
+        statistics = self.queue.statistics
+        statistics.batches += 1
+        statistics.largest_batch = max(statistics.largest_batch, len(batch))
+
+        for apply, value in batch:
+            try:
+                apply(value)
+            except RuntimeError:
+                # The underlying Qt object has been deleted
+                statistics.errors += 1
+            else:
+                statistics.applied += 1
+
+        return len(batch)
+
+    def to_dict(self):
+        result = attr.asdict(self.queue.statistics)
+        result["depth"] = self.queue.depth()
+        result["capacity"] = self.queue.capacity
+        result["buses"] = [bus.decoder.to_dict() for bus in self.buses.values()]
+
+        return result
@@ -0,0 +1,272 @@
+"""
+Disk-backed streaming capture of CAN traffic.  Frames are packed into a fixed
+number of preallocated batches in memory and a writer thread spills full
+batches to segment files on disk.  Memory use is bounded by the batch count
+and size no matter how long the capture runs.
+"""
+
+import logging
+import math
+import os
+import pathlib
+import queue
+import shutil
+import tempfile
+import threading
+
+import attr
+import epyqlib.canneo
+
+from epyq.canrecord import (
+    flag_error,
+    flag_extended,
+    flag_remote,
+    flag_tx,
+    iter_records,
+    pack_flags,
+    record,
+)
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+logger = logging.getLogger(__name__)
+
+_stop = object()
+
+
+@attr.s(eq=False)
+class StreamingLog(epyqlib.canneo.QtCanListener):
+    """
+    A CAN log listener that streams to disk rather than accumulating
+    messages in memory.  Used in place of :class:`epyqlib.utils.canlog.Log`
+    by the "Start CAN log" action.
+
+    Args:
+        name (str): Bus name reported alongside the log.
+        directory (pathlib.Path, optional): Where to put segment files.
+        Defaults to a new temporary directory that is removed by
+        :meth:`close`.
+        batch_records (int): Frames per in-memory batch.
+        batch_count (int): Number of preallocated batches.  When the writer
+        falls this far behind new frames are dropped and counted.
+        segment_bytes (int): Size at which a new segment file is started.
+    """
+
+    name = attr.ib()
+    directory = attr.ib(default=None)
+    batch_records = attr.ib(default=4096)
+    batch_count = attr.ib(default=16)
+    segment_bytes = attr.ib(default=64 * 1024 * 1024)
+    dropped = attr.ib(default=0, init=False)
+    _count = attr.ib(default=0, init=False)
+    _minimum_time = attr.ib(default=math.inf, init=False)
+    _active = attr.ib(default=False, init=False)
+    _owns_directory = attr.ib(default=False, init=False)
+    _segments = attr.ib(factory=list, init=False)
+    _batch = attr.ib(default=None, init=False)
+    _batch_fill = attr.ib(default=0, init=False)
+    _free = attr.ib(default=None, init=False)
+    _pending = attr.ib(default=None, init=False)
+    _writer = attr.ib(default=None, init=False)
+    _error = attr.ib(default=None, init=False)
+
+    def __attrs_post_init__(self):
+        super().__init__(receiver=self._message_received)
+
+        if self.directory is None:
+            self.directory = pathlib.Path(tempfile.mkdtemp(prefix="epyq-canlog-"))
+            self._owns_directory = True
+        else:
+            self.directory = pathlib.Path(self.directory)
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+        batch_bytes = self.batch_records * record.size
+        self._free = queue.Queue()
+        for _ in range(self.batch_count):
+            self._free.put(bytearray(batch_bytes))
+        self._pending = queue.Queue()
+
+        self._batch = self._free.get_nowait()
+
+        self._writer = threading.Thread(
+            target=self._write_batches,
+            name="{} writer".format(type(self).__name__),
+            daemon=True,
+        )
+        self._writer.start()
+
+    def __len__(self):
+        return self._count
+
+    def _message_received(self, message):
+        if not self._active:
+            return
+
+        if self._batch is None:
+            try:
+                self._batch = self._free.get_nowait()
+            except queue.Empty:
+                self.dropped += 1
+                return
+
+        timestamp = message.timestamp
+        tx = timestamp is None
+        if tx:
+            timestamp = math.nan
+        elif timestamp < self._minimum_time:
+            self._minimum_time = timestamp
+
+        record.pack_into(
+            self._batch,
+            self._batch_fill * record.size,
+            timestamp,
+            message.arbitration_id,
+            pack_flags(message=message, tx=tx),
+            message.dlc,
+            bytes(message.data),
+        )
+        self._batch_fill += 1
+        self._count += 1
+
+        if self._batch_fill >= self.batch_records:
+            self._hand_off()
+
+    def _hand_off(self):
+        if self._batch is not None and self._batch_fill > 0:
+            self._pending.put((self._batch, self._batch_fill))
+            self._batch = None
+            self._batch_fill = 0
+
+    def _segment_path(self, index):
+        return self.directory / "segment-{:05d}.bin".format(index)
+
+    def _write_batches(self):
+        segment = None
+        segment_size = 0
+
+        while True:
+            item = self._pending.get()
+
+            try:
+                if item is _stop:
+                    return
+
+                if isinstance(item, threading.Event):
+                    if segment is not None:
+                        segment.flush()
+                    item.set()
+                    continue
+
+                batch, fill = item
+
+                if segment is None or segment_size >= self.segment_bytes:
+                    if segment is not None:
+                        segment.close()
+                    path = self._segment_path(len(self._segments))
+                    segment = open(path, "wb")
+                    segment_size = 0
+                    self._segments.append(path)
+
+                data = memoryview(batch)[: fill * record.size]
+                segment.write(data)
+                segment_size += len(data)
+                self._free.put(batch)
+            except Exception as e:
+                logger.exception("Failed writing CAN log segment")
+                self._error = e
+                if isinstance(item, tuple):
+                    self._free.put(item[0])
+            finally:
+                if item is _stop and segment is not None:
+                    segment.close()
+
+    def start(self):
+        self._active = True
+
+    def stop(self):
+        self._active = False
+
+    def flush(self):
+        """
+        Hand any partially filled batch to the writer and wait until
+        everything received so far is on disk.
+        """
+        self._hand_off()
+
+        if self._writer.is_alive():
+            done = threading.Event()
+            self._pending.put(done)
+            done.wait()
+
+        if self._error is not None:
+            raise self._error
+
+    def minimum_timestamp(self):
+        if math.isinf(self._minimum_time):
+            return None
+
+        return self._minimum_time
+
+    def chunks(self, records=65536, count=None):
+        """
+        Read the captured records back from disk in chunks.  This may be
+        called from another thread as long as ``count`` is passed.
+
+        Args:
+            records (int): Maximum number of records per chunk.
+            count (int, optional): Only read this many records.  They must
+            already be on disk, see :meth:`flush`.  Defaults to flushing and
+            then reading everything captured so far.
+
+        Yields:
+            bytes: Whole packed records, see :func:`iter_records`.
+        """
+        if count is None:
+            self.flush()
+            count = len(self)
+
+        remaining = count * record.size
+        chunk_bytes = records * record.size
+        for path in tuple(self._segments):
+            with open(path, "rb") as f:
+                while remaining > 0:
+                    chunk = f.read(min(chunk_bytes, remaining))
+                    if len(chunk) == 0:
+                        break
+
+                    remaining -= len(chunk)
+                    yield chunk
+
+    def frames(self):
+        """
+        Iterate over all captured frames in capture order.
+
+        Yields:
+            tuple: See :func:`iter_records`.
+        """
+        for chunk in self.chunks():
+            yield from iter_records(chunk)
+
+    def close(self):
+        """
+        Stop the writer thread and remove any files this log created.
+        """
+        self.stop()
+
+        if self._writer.is_alive():
+            self._pending.put(_stop)
+            self._writer.join()
+
+        if self._owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        else:
+            for path in self._segments:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+        self._segments = []
@@ -0,0 +1,454 @@
+"""
+Background export of streamed CAN logs, see :mod:`epyq.canlog`.  Records are
+read back from the log segments in batches, formatted by a pool of worker
+processes and written in order by the calling thread.  Intended to be run off
+of the Qt thread such as via :func:`twisted.internet.threads.deferToThread`.
+"""
+
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import heapq
+import itertools
+import logging
+import math
+import operator
+import os
+import threading
+import time
+
+import attr
+
+import epyq.binlog
+import epyq.canrecord
+import epyq.trc
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+logger = logging.getLogger(__name__)
+
+
+class CanceledError(Exception):
+    pass
+
+
+@attr.s
+class Target:
+    """
+    One log to be exported.
+
+    Args:
+        log (epyq.canlog.StreamingLog): The log to read from.
+        path (str): The file to write, unused when merging logs.
+        count (int): Number of records to export.  They must already be
+        flushed to disk by :meth:`epyq.canlog.StreamingLog.flush`.
+    """
+
+    log = attr.ib()
+    path = attr.ib()
+    count = attr.ib()
+
+
+@attr.s
+class Statistics:
+    records = attr.ib(default=0)
+    bytes = attr.ib(default=0)
+    seconds = attr.ib(default=0.0)
+
+    def megabytes_per_second(self):
+        if self.seconds <= 0:
+            return 0.0
+
+        return self.bytes / self.seconds / 1e6
+
+    def summary(self):
+        format = (
+            "{records} frames, {megabytes:.1f} MB in {seconds:.1f} s ({rate:.1f} MB/s)"
+        )
+        return format.format(
+            records=self.records,
+            megabytes=self.bytes / 1e6,
+            seconds=self.seconds,
+            rate=self.megabytes_per_second(),
+        )
+
+
+@attr.s
+class _Export:
+    chunk_records = attr.ib(default=20000, kw_only=True)
+    workers = attr.ib(default=None, kw_only=True)
+    executor_factory = attr.ib(
+        default=concurrent.futures.ProcessPoolExecutor,
+        kw_only=True,
+    )
+    progress = attr.ib(default=None, kw_only=True)
+    _canceled = attr.ib(factory=threading.Event, init=False)
+
+    def total(self):
+        return sum(target.count for target in self.targets)
+
+    def cancel(self):
+        self._canceled.set()
+
+    def canceled(self):
+        return self._canceled.is_set()
+
+    def run(self):
+        """
+        Write all files.  Partially written files are removed if the export
+        is canceled or fails.
+
+        Returns:
+            Statistics: Totals across all files.
+
+        Raises:
+            CanceledError: If :meth:`cancel` was called.
+        """
+        statistics = Statistics()
+        workers = self.workers
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        start = time.perf_counter()
+
+        with contextlib.ExitStack() as stack:
+            executor = None
+            if workers > 1:
+                executor = stack.enter_context(
+                    self.executor_factory(max_workers=workers),
+                )
+
+            for path, header, batches, format in self._files():
+                try:
+                    with open(path, "w") as f:
+                        f.write(header)
+                        self._write_batches(
+                            f=f,
+                            batches=batches,
+                            format=format,
+                            executor=executor,
+                            window=2 * workers,
+                            statistics=statistics,
+                        )
+                        statistics.bytes += f.tell()
+                except BaseException:
+                    if os.path.exists(path):
+                        os.remove(path)
+                    raise
+
+        statistics.seconds = time.perf_counter() - start
+        logger.info("CAN log export: %s", statistics.summary())
+
+        return statistics
+
+    def _write_batches(self, f, batches, format, executor, window, statistics):
+        total = self.total()
+        pending = collections.deque()
+
+        def write_oldest():
+            result, count = pending.popleft()
+            f.write(result.result() if executor is not None else result)
+            statistics.records += count
+
+            if self.progress is not None:
+                self.progress(statistics.records, total)
+
+        number = 1
+        try:
+            for batch, count in batches:
+                if self.canceled():
+                    raise CanceledError()
+
+                if executor is None:
+                    pending.append((format(batch, number), count))
+                else:
+                    # at most window batches are held formatted or in flight
+                    pending.append((executor.submit(format, batch, number), count))
+                number += count
+
+                while len(pending) >= window:
+                    write_oldest()
+
+            while len(pending) > 0:
+                if self.canceled():
+                    raise CanceledError()
+
+                write_oldest()
+        finally:
+            if executor is not None:
+                for future, count in pending:
+                    future.cancel()
+
+
+@attr.s
+class TrcExport(_Export):
+    """
+    Export logs to TRC v1.1 files, one per log.
+
+    Args:
+        targets (list): :class:`Target` instances to write in order.
+        time_offset (float): Subtracted from received timestamps, usually the
+        earliest timestamp across all logs.
+        chunk_records (int): Records formatted per batch.
+        workers (int, optional): Formatting processes, defaults to the number
+        of CPUs.  With one the batches are formatted by the calling thread.
+        executor_factory (callable): Creates the pool given ``max_workers``.
+        progress (callable, optional): Called from the exporting thread with
+        the records written so far and the total.
+    """
+
+    targets = attr.ib()
+    time_offset = attr.ib()
+
+    def _files(self):
+        format = functools.partial(
+            epyq.trc.format_records_v1_1,
+            time_offset=self.time_offset,
+        )
+
+        for target in self.targets:
+            batches = (
+                (chunk, len(chunk) // epyq.canrecord.record.size)
+                for chunk in target.log.chunks(
+                    records=self.chunk_records,
+                    count=target.count,
+                )
+            )
+
+            yield (
+                target.path,
+                epyq.trc.format_header_v1_1(path=target.path),
+                batches,
+                format,
+            )
+
+
+def timed_frames(log, count, bus, initial_time, records=65536):
+    """
+    Iterate over the frames of a log with a usable time for every frame.
+    Transmitted frames are not timestamped when captured so they take the
+    time of the frame received before them.
+
+    Args:
+        log (epyq.canlog.StreamingLog): The log to read from.
+        count (int): Number of records to read, see
+        :meth:`epyq.canlog.StreamingLog.chunks`.
+        bus (int): Included in each yielded tuple.
+        initial_time (float): Used for transmitted frames before the first
+        received frame.
+        records (int): Records read from disk at a time.
+
+    Yields:
+        tuple: ``(time, bus, id, flags, dlc, data)``
+    """
+    last_time = initial_time
+
+    for chunk in log.chunks(records=records, count=count):
+        for time, id, flags, dlc, data in epyq.canrecord.iter_records(chunk):
+            if math.isnan(time):
+                time = last_time
+            else:
+                last_time = time
+
+            yield (time, bus, id, flags, dlc, data)
+
+
+def merge_frames(targets, initial_time, records=65536):
+    """
+    Merge the frames of several logs into one time ordered stream.  Only a
+    chunk per log is held in memory at a time.
+
+    Args:
+        targets (list): :class:`Target` instances, their paths are ignored.
+        Bus numbers are assigned in order starting from one.
+        initial_time (float): See :func:`timed_frames`.
+        records (int): Records read from disk at a time per log.
+
+    Yields:
+        tuple: See :func:`timed_frames`.
+    """
+    return heapq.merge(
+        *(
+            timed_frames(
+                log=target.log,
+                count=target.count,
+                bus=bus,
+                initial_time=initial_time,
+                records=records,
+            )
+            for bus, target in enumerate(targets, start=1)
+        ),
+        key=operator.itemgetter(0),
+    )
+
+
+@attr.s
+class MergedTrcExport(_Export):
+    """
+    Export several logs to a single time ordered TRC v2.1 file with a bus
+    column.  The logs are merged as they are read back from disk.
+
+    Args:
+        targets (list): :class:`Target` instances, their paths are ignored.
+        path (str): The file to write.
+        time_offset (float): See :class:`TrcExport`.
+
+    Other arguments are as for :class:`TrcExport`.
+    """
+
+    targets = attr.ib()
+    path = attr.ib()
+    time_offset = attr.ib()
+
+    def _files(self):
+        frames = merge_frames(
+            targets=self.targets,
+            initial_time=self.time_offset,
+            records=self.chunk_records,
+        )
+
+        batches = (
+            (batch, len(batch))
+            for batch in iter(
+                lambda: list(itertools.islice(frames, self.chunk_records)),
+                [],
+            )
+        )
+
+        header = epyq.trc.format_header_v2_1(
+            path=self.path,
+            buses={
+                bus: target.log.name for bus, target in enumerate(self.targets, start=1)
+            },
+        )
+
+        format = functools.partial(
+            epyq.trc.format_frames_v2_1,
+            time_offset=self.time_offset,
+        )
+
+        yield (self.path, header, batches, format)
+
+
+@attr.s
+class BinaryExport(_Export):
+    """
+    Export logs to native binary CAN log files, one per log, see
+    :mod:`epyq.binlog`.  Records are split into columns with slicing only.
+
+    Args:
+        targets (list): :class:`Target` instances to write in order.
+
+    Other arguments are as for :class:`TrcExport`.
+    """
+
+    targets = attr.ib()
+
+    def run(self):
+        statistics = Statistics()
+        total = self.total()
+        start = time.perf_counter()
+
+        for target in self.targets:
+            try:
+                with open(target.path, "wb") as f:
+                    with epyq.binlog.Writer(f=f, buses={1: target.log.name}) as writer:
+                        for chunk in target.log.chunks(
+                            records=self.chunk_records,
+                            count=target.count,
+                        ):
+                            if self.canceled():
+                                raise CanceledError()
+
+                            statistics.records += writer.write_records(chunk, bus=1)
+
+                            if self.progress is not None:
+                                self.progress(statistics.records, total)
+
+                    statistics.bytes += f.tell()
+            except BaseException:
+                if os.path.exists(target.path):
+                    os.remove(target.path)
+                raise
+
+        statistics.seconds = time.perf_counter() - start
+        logger.info("CAN log export: %s", statistics.summary())
+
+        return statistics
+
+
+@attr.s
+class Sequence:
+    """
+    Run several export jobs one after another as a single job.
+
+    Args:
+        factories (list): Callables creating each job given a ``progress``
+        keyword argument.
+        progress (callable, optional): See :class:`TrcExport`.
+    """
+
+    factories = attr.ib()
+    progress = attr.ib(default=None)
+    jobs = attr.ib(init=False)
+    _finished = attr.ib(factory=list, init=False)
+
+    def __attrs_post_init__(self):
+        self.jobs = []
+        for factory in self.factories:
+            self.jobs.append(factory(progress=self._job_progress))
+
+    def _job_progress(self, done, total):
+        if self.progress is not None:
+            done += sum(job.total() for job in self._finished)
+            self.progress(done, self.total())
+
+    def total(self):
+        return sum(job.total() for job in self.jobs)
+
+    def cancel(self):
+        for job in self.jobs:
+            job.cancel()
+
+    def run(self):
+        statistics = Statistics()
+        self._finished.clear()
+
+        for job in self.jobs:
+            job_statistics = job.run()
+            self._finished.append(job)
+
+            statistics.records += job_statistics.records
+            statistics.bytes += job_statistics.bytes
+            statistics.seconds += job_statistics.seconds
+
+        return statistics
+
+
+def for_targets(targets, time_offset, progress=None):
+    """
+    Create an export job writing each target in the format matching its file
+    extension.  Binary for :data:`epyq.binlog.extension` and TRC v1.1
+    otherwise.
+    """
+    binary_suffix = "." + epyq.binlog.extension
+    binary = [t for t in targets if t.path.casefold().endswith(binary_suffix)]
+    trc = [t for t in targets if t not in binary]
+
+    factories = []
+    if len(trc) > 0:
+        factories.append(
+            functools.partial(TrcExport, targets=trc, time_offset=time_offset)
+        )
+    if len(binary) > 0:
+        factories.append(functools.partial(BinaryExport, targets=binary))
+
+    if len(factories) == 1:
+        (factory,) = factories
+        return factory(progress=progress)
+
+    return Sequence(factories=factories, progress=progress)
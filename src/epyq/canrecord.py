@@ -0,0 +1,80 @@
+"""
+Packed record layout shared by the CAN log capture, export and conversion
+code.  Kept free of Qt so worker processes can import it cheaply.
+"""
+
+import struct
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+# time (NaN when not available), arbitration id, flags, dlc, data
+record = struct.Struct("<dIBB8s")
+
+flag_extended = 0x01
+flag_tx = 0x02
+flag_remote = 0x04
+flag_error = 0x08
+
+
+def pack_flags(message, tx):
+    flags = 0
+    if message.is_extended_id:
+        flags |= flag_extended
+    if tx:
+        flags |= flag_tx
+    if message.is_remote_frame:
+        flags |= flag_remote
+    if message.is_error_frame:
+        flags |= flag_error
+
+    return flags
+
+
+def iter_records(buffer):
+    """
+    Iterate over the records packed in a bytes-like object.
+
+    Args:
+        buffer (bytes-like): Whole records as packed by :data:`record`.
+
+    Yields:
+        tuple: ``(time, id, flags, dlc, data)`` where ``time`` is NaN for
+        transmitted frames and ``data`` is always 8 bytes long.
+    """
+    return record.iter_unpack(buffer)
+
+
+def to_columns(chunk):
+    """
+    Split packed records into contiguous columns.  This only uses extended
+    slicing so it runs at C speed regardless of the record count.
+
+    Args:
+        chunk (bytes): Whole records as packed by :data:`record`.
+
+    Returns:
+        tuple: ``(times, ids, flags, dlcs, data)`` as ``bytearray`` holding
+        little endian doubles, little endian 32 bit unsigned integers, bytes,
+        bytes and 8 data bytes per record respectively.
+    """
+    size = record.size
+    count = len(chunk) // size
+    chunk = bytes(chunk[: count * size])
+
+    def gather(offset, width):
+        column = bytearray(count * width)
+        for byte in range(width):
+            column[byte::width] = chunk[offset + byte :: size]
+
+        return column
+
+    return (
+        gather(offset=0, width=8),
+        gather(offset=8, width=4),
+        gather(offset=12, width=1),
+        gather(offset=13, width=1),
+        gather(offset=14, width=8),
+    )
@@ -0,0 +1,184 @@
+"""
+Chart window for large data logger CSV files.  Builds on
+:mod:`epyqlib.csvwindow` but only hands QtCharts the decimated points of the
+visible range and decimates again whenever the charts are zoomed.
+"""
+
+import epyqlib.csvwindow
+
+from PyQt5 import QtChart, QtCore, QtGui, QtWidgets
+
+import epyq.csvcache
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+class DecimatedChart(epyqlib.csvwindow.CheckableChart):
+    """
+    A checkable chart fed from a :class:`epyq.csvcache.Decimator`.
+    """
+
+    def __init__(self, decimator):
+        self.decimator = decimator
+        self.x_range = None
+
+        super().__init__()
+
+    def set_x_range(self, minimum, maximum):
+        self.x_range = (minimum, maximum)
+        self.update()
+
+    def update(self):
+        scale = self.scaling_spin_box.value()
+        initial = self.x_range is None
+
+        if initial:
+            x_minimum, x_maximum = self.decimator.x_range()
+        else:
+            x_minimum, x_maximum = self.x_range
+
+        # min/max pairs so about one point per pixel
+        buckets = max(1, int(self.view.width() / 2))
+        points = self.decimator.points(
+            x_minimum=x_minimum,
+            x_maximum=x_maximum,
+            buckets=buckets,
+        )
+
+        self.series.replace(
+            QtGui.QPolygonF(QtCore.QPointF(x, y * scale) for x, y in points)
+        )
+
+        if len(points) > 0:
+            y_minimum, y_maximum = sorted(
+                scale * limit for limit in self.decimator.y_range()
+            )
+
+            delta = y_maximum - y_minimum
+
+            if delta == 0:
+                extra = 1
+            else:
+                extra = 0.05 * delta
+
+            self.chart.axisY().setRange(
+                y_minimum - extra,
+                y_maximum + extra,
+            )
+
+            if initial:
+                self.chart.axisX().setRange(x_minimum, x_maximum)
+
+
+class ChartWindow(QtWidgets.QMainWindow):
+    """
+    Charts each column of a :class:`epyq.csvcache.Table` against its time
+    column.  Zooming any chart zooms them all.
+
+    Args:
+        table (epyq.csvcache.Table): The data to chart.
+        parent (QWidget, optional): Defaults to None.
+    """
+
+    closing = QtCore.pyqtSignal()
+
+    def __init__(self, table, parent=None):
+        super().__init__(parent=parent)
+
+        self.setWindowModality(QtCore.Qt.NonModal)
+
+        self.central_widget = QtWidgets.QWidget()
+        self.central_widget_layout = QtWidgets.QVBoxLayout()
+        self.scroll_area = QtWidgets.QScrollArea()
+        self.scroll_area.setWidgetResizable(True)
+        self.scroll_area.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.scroll_area.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOn)
+        self.central_widget.setLayout(self.central_widget_layout)
+        self.central_widget_layout.addWidget(self.scroll_area)
+        self.scroll_widget = QtWidgets.QWidget()
+        self.scroll_area.setWidget(self.scroll_widget)
+
+        self.grid_layout = QtWidgets.QGridLayout()
+        self.scroll_widget.setLayout(self.grid_layout)
+        self.setCentralWidget(self.central_widget)
+
+        available = QtWidgets.QDesktopWidget().availableGeometry(self).size()
+        size = self.size()
+        size.setWidth(available.width() * 0.7)
+        size.setHeight(available.height() * 0.9)
+        self.resize(size)
+
+        self.x_axes = []
+        self.checkable_charts = []
+        self.x_range = None
+
+        # Coalesce the range changes from a zoom and from synchronizing the
+        # other axes into a single decimation pass.
+        self.redecimate_timer = QtCore.QTimer(self)
+        self.redecimate_timer.setSingleShot(True)
+        self.redecimate_timer.setInterval(50)
+        self.redecimate_timer.timeout.connect(self.redecimate)
+
+        x = table.x()
+
+        for name, values in sorted(table.columns.items()):
+            if name == epyq.csvcache.time_name:
+                continue
+
+            checkable_chart = DecimatedChart(
+                decimator=epyq.csvcache.Decimator(x=x, y=values),
+            )
+            checkable_chart.name = name
+            row = self.grid_layout.rowCount()
+
+            layout = QtWidgets.QVBoxLayout()
+            layout.addWidget(checkable_chart.check_box)
+            layout.addWidget(checkable_chart.scaling_spin_box)
+            checkable_chart.scaling_spin_box.setSizePolicy(
+                QtWidgets.QSizePolicy.Fixed,
+                checkable_chart.scaling_spin_box.sizePolicy().verticalPolicy(),
+            )
+
+            self.grid_layout.addLayout(layout, row, 0, 1, 1, QtCore.Qt.AlignLeft)
+            self.grid_layout.addWidget(checkable_chart.view, row, 1)
+
+            chart = checkable_chart.chart
+            chart.legend().hide()
+            view = checkable_chart.view
+
+            view.setRubberBand(QtChart.QChartView.HorizontalRubberBand)
+            view.setRenderHint(QtGui.QPainter.Antialiasing)
+
+            checkable_chart.update()
+            self.x_axes.append(chart.axisX())
+            self.checkable_charts.append(checkable_chart)
+
+        for axis in self.x_axes:
+            axis.rangeChanged.connect(self.axis_range_changed)
+
+    @QtCore.pyqtSlot("qreal", "qreal")
+    def axis_range_changed(self, min, max):
+        if self.x_range == (min, max):
+            return
+
+        self.x_range = (min, max)
+
+        for axis in self.x_axes:
+            axis.setRange(min, max)
+
+        self.redecimate_timer.start()
+
+    def redecimate(self):
+        for checkable_chart in self.checkable_charts:
+            checkable_chart.set_x_range(*self.x_range)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+
+        if self.x_range is not None:
+            self.redecimate_timer.start()
+
+    def closeEvent(self, event):
+        self.closing.emit()
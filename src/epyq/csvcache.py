@@ -0,0 +1,357 @@
+"""
+Chunked loading of large data logger CSV files for charting.  Columns are
+parsed into :class:`array.array` in batches of rows and cached in a binary
+sidecar file next to the CSV so later loads skip text parsing entirely.
+:class:`Decimator` reduces a column to about one point per pixel of the
+visible range using a precomputed min/max pyramid.
+"""
+
+import array
+import bisect
+import csv
+import hashlib
+import itertools
+import json
+import logging
+import os
+import pathlib
+import struct
+
+import appdirs
+import attr
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+logger = logging.getLogger(__name__)
+
+sidecar_suffix = ".epcc"
+magic = b"EPYQCSVC"
+version = 1
+header_struct = struct.Struct("<8sHI")
+time_name = ".time"
+
+
+class CacheError(Exception):
+    pass
+
+
+@attr.s
+class Table:
+    """
+    Args:
+        columns (dict): :class:`array.array` of doubles keyed by column name.
+        rows (int): The number of rows in each column.
+        cached (bool): Whether the columns were loaded from a sidecar cache.
+    """
+
+    columns = attr.ib()
+    rows = attr.ib()
+    cached = attr.ib(default=False)
+
+    def x(self):
+        """
+        Returns:
+            array.array: The time column if present, otherwise row numbers.
+        """
+        x = self.columns.get(time_name)
+        if x is None:
+            x = array.array("d", range(self.rows))
+
+        return x
+
+
+def _source_key(path):
+    stat = os.stat(path)
+
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def sidecar_paths(path):
+    """
+    Returns:
+        list: Candidate sidecar cache paths in order of preference.  Next to
+        the CSV and then the user cache directory for read only locations.
+    """
+    path = pathlib.Path(path).resolve()
+    digest = hashlib.sha256(os.fsencode(path)).hexdigest()[:16]
+    cache_directory = pathlib.Path(
+        appdirs.user_cache_dir(appname="EPyQ", appauthor="EPC Power Corp.")
+    )
+
+    return [
+        path.with_name(path.name + sidecar_suffix),
+        cache_directory / "csv" / (digest + sidecar_suffix),
+    ]
+
+
+def parse_csv(f, chunk_rows=65536):
+    """
+    Parse a CSV with a header row and numeric values into columns.
+
+    Args:
+        f (text file): The open CSV file.
+        chunk_rows (int): Rows converted at a time.
+
+    Returns:
+        Table: The parsed columns.
+    """
+    reader = csv.reader(f)
+    names = next(reader)
+    columns = [array.array("d") for _ in names]
+    rows = 0
+
+    while True:
+        chunk = list(itertools.islice(reader, chunk_rows))
+        if len(chunk) == 0:
+            break
+
+        for column, values in zip(columns, zip(*chunk)):
+            column.extend(map(float, values))
+
+        rows += len(chunk)
+
+    return Table(columns=dict(zip(names, columns)), rows=rows)
+
+
+def write_sidecar(path, table, key):
+    header = json.dumps(
+        {"source": key, "names": list(table.columns), "rows": table.rows},
+    ).encode("utf-8")
+
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "wb") as f:
+        f.write(header_struct.pack(magic, version, len(header)))
+        f.write(header)
+        f.write(bytes(-f.tell() % 8))
+        for column in table.columns.values():
+            column.tofile(f)
+
+    os.replace(temporary, path)
+
+
+def read_sidecar(path, key):
+    """
+    Raises:
+        CacheError: If the sidecar is invalid or does not match ``key``.
+    """
+    with open(path, "rb") as f:
+        header = f.read(header_struct.size)
+        if len(header) != header_struct.size:
+            raise CacheError("Truncated header")
+
+        file_magic, file_version, header_length = header_struct.unpack(header)
+        if file_magic != magic or file_version != version:
+            raise CacheError("Unsupported sidecar")
+
+        header = json.loads(f.read(header_length).decode("utf-8"))
+        if header["source"] != key:
+            raise CacheError("Sidecar is stale")
+
+        f.read(-f.tell() % 8)
+
+        rows = header["rows"]
+        columns = {}
+        for name in header["names"]:
+            column = array.array("d")
+            try:
+                column.fromfile(f, rows)
+            except EOFError as e:
+                raise CacheError("Truncated column {!r}".format(name)) from e
+            columns[name] = column
+
+    return Table(columns=columns, rows=rows, cached=True)
+
+
+def load(path, cache=True):
+    """
+    Load a CSV using the sidecar cache when it is current, otherwise parse it
+    and try to write a sidecar for next time.
+
+    Args:
+        path (str or pathlib.Path): The CSV file.
+        cache (bool): Whether to use and write sidecar caches.
+
+    Returns:
+        Table: The loaded columns.
+    """
+    key = _source_key(path)
+    candidates = sidecar_paths(path) if cache else []
+
+    for sidecar in candidates:
+        try:
+            return read_sidecar(path=sidecar, key=key)
+        except FileNotFoundError:
+            pass
+        except (CacheError, OSError, ValueError, KeyError) as e:
+            logger.debug("Ignoring CSV sidecar %s: %s", sidecar, e)
+
+    with open(path, "r", newline="") as f:
+        table = parse_csv(f)
+
+    for sidecar in candidates:
+        try:
+            sidecar.parent.mkdir(parents=True, exist_ok=True)
+            write_sidecar(path=sidecar, table=table, key=key)
+        except OSError as e:
+            logger.debug("Unable to write CSV sidecar %s: %s", sidecar, e)
+        else:
+            break
+
+    return table
+
+
+@attr.s
+class _Level:
+    block = attr.ib()
+    minimums = attr.ib()
+    maximums = attr.ib()
+    minimum_indexes = attr.ib()
+    maximum_indexes = attr.ib()
+
+
+class Decimator:
+    """
+    Min/max decimation of one column against a monotonic x column.  Each
+    pyramid level holds the minimum and maximum, with their row indexes, of
+    consecutive blocks of rows so a query only touches about as many entries
+    as points it returns.
+
+    Args:
+        x (array.array): Monotonically increasing x values.
+        y (array.array): The values to decimate.
+        block (int): Rows per block in the first pyramid level.
+        factor (int): Blocks combined per block in each further level.
+    """
+
+    def __init__(self, x, y, block=64, factor=8):
+        self.x = x
+        self.y = y
+        self.levels = []
+
+        count = len(y)
+        if count < 2 * block:
+            return
+
+        minimums = array.array("d")
+        maximums = array.array("d")
+        minimum_indexes = array.array("q")
+        maximum_indexes = array.array("q")
+        for start in range(0, count, block):
+            values = y[start : start + block]
+            minimum = min(values)
+            maximum = max(values)
+            minimums.append(minimum)
+            maximums.append(maximum)
+            minimum_indexes.append(start + values.index(minimum))
+            maximum_indexes.append(start + values.index(maximum))
+
+        level = _Level(
+            block=block,
+            minimums=minimums,
+            maximums=maximums,
+            minimum_indexes=minimum_indexes,
+            maximum_indexes=maximum_indexes,
+        )
+        self.levels.append(level)
+
+        while len(level.minimums) >= 2 * factor:
+            level = self._combine(level=level, factor=factor)
+            self.levels.append(level)
+
+    @staticmethod
+    def _combine(level, factor):
+        minimums = array.array("d")
+        maximums = array.array("d")
+        minimum_indexes = array.array("q")
+        maximum_indexes = array.array("q")
+
+        for start in range(0, len(level.minimums), factor):
+            values = level.minimums[start : start + factor]
+            minimum = min(values)
+            minimums.append(minimum)
+            minimum_indexes.append(
+                level.minimum_indexes[start + values.index(minimum)],
+            )
+
+            values = level.maximums[start : start + factor]
+            maximum = max(values)
+            maximums.append(maximum)
+            maximum_indexes.append(
+                level.maximum_indexes[start + values.index(maximum)],
+            )
+
+        return _Level(
+            block=level.block * factor,
+            minimums=minimums,
+            maximums=maximums,
+            minimum_indexes=minimum_indexes,
+            maximum_indexes=maximum_indexes,
+        )
+
+    def x_range(self):
+        if len(self.x) == 0:
+            return (0, 0)
+
+        return (self.x[0], self.x[-1])
+
+    def points(self, x_minimum, x_maximum, buckets):
+        """
+        Decimate the rows within an x range.
+
+        Args:
+            x_minimum (float): Start of the visible range.
+            x_maximum (float): End of the visible range.
+            buckets (int): Number of min/max pairs to produce, usually half
+            the plot width in pixels.
+
+        Returns:
+            list: ``(x, y)`` points in x order including one point beyond each
+            end of the range so lines run to the edges.
+        """
+        start = max(0, bisect.bisect_left(self.x, x_minimum) - 1)
+        stop = min(len(self.x), bisect.bisect_right(self.x, x_maximum) + 1)
+        buckets = max(1, buckets)
+        count = stop - start
+
+        if count <= 2 * buckets:
+            return list(zip(self.x[start:stop], self.y[start:stop]))
+
+        bucket_rows = count / buckets
+        level = None
+        for candidate in self.levels:
+            if candidate.block <= bucket_rows:
+                level = candidate
+
+        if level is None:
+            return list(zip(self.x[start:stop], self.y[start:stop]))
+
+        first_block = start // level.block
+        last_block = (stop - 1) // level.block + 1
+        blocks_per_bucket = max(1, round(bucket_rows / level.block))
+
+        indexes = []
+        for block in range(first_block, last_block, blocks_per_bucket):
+            end = min(block + blocks_per_bucket, last_block)
+
+            minimums = level.minimums[block:end]
+            minimum_index = level.minimum_indexes[block + minimums.index(min(minimums))]
+
+            maximums = level.maximums[block:end]
+            maximum_index = level.maximum_indexes[block + maximums.index(max(maximums))]
+
+            indexes.extend(sorted({minimum_index, maximum_index}))
+
+        return [(self.x[i], self.y[i]) for i in indexes]
+
+    def y_range(self):
+        if len(self.levels) > 0:
+            level = self.levels[-1]
+            return (min(level.minimums), max(level.maximums))
+
+        if len(self.y) == 0:
+            return (0, 0)
+
+        return (min(self.y), max(self.y))
@@ -0,0 +1,429 @@
+"""
+Dashboards built on demand and signal subscriptions of device tab widgets
+that follow tab visibility.
+
+:func:`install` has :class:`epyqlib.device.Device` load and wire only its
+first ``ui_paths`` dashboard.  The others get empty placeholder pages which
+:class:`DeferredDashboards` fills, loading the ``.ui`` file and connecting
+its widgets, the first time their tab is shown.
+
+:class:`TabSubscriptions` then keeps only the shown tab updating.  Receive
+only widgets on hidden tabs, and on every tab of a device which is not
+selected, are disconnected from their signals and reconnected, with their
+current value, when their tab is shown again.
+"""
+
+import logging
+import math
+import time
+
+import attr
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+logger = logging.getLogger(__name__)
+
+_original_init_from_parameters = None
+
+
+def pending(page):
+    """
+    Returns:
+        bool: Whether ``page`` is a dashboard placeholder not yet built.
+    """
+    return getattr(page, "dashboard_path", None) is not None
+
+
+@attr.s
+class DeferredDashboards:
+    """
+    Build dashboard pages the first time their tab is shown.
+
+    Args:
+        tabs (QTabWidget): The device tabs, usually ``device.ui.tabs``.
+        build (callable): Called with a placeholder page and the ``.ui``
+        path of its dashboard, fills the page.
+        pages (dict): ``.ui`` paths keyed by the placeholder pages not yet
+        built.
+        built (int): Dashboards built so far.
+        seconds (float): Time spent building them.
+    """
+
+    tabs = attr.ib()
+    build = attr.ib()
+    pages = attr.ib(factory=dict)
+    built = attr.ib(default=0)
+    seconds = attr.ib(default=0.0)
+
+    def __attrs_post_init__(self):
+        self.tabs.currentChanged.connect(self.show)
+
+    def add(self, page, path):
+        page.dashboard_path = path
+        self.pages[page] = path
+
+    def show(self, index=None):
+        page = self.tabs.currentWidget()
+        path = self.pages.pop(page, None)
+        if path is None:
+            return
+
+        start = time.perf_counter()
+        self.build(page, path)
+        page.dashboard_path = None
+        seconds = time.perf_counter() - start
+
+        self.built += 1
+        self.seconds += seconds
+        logger.debug("Built dashboard %s in %.1f ms", path, 1e3 * seconds)
+
+
+def subscribed_widgets(page):
+    """
+    Returns:
+        list: Widgets within ``page`` which update from a received signal.
+        Transmitting widgets are excluded since they also drive cyclic sends.
+    """
+    import epyqlib.widgets.abstractwidget
+
+    return [
+        widget
+        for widget in page.findChildren(
+            epyqlib.widgets.abstractwidget.AbstractWidget,
+        )
+        if widget.signal_object is not None and not getattr(widget, "tx", False)
+    ]
+
+
+@attr.s
+class TabSubscriptions:
+    """
+    Args:
+        tabs (QTabWidget): The device tabs, usually ``device.ui.tabs``.
+        find_widgets (callable): Returns the widgets to manage for a tab page.
+        scheduler (epyq.updatescheduler.UpdateScheduler, optional): Adopts
+        all managed widgets so their updates are rate limited.
+        visible (bool): See :meth:`set_visible`.
+
+    Pages of :class:`DeferredDashboards` are searched for widgets once they
+    have been built.
+    """
+
+    tabs = attr.ib()
+    find_widgets = attr.ib(default=subscribed_widgets)
+    scheduler = attr.ib(default=None)
+    visible = attr.ib(default=True)
+    _widgets = attr.ib(factory=dict, init=False)
+    _paused = attr.ib(factory=dict, init=False)
+
+    def __attrs_post_init__(self):
+        for index in range(self.tabs.count()):
+            self._page_widgets(self.tabs.widget(index))
+
+        self.tabs.currentChanged.connect(self.update)
+        self.update()
+
+    def set_visible(self, visible):
+        """
+        Args:
+            visible (bool): Whether the device itself is shown.  All tabs are
+            paused while it is not.
+        """
+        self.visible = visible
+        self.update()
+
+    def update(self, index=None):
+        current = self.tabs.currentWidget() if self.visible else None
+
+        for index in range(self.tabs.count()):
+            page = self.tabs.widget(index)
+            if page is current:
+                # adopt the widgets of a dashboard built as it was shown
+                self._page_widgets(page)
+                self._resume(page)
+            else:
+                self._pause(page)
+
+    def paused_count(self):
+        return sum(len(paused) for paused in self._paused.values())
+
+    def close(self):
+        """
+        Reconnect all widgets directly to their signals.
+        """
+        for page in list(self._paused):
+            self._resume(page)
+
+        if self.scheduler is not None:
+            for widgets in self._widgets.values():
+                for widget in widgets:
+                    if widget.signal_object is None:
+                        continue
+
+                    try:
+                        self.scheduler.release(widget, widget.signal_object)
+                    except TypeError:
+                        self.scheduler.forget(widget)
+
+        self._widgets.clear()
+
+    def _page_widgets(self, page):
+        widgets = self._widgets.get(page)
+        if widgets is None:
+            if pending(page):
+                return []
+
+            widgets = self.find_widgets(page)
+            self._widgets[page] = widgets
+
+            if self.scheduler is not None:
+                for widget in widgets:
+                    self.scheduler.adopt(widget)
+
+        return widgets
+
+    def _slot(self, widget):
+        if self.scheduler is None:
+            return widget.meta_set_value
+
+        return self.scheduler.slot(widget)
+
+    def _pause(self, page):
+        if page in self._paused or pending(page):
+            return
+
+        paused = []
+        for widget in self._page_widgets(page):
+            signal = widget.signal_object
+            if signal is None:
+                continue
+
+            try:
+                signal.value_changed.disconnect(self._slot(widget))
+            except TypeError:
+                continue
+
+            if self.scheduler is not None:
+                self.scheduler.discard(widget)
+
+            paused.append((widget, signal))
+
+        self._paused[page] = paused
+
+    def _resume(self, page):
+        for widget, signal in self._paused.pop(page, []):
+            if widget.signal_object is not signal:
+                # The widget was given another signal while paused
+                continue
+
+            signal.value_changed.connect(self._slot(widget))
+
+            value = signal.scaled_value
+            if value is None:
+                value = 0
+            widget.meta_set_value(value)
+
+
+def deferrable(uis):
+    """
+    Returns:
+        dict: The ``ui_paths`` entries after the first which can be built on
+        demand, none unless every entry is a plain ``.ui`` file shown as a
+        tab.
+    """
+    if not all(
+        isinstance(value, str) and value.endswith(".ui") for value in uis.values()
+    ):
+        return {}
+
+    return dict(list(uis.items())[1:])
+
+
+def wire(device, dash, edit_actions=None):
+    """
+    Connect the widgets of a dashboard built after ``device`` loaded, as
+    :meth:`epyqlib.device.Device._init_from_parameters` does while loading.
+
+    Returns:
+        set: Descriptions of widgets whose signal was not found.
+    """
+    # TODO: CAMPid 99457281212789437474299
+    import epyqlib.canneo
+    import epyqlib.device
+    import epyqlib.nv
+    import epyqlib.twisted.loopingset
+    import epyqlib.widgets.abstractwidget
+
+    missing = set()
+    dash.connected_frames = set()
+
+    for widget in dash.findChildren(epyqlib.widgets.abstractwidget.AbstractWidget):
+        # TODO: CAMPid 07340793413419714301373147
+        widget.set_range(min=0, max=100)
+        try:
+            widget.set_value(math.nan)
+        except ValueError:
+            widget.set_value(0)
+
+        frame = widget.property("frame")
+        if frame is not None:
+            signal_path = (frame, widget.property("signal"))
+        else:
+            signal_path = tuple(e for e in widget._signal_path if len(e) > 0)
+
+        try:
+            signal = device.neo_frames.signal_by_path(*signal_path)
+        except epyqlib.canneo.NotFoundError:
+            if not widget.ignore:
+                widget_path = []
+                parent = widget
+                while parent is not dash:
+                    widget_path.insert(0, parent.objectName())
+                    parent = parent.parent()
+
+                missing.add(
+                    "{}:/{} - {}".format(
+                        getattr(dash, "file_name", "<builtin>"),
+                        "/".join(widget_path),
+                        ":".join(signal_path)
+                        if len(signal_path) > 0
+                        else "<none specified>",
+                    )
+                )
+        else:
+            tx = getattr(widget, "tx", False)
+
+            # TODO: CAMPid 079320743340327834208
+            if (
+                device.nvs is not None
+                and signal.frame.id == device.nvs.set_frames[0].id
+            ):
+                nv_signal = device.widget_nvs.neo.signal_by_path(*signal_path)
+                device.widget_nv_frames[nv_signal.frame].append(nv_signal)
+
+                if nv_signal.multiplex not in device.nv_looping_reads:
+
+                    def read(nv_signal=nv_signal, read=device.nvs.protocol.read):
+                        d = read(
+                            nv_signal=nv_signal,
+                            meta=epyqlib.nv.MetaEnum.value,
+                        )
+                        d.addErrback(epyqlib.device.ignore_timeout)
+
+                        return d
+
+                    device.nv_looping_reads[nv_signal.multiplex] = read
+
+                device.nv_looping_set.add_request(
+                    key=widget,
+                    request=epyqlib.twisted.loopingset.Request(
+                        f=device.nv_looping_reads[nv_signal.multiplex],
+                        period=1,
+                    ),
+                )
+
+                if tx:
+                    frame = device.nvs.set_frames[0]
+                else:
+                    frame = device.nvs.status_frames[0]
+                signal = device.widget_nvs.neo.signal_by_path(
+                    frame.name, *signal_path[1:]
+                )
+
+            dash.connected_frames.add(signal.frame)
+            device.dash_connected_signals.add(signal)
+            widget.set_signal(signal)
+
+            if tx and hasattr(device, "first_nv_view"):
+                check_box = device.first_nv_view.ui.enforce_range_limits_check_box
+                check_box.stateChanged.connect(widget.set_check_range)
+                widget.set_check_range(check_box.checkState())
+
+        if edit_actions is not None:
+            # TODO: CAMPid 97453289314763416967675427
+            if widget.property("editable"):
+                for action in edit_actions:
+                    if action[1](widget):
+                        action[0](dash=dash, widget=widget, signal=widget.edit)
+                        break
+
+    if len(missing) > 0:
+        device.dash_missing_signals |= missing
+        logger.error(
+            "\n === Signals referenced by a widget but not defined\n%s",
+            "\n".join(sorted(missing)),
+        )
+
+    return missing
+
+
+def build(device, page, path, edit_actions=None):
+    """
+    Load the dashboard at ``path`` into the placeholder ``page`` of
+    ``device`` and connect its widgets.
+    """
+    uis = {"dash": path}
+    device.traverse(uis)
+    dash = uis["dash"]
+
+    page.layout().addWidget(dash)
+    wire(device=device, dash=dash, edit_actions=edit_actions)
+
+
+def install():
+    """
+    Have :class:`epyqlib.device.Device` build all but the first of its
+    ``ui_paths`` dashboards when their tab is first shown.  The device's
+    ``deferred_dashboards`` is the :class:`DeferredDashboards` doing so.
+    """
+    import functools
+
+    import epyqlib.device
+    from PyQt5 import QtWidgets
+
+    global _original_init_from_parameters
+
+    if _original_init_from_parameters is None:
+        _original_init_from_parameters = epyqlib.device.Device._init_from_parameters
+
+    def _init_from_parameters(self, uis, *args, edit_actions=None, **kwargs):
+        order = list(uis)
+        deferred = deferrable(uis)
+        for name in deferred:
+            del uis[name]
+
+        _original_init_from_parameters(
+            self, uis, *args, edit_actions=edit_actions, **kwargs
+        )
+
+        self.deferred_dashboards = DeferredDashboards(
+            tabs=self.ui.tabs,
+            build=functools.partial(build, self, edit_actions=edit_actions),
+        )
+        if len(deferred) == 0:
+            return
+
+        # the first dashboard is in the tabs unless dashboards are disabled
+        first = self.ui.tabs.indexOf(next(iter(uis.values())))
+
+        placeholders = {}
+        for name, path in deferred.items():
+            page = QtWidgets.QWidget()
+            layout = QtWidgets.QVBoxLayout(page)
+            layout.setContentsMargins(0, 0, 0, 0)
+            self.deferred_dashboards.add(page, path)
+            placeholders[name] = page
+
+        loaded = dict(uis)
+        uis.clear()
+        uis.update({name: placeholders.get(name, loaded.get(name)) for name in order})
+
+        if first != -1:
+            for index, name in enumerate(order):
+                if name in placeholders:
+                    self.ui.tabs.insertTab(first + index, placeholders[name], name)
+
+    epyqlib.device.Device._init_from_parameters = _init_from_parameters
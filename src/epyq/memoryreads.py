@@ -0,0 +1,293 @@
+"""
+Coalesced reads of firmware RAM variables for the variables tab.  Reading a
+variable there through
+:meth:`epyqlib.variableselectionmodel.VariableModel.read` connects, uploads
+its bytes and disconnects, once per variable.  :func:`plan` instead merges
+the address ranges of the watched variables into as few contiguous blocks
+as a maximum chunk and gap size allow.  Each block is uploaded once and its
+bytes are fanned back out to every variable it covers, through an update of
+the chunked memory cache in the variables tab.
+
+Addresses and sizes are in the target's addressable units, 16 bit words on
+the C2000 processors, as they are in :mod:`epyqlib.cmemoryparser`.
+"""
+
+import logging
+import time
+
+import attr
+
+import epyq.metrics
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+logger = logging.getLogger(__name__)
+
+default_max_chunk = 128
+default_max_gap = 8
+# as epyqlib.variableselectionmodel.VariableModel connects for its reads
+default_station_address = 0
+
+
+@attr.s(frozen=True)
+class Span:
+    """
+    Args:
+        address (int): First addressable unit.
+        size (int): Addressable units.
+    """
+
+    address = attr.ib()
+    size = attr.ib()
+
+    @property
+    def end(self):
+        return self.address + self.size
+
+
+@attr.s
+class Block:
+    """
+    A contiguous range read at once and the spans it covers.
+    """
+
+    address = attr.ib()
+    size = attr.ib()
+    spans = attr.ib(factory=list)
+
+    @property
+    def end(self):
+        return self.address + self.size
+
+    def octets(self, bits_per_byte=8):
+        return self.size * (bits_per_byte // 8)
+
+    def slice(self, span, bits_per_byte=8):
+        """
+        Returns:
+            slice: The bytes of ``span`` within the bytes of the block.
+        """
+        octets = bits_per_byte // 8
+        start = (span.address - self.address) * octets
+
+        return slice(start, start + span.size * octets)
+
+
+def plan(spans, max_chunk=default_max_chunk, max_gap=default_max_gap):
+    """
+    Merge spans into the fewest blocks, in address order, that are no
+    larger than ``max_chunk`` and skip no more than ``max_gap`` unselected
+    addressable units between spans.  Overlapping spans share a block and a
+    span larger than ``max_chunk`` gets a block of its own.
+
+    Args:
+        spans (iterable): :class:`Span`.
+        max_chunk (int): Most addressable units in a block.
+        max_gap (int): Most addressable units read only to join two spans.
+
+    Returns:
+        list: :class:`Block`.
+    """
+    blocks = []
+
+    for span in sorted(spans, key=lambda span: (span.address, span.size)):
+        if span.size <= 0:
+            continue
+
+        if len(blocks) > 0:
+            block = blocks[-1]
+            end = max(block.end, span.end)
+            if span.address - block.end <= max_gap and (
+                end == block.end or end - block.address <= max_chunk
+            ):
+                block.size = end - block.address
+                block.spans.append(span)
+                continue
+
+        blocks.append(Block(address=span.address, size=span.size, spans=[span]))
+
+    return blocks
+
+
+@attr.s
+class Statistics:
+    """
+    Args:
+        reads (int): Blocks read.
+        variables (int): Spans fanned out from the blocks.
+        bytes (int): Bytes read.
+        seconds (float): Time spent waiting for blocks.
+        refreshes (epyq.metrics.Timing): Time from the first block requested
+        to the last fanned out, per refresh.
+    """
+
+    reads = attr.ib(default=0)
+    variables = attr.ib(default=0)
+    bytes = attr.ib(default=0)
+    seconds = attr.ib(default=0.0)
+    refreshes = attr.ib(factory=epyq.metrics.Timing)
+
+    def bytes_per_second(self):
+        if self.seconds <= 0:
+            return 0.0
+
+        return self.bytes / self.seconds
+
+    def read(self, octets, seconds):
+        self.reads += 1
+        self.bytes += octets
+        self.seconds += seconds
+
+    def to_dict(self):
+        return {
+            "reads": self.reads,
+            "variables": self.variables,
+            "bytes": self.bytes,
+            "bytes_per_second": self.bytes_per_second(),
+            "refresh": self.refreshes.to_dict(),
+        }
+
+    def summary(self):
+        mean = self.refreshes.mean()
+
+        return (
+            "{reads} reads for {variables} variables, {bytes} bytes"
+            " ({rate:.0f} bytes/s), {count} refreshes ({latency} ms mean)"
+        ).format(
+            rate=self.bytes_per_second(),
+            count=self.refreshes.count,
+            latency="-" if mean is None else "{:.1f}".format(1e3 * mean),
+            reads=self.reads,
+            variables=self.variables,
+            bytes=self.bytes,
+        )
+
+
+statistics = Statistics()
+
+
+def node_span(node):
+    """
+    Returns:
+        Span: The memory of a :class:`epyqlib.variableselectionmodel.Variable`.
+    """
+    return Span(address=int(node.fields.address, 16), size=node.fields.size)
+
+
+def watched(model):
+    """
+    Returns:
+        list: The checked nodes of a
+        :class:`epyqlib.variableselectionmodel.VariableModel`, as its
+        :meth:`create_cache` selects them.
+    """
+    from PyQt5.QtCore import Qt
+
+    nodes = []
+
+    def append_checked(node, nodes):
+        if node is not model.root and node.checked() == Qt.Checked:
+            nodes.append(node)
+
+    model.root.traverse(call_this=append_checked, payload=nodes, internal_nodes=True)
+
+    return nodes
+
+
+def read_nodes(
+    model,
+    nodes,
+    max_chunk=default_max_chunk,
+    max_gap=default_max_gap,
+    station_address=default_station_address,
+    statistics=statistics,
+    clock=time.monotonic,
+):
+    """
+    Read variables of the variables tab in coalesced blocks over its CCP
+    protocol within one connection.  The blocks are applied as updates to
+    the model's chunked memory cache which hands each variable its bytes.
+
+    Args:
+        model (epyqlib.variableselectionmodel.VariableModel): With a binary
+        loaded.
+        nodes (iterable): The variable nodes to read.
+        max_chunk (int): See :func:`plan`.
+        max_gap (int): See :func:`plan`.
+        station_address (int): The CCP station connected to.
+
+    Returns:
+        twisted.internet.defer.Deferred: Fires with the blocks read.
+    """
+    import epyqlib.twisted.cancalibrationprotocol as ccp
+    import twisted.internet.defer
+
+    blocks = plan(
+        spans=[node_span(node) for node in nodes],
+        max_chunk=max_chunk,
+        max_gap=max_gap,
+    )
+
+    @twisted.internet.defer.inlineCallbacks
+    def read():
+        start = clock()
+
+        yield model.protocol.connect(station_address=station_address)
+        try:
+            for block in blocks:
+                requested = clock()
+                data = yield model.protocol.upload_block(
+                    address_extension=ccp.AddressExtension.raw,
+                    address=block.address,
+                    octets=block.octets(model.bits_per_byte),
+                )
+                statistics.read(len(data), clock() - requested)
+
+                model.cache.update(
+                    update_chunk=model.cache.new_chunk(
+                        address=block.address, bytes=data
+                    )
+                )
+                statistics.variables += len(block.spans)
+        finally:
+            yield model.protocol.disconnect()
+
+        statistics.refreshes.add(clock() - start)
+        logger.debug("Variables read: %s", statistics.summary())
+
+        return blocks
+
+    return read()
+
+
+def install(
+    max_chunk=default_max_chunk,
+    max_gap=default_max_gap,
+    station_address=default_station_address,
+):
+    """
+    Have a read in the variables tab refresh the variable along with every
+    watched variable in coalesced blocks.
+
+    Args:
+        max_chunk (int): See :func:`plan`.
+        max_gap (int): See :func:`plan`.
+        station_address (int): See :func:`read_nodes`.
+    """
+    import epyqlib.utils.twisted
+    import epyqlib.variableselectionmodel
+
+    def read(self, variable):
+        d = read_nodes(
+            model=self,
+            nodes=[variable, *watched(self)],
+            max_chunk=max_chunk,
+            max_gap=max_gap,
+            station_address=station_address,
+        )
+        d.addErrback(epyqlib.utils.twisted.errbackhook)
+
+    epyqlib.variableselectionmodel.VariableModel.read = read
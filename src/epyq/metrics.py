@@ -0,0 +1,593 @@
+"""
+Runtime metrics of the receive pipeline from each bus to the device widgets.
+
+Probes are inserted where frames change hands so that the cost of each stage
+can be told apart while the application runs:
+
+- frames received and transmitted on each bus, counted in the notifier
+  thread as the bus notifier proxies fan them out,
+- the time the python-can notifier thread spends in its callbacks,
+- the time each device takes to decode a frame, and its widgets to update
+  when they are not rate limited, in the Qt thread,
+- the frames queued between those two threads and not yet decoded,
+- the widget updates applied per second,
+- the values handed off by bus receive threads when decoding there, and
+- the coalesced memory reads of the variables tab.
+
+:class:`Metrics` installs the probes on the bus and device nodes of a
+device tree, samples rates from them and renders everything as a JSON
+compatible dict.
+"""
+
+import collections
+import json
+import time
+
+import attr
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+@attr.s
+class Timing:
+    count = attr.ib(default=0)
+    total = attr.ib(default=0.0)
+    maximum = attr.ib(default=0.0)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def mean(self):
+        if self.count == 0:
+            return None
+
+        return self.total / self.count
+
+    def to_dict(self):
+        mean = self.mean()
+
+        return {
+            "count": self.count,
+            "mean_us": None if mean is None else 1e6 * mean,
+            "max_us": 1e6 * self.maximum,
+        }
+
+
+class Probe:
+    """
+    A listener for a :class:`epyqlib.busproxy.NotifierProxy` that counts
+    frames in the emitting thread.  It stands in for the Qt signal of a
+    regular listener so no event is posted per frame.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.message_received_signal = self
+
+    def emit(self, message):
+        self.count += 1
+
+
+class TimedCallback:
+    """
+    Wraps a :class:`can.Notifier` listener, timing each call.
+    """
+
+    def __init__(self, wrapped, timing):
+        self.wrapped = wrapped
+        self.timing = timing
+
+    def __call__(self, message):
+        start = time.perf_counter()
+        try:
+            return self.wrapped(message)
+        finally:
+            self.timing.add(time.perf_counter() - start)
+
+
+def innermost(listener):
+    """
+    Returns:
+        The listener inside any :class:`ListenerWrapper` layers.
+    """
+    while isinstance(listener, ListenerWrapper):
+        listener = listener.wrapped
+
+    return listener
+
+
+class ListenerWrapper:
+    """
+    Base for wrappers of a :class:`epyqlib.busproxy.NotifierProxy` listener.
+    A wrapper compares and hashes equal to the listener it ultimately wraps
+    so the owner can still discard that listener from the notifier.
+    """
+
+    def __init__(self, wrapped):
+        self.wrapped = wrapped
+        self.message_received_signal = self
+
+    def emit(self, message):
+        self.wrapped.message_received_signal.emit(message)
+
+    def __eq__(self, other):
+        return innermost(self) is innermost(other)
+
+    def __hash__(self):
+        return hash(innermost(self))
+
+
+def find_listener(listeners, listener):
+    """
+    Returns:
+        The member of ``listeners``, possibly a wrapper, equal to
+        ``listener`` or None.
+    """
+    for member in listeners:
+        if member == listener:
+            return member
+
+    return None
+
+
+def replace_listener(listeners, old, new):
+    """
+    Replace ``old`` with ``new`` if ``old`` itself, not just an equal
+    wrapper, is in ``listeners``.
+
+    Returns:
+        bool: Whether the listener was replaced.
+    """
+    if find_listener(listeners, old) is not old:
+        return False
+
+    listeners.discard(old)
+    listeners.add(new)
+
+    return True
+
+
+class TimedListener(ListenerWrapper):
+    """
+    Wraps a listener that handles frames in the Qt thread, timing each frame
+    by arbitration ID.
+    """
+
+    def __init__(self, wrapped):
+        super().__init__(wrapped)
+        self.timing = Timing()
+        self.by_id = collections.defaultdict(Timing)
+
+    def emit(self, message):
+        start = time.perf_counter()
+        try:
+            self.wrapped.message_received_signal.emit(message)
+        finally:
+            seconds = time.perf_counter() - start
+            self.timing.add(seconds)
+            self.by_id[message.arbitration_id].add(seconds)
+
+
+def _format(value, unit="", digits=1):
+    if value is None:
+        return "-"
+
+    return "{:.{}f}{}".format(value, digits, unit)
+
+
+def _format_timing(timing):
+    return "{} mean, {} max".format(
+        _format(timing["mean_us"], " us"),
+        _format(timing["max_us"], " us"),
+    )
+
+
+def sections(metrics):
+    """
+    Arrange the output of :meth:`Metrics.to_dict` for display.
+
+    Returns:
+        list: ``(title, rows)`` pairs with rows of ``(label, text)`` pairs.
+    """
+    result = []
+
+    for bus in metrics["buses"]:
+        result.append(
+            (
+                "Bus: {}".format(bus["name"]),
+                [
+                    (
+                        "Received",
+                        "{} ({} /s)".format(
+                            bus["received"],
+                            _format(bus["received_per_second"], digits=0),
+                        ),
+                    ),
+                    (
+                        "Transmitted",
+                        "{} ({} /s)".format(
+                            bus["transmitted"],
+                            _format(bus["transmitted_per_second"], digits=0),
+                        ),
+                    ),
+                    ("Notifier callback", _format_timing(bus["notifier_callback"])),
+                ],
+            )
+        )
+
+    for device in metrics["devices"]:
+        rows = [("Pending frames", _format(device["pending"], digits=0))]
+        decode = device.get("decode")
+        if decode is not None:
+            rows.append(("Decode", _format_timing(decode)))
+
+            by_id = device["decode_by_id"]
+            if len(by_id) > 0:
+                id, timing = max(by_id.items(), key=lambda item: item[1]["max_us"])
+                rows.append(
+                    ("Slowest decode", "{}: {}".format(id, _format_timing(timing)))
+                )
+
+        result.append(("Device: {}".format(device["name"]), rows))
+
+    widgets = metrics["widgets"]
+    if widgets is None:
+        rows = [("Updates", "not rate limited")]
+    else:
+        rows = [
+            ("Updates per second", _format(widgets["applied_per_second"], digits=0)),
+            ("Applied", str(widgets["applied"])),
+            ("Coalesced", str(widgets["coalesced"])),
+            ("Dropped", str(widgets["dropped"])),
+        ]
+    result.append(("Widgets", rows))
+
+    bus_threads = metrics.get("bus_threads")
+    if bus_threads is not None:
+        rows = [
+            (
+                "Queue depth",
+                "{} of {}".format(bus_threads["depth"], bus_threads["capacity"]),
+            ),
+            ("Applied", str(bus_threads["applied"])),
+            ("Largest batch", str(bus_threads["largest_batch"])),
+            ("Coalesced", str(bus_threads["coalesced"])),
+            ("Dropped on overflow", str(bus_threads["dropped"])),
+        ]
+        for bus in bus_threads["buses"]:
+            rows.append(
+                (
+                    "Decode on {}".format(bus["name"]),
+                    "{} frames, {}".format(
+                        bus["decoded"], _format_timing(bus["decode"])
+                    ),
+                )
+            )
+        result.append(("Bus threads", rows))
+
+    event_loop = metrics.get("event_loop")
+    if event_loop is not None:
+        lag = event_loop["lag"]
+        total = sum(lag["buckets"].values())
+        rows = [
+            (
+                "Stalls over {}".format(_format(event_loop["threshold"], " s", 2)),
+                str(event_loop["stalls"]),
+            ),
+            ("Maximum lag", _format(lag["max_ms"], " ms")),
+        ]
+        for label, count in lag["buckets"].items():
+            share = 100 * count / total if total > 0 else 0
+            rows.append(("Lag {}".format(label), "{} ({:.1f}%)".format(count, share)))
+        result.append(("Event loop", rows))
+
+    memory_reads = metrics.get("memory_reads")
+    if memory_reads is not None:
+        refresh = memory_reads["refresh"]
+        rows = [
+            (
+                "Reads",
+                "{} for {} variables".format(
+                    memory_reads["reads"], memory_reads["variables"]
+                ),
+            ),
+            (
+                "Bytes per second",
+                _format(memory_reads["bytes_per_second"], digits=0),
+            ),
+            (
+                "Refresh latency",
+                "{} mean, {} max".format(
+                    _format(
+                        None
+                        if refresh["mean_us"] is None
+                        else refresh["mean_us"] / 1e3,
+                        " ms",
+                    ),
+                    _format(refresh["max_us"] / 1e3, " ms"),
+                ),
+            ),
+        ]
+        result.append(("Variable reads", rows))
+
+    return result
+
+
+@attr.s
+class Rate:
+    """
+    Change per second of a counter between samples.
+    """
+
+    clock = attr.ib(default=time.monotonic)
+    value = attr.ib(default=None)
+    _last = attr.ib(default=None, init=False)
+
+    def sample(self, count):
+        now = self.clock()
+        if self._last is not None:
+            last_time, last_count = self._last
+            if now > last_time:
+                self.value = (count - last_count) / (now - last_time)
+        self._last = (now, count)
+
+        return self.value
+
+
+@attr.s
+class DeviceMetrics:
+    """
+    Args:
+        device (epyqlib.device.Device): The device whose decoding is timed.
+        posted (callable): Returns the frames posted to the device so far.
+    """
+
+    device = attr.ib()
+    posted = attr.ib()
+    listener = attr.ib(default=None)
+    _posted_offset = attr.ib(default=0, init=False)
+
+    def install(self):
+        neo = self.device.neo_frames
+        listeners = self.device.bus.notifier.listeners
+        existing = find_listener(listeners, neo)
+        if neo is None or existing is None:
+            return
+
+        self.listener = TimedListener(existing)
+        replace_listener(listeners, existing, self.listener)
+        self._posted_offset = self.posted()
+
+    def uninstall(self):
+        if self.listener is None:
+            return
+
+        bus = self.device.bus
+        if bus is not None:
+            replace_listener(
+                bus.notifier.listeners, self.listener, self.listener.wrapped
+            )
+        self.listener = None
+
+    def pending(self):
+        """
+        Returns:
+            int: Frames posted to the Qt thread for the device but not yet
+            decoded.
+        """
+        if self.listener is None:
+            return None
+
+        posted = self.posted() - self._posted_offset
+        return max(0, posted - self.listener.timing.count)
+
+    def to_dict(self):
+        result = {"name": self.device.name, "pending": self.pending()}
+
+        if self.listener is not None:
+            result["decode"] = self.listener.timing.to_dict()
+            result["decode_by_id"] = {
+                "0x{:08X}".format(id): timing.to_dict()
+                for id, timing in sorted(self.listener.by_id.items())
+            }
+
+        return result
+
+
+@attr.s
+class BusMetrics:
+    """
+    Args:
+        name (str): The bus node name.
+        proxy (epyqlib.busproxy.BusProxy): The bus node's proxy.
+    """
+
+    name = attr.ib()
+    proxy = attr.ib()
+    clock = attr.ib(default=time.monotonic)
+    received = attr.ib(factory=Probe)
+    transmitted = attr.ib(factory=Probe)
+    callback = attr.ib(factory=Timing)
+    received_rate = attr.ib(default=None)
+    transmitted_rate = attr.ib(default=None)
+    _notifier = attr.ib(default=None, init=False)
+
+    def __attrs_post_init__(self):
+        self.received_rate = Rate(clock=self.clock)
+        self.transmitted_rate = Rate(clock=self.clock)
+
+    def install(self):
+        self.proxy.notifier.add(self.received)
+        self.proxy.tx_notifier.add(self.transmitted)
+        self.refresh()
+
+    def uninstall(self):
+        self.proxy.notifier.discard(self.received)
+        self.proxy.tx_notifier.discard(self.transmitted)
+        self._unwrap()
+
+    def refresh(self):
+        """
+        Time the callbacks of the current python-can notifier, which is
+        replaced each time the bus is connected.
+        """
+        notifier = getattr(self.proxy, "real_notifier", None)
+        if notifier is self._notifier:
+            return
+
+        self._unwrap()
+        self._notifier = notifier
+        if notifier is not None:
+            notifier.listeners[:] = [
+                TimedCallback(wrapped=listener, timing=self.callback)
+                for listener in notifier.listeners
+            ]
+
+    def _unwrap(self):
+        if self._notifier is not None:
+            self._notifier.listeners[:] = [
+                listener.wrapped if isinstance(listener, TimedCallback) else listener
+                for listener in self._notifier.listeners
+            ]
+        self._notifier = None
+
+    def sample(self):
+        self.refresh()
+        self.received_rate.sample(self.received.count)
+        self.transmitted_rate.sample(self.transmitted.count)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "received": self.received.count,
+            "transmitted": self.transmitted.count,
+            "received_per_second": self.received_rate.value,
+            "transmitted_per_second": self.transmitted_rate.value,
+            "notifier_callback": self.callback.to_dict(),
+        }
+
+
+@attr.s
+class Metrics:
+    """
+    Args:
+        model (epyqlib.devicetree.Model): Bus nodes are the children of its
+        root and device nodes are their children.
+        scheduler (epyq.updatescheduler.UpdateScheduler, optional): The
+        source of the widget update statistics.
+        stall_detector (epyq.stalls.StallDetector, optional): The source of
+        the event loop lag histogram.
+        dispatcher (epyq.busthreads.Dispatcher, optional): The source of the
+        bus thread hand-off statistics.
+        memory_reads (epyq.memoryreads.Statistics, optional): The source of
+        the variables tab read statistics.
+        clock (callable): Returns the current time in seconds.
+    """
+
+    model = attr.ib()
+    scheduler = attr.ib(default=None)
+    stall_detector = attr.ib(default=None)
+    dispatcher = attr.ib(default=None)
+    memory_reads = attr.ib(default=None)
+    clock = attr.ib(default=time.monotonic)
+    buses = attr.ib(factory=dict)
+    devices = attr.ib(factory=dict)
+    widget_rate = attr.ib(default=None)
+    started = attr.ib(default=None)
+
+    def __attrs_post_init__(self):
+        self.widget_rate = Rate(clock=self.clock)
+
+    def start(self):
+        self.started = self.clock()
+        self.sample()
+
+    def stop(self):
+        for device in self.devices.values():
+            device.uninstall()
+        for bus in self.buses.values():
+            bus.uninstall()
+
+        self.devices = {}
+        self.buses = {}
+        self.started = None
+
+    def sample(self):
+        """
+        Pick up added and removed buses and devices and update the rates.
+        """
+        bus_nodes = {node.bus: node for node in self.model.root.children}
+
+        for proxy in set(self.buses) - set(bus_nodes):
+            self.buses.pop(proxy).uninstall()
+
+        devices = {}
+        for proxy, node in bus_nodes.items():
+            bus = self.buses.get(proxy)
+            if bus is None:
+                bus = BusMetrics(name=node.fields.name, proxy=proxy, clock=self.clock)
+                bus.install()
+                self.buses[proxy] = bus
+
+            bus.sample()
+
+            for child in node.children:
+                devices[child.device] = bus
+
+        for device in set(self.devices) - set(devices):
+            self.devices.pop(device).uninstall()
+
+        for device, bus in devices.items():
+            if device not in self.devices and device.bus is not None:
+                metrics = DeviceMetrics(
+                    device=device,
+                    posted=lambda probe=bus.received: probe.count,
+                )
+                metrics.install()
+                self.devices[device] = metrics
+
+        if self.scheduler is not None:
+            self.widget_rate.sample(self.scheduler.statistics.applied)
+
+    def to_dict(self):
+        widgets = None
+        if self.scheduler is not None:
+            widgets = attr.asdict(self.scheduler.statistics)
+            widgets["applied_per_second"] = self.widget_rate.value
+
+        seconds = None
+        if self.started is not None:
+            seconds = self.clock() - self.started
+
+        event_loop = None
+        if self.stall_detector is not None:
+            event_loop = self.stall_detector.to_dict()
+
+        bus_threads = None
+        if self.dispatcher is not None:
+            bus_threads = self.dispatcher.to_dict()
+
+        memory_reads = None
+        if self.memory_reads is not None:
+            memory_reads = self.memory_reads.to_dict()
+
+        return {
+            "time": time.time(),
+            "seconds": seconds,
+            "buses": [bus.to_dict() for bus in self.buses.values()],
+            "devices": [device.to_dict() for device in self.devices.values()],
+            "widgets": widgets,
+            "bus_threads": bus_threads,
+            "event_loop": event_loop,
+            "memory_reads": memory_reads,
+        }
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+            f.write("\n")
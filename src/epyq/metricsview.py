@@ -0,0 +1,64 @@
+"""
+Dockable "Performance" window showing :class:`epyq.metrics.Metrics`.
+"""
+
+from PyQt5 import QtWidgets
+
+import epyq.metrics
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+class MetricsDock(QtWidgets.QDockWidget):
+    """
+    Args:
+        metrics (epyq.metrics.Metrics): Sampled by the owner and displayed
+        each time :meth:`refresh` is called.
+        dump (callable): Called when the dump button is clicked.
+    """
+
+    def __init__(self, metrics, dump, parent=None):
+        super().__init__("Performance", parent)
+        self.setObjectName("performance_dock")
+
+        self.metrics = metrics
+
+        widget = QtWidgets.QWidget()
+        layout = QtWidgets.QVBoxLayout(widget)
+
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setColumnCount(2)
+        self.tree.setHeaderLabels(["Metric", "Value"])
+        self.tree.setRootIsDecorated(False)
+        layout.addWidget(self.tree)
+
+        self.dump_button = QtWidgets.QPushButton("Dump JSON...")
+        self.dump_button.clicked.connect(dump)
+        layout.addWidget(self.dump_button)
+
+        self.setWidget(widget)
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+
+        sections = epyq.metrics.sections(self.metrics.to_dict())
+
+        self.tree.setUpdatesEnabled(False)
+        try:
+            self.tree.clear()
+            for title, rows in sections:
+                section = QtWidgets.QTreeWidgetItem(self.tree, [title])
+                section.setFirstColumnSpanned(True)
+                font = section.font(0)
+                font.setBold(True)
+                section.setFont(0, font)
+
+                for label, text in rows:
+                    QtWidgets.QTreeWidgetItem(self.tree, ["    " + label, text])
+
+            self.tree.resizeColumnToContents(0)
+        finally:
+            self.tree.setUpdatesEnabled(True)
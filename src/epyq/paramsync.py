@@ -0,0 +1,315 @@
+"""
+Incremental parameter writes.  A :class:`Snapshot` remembers the raw
+parameter values last read from, or confirmed written to, one device along
+with when each was seen.  :func:`sync` compares a parameter set such as
+``test.json`` against the snapshot, reads only the parameters it has no
+valid value for and writes only the groups with a changed parameter.
+Unchanged parameters are reported as skipped.
+
+Snapshots persist as JSON in the user cache directory keyed by the CAN
+database content and the bus and node the device is reached through.  That
+does not tell apart two units connected in turn, as on an end of line
+station, so the persisted values are only used when asked for with
+``--snapshot`` or ``--max-age``.  Otherwise each run reads the groups it
+syncs before writing::
+
+    python -m epyq.bulkparams example.sym --channel can0 --sync test.json
+    python -m epyq.bulkparams example.sym --sync test.json --max-age 600
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import time
+
+import appdirs
+import attr
+
+import epyq.bulkparams
+import epyq.symcache
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+logger = logging.getLogger(__name__)
+
+version = 1
+
+
+def default_directory():
+    return pathlib.Path(
+        appdirs.user_cache_dir(appname="EPyQ", appauthor="EPC Power Corp.")
+    ).joinpath("parameters")
+
+
+def snapshot_path(database, interface, channel, request_id, directory=None):
+    """
+    Args:
+        database (str or pathlib.Path): The device's CAN database.
+        interface (str): The python-can interface of the bus.
+        channel (str): The bus channel.
+        request_id (int): Arbitration ID of the device's parameter
+        requests, which includes its node ID.
+        directory (pathlib.Path, optional): Defaults to
+        :func:`default_directory`.
+
+    Returns:
+        pathlib.Path: Where the device's snapshot is kept.
+    """
+    if directory is None:
+        directory = default_directory()
+
+    sha = hashlib.sha256()
+    sha.update(
+        "{}\0{}\0{}\0{}\0{}\0".format(
+            version,
+            epyq.symcache.key(pathlib.Path(database)),
+            interface,
+            channel,
+            request_id,
+        ).encode("utf-8")
+    )
+
+    return pathlib.Path(directory) / (sha.hexdigest() + ".json")
+
+
+@attr.s
+class Entry:
+    """
+    Args:
+        raw (int): The raw value on the device.
+        time (float): When it was read or confirmed, in seconds since the
+        epoch.
+    """
+
+    raw = attr.ib()
+    time = attr.ib()
+
+
+@attr.s
+class Snapshot:
+    """
+    Args:
+        max_age (float, optional): Seconds a value stays valid, forever if
+        None.
+        clock (callable): Wall clock time in seconds since the epoch.
+    """
+
+    max_age = attr.ib(default=None)
+    clock = attr.ib(default=time.time)
+    entries = attr.ib(factory=dict)
+
+    def update(self, raw):
+        """
+        Record raw values just read from or confirmed on the device.
+        """
+        now = self.clock()
+        for name, value in raw.items():
+            self.entries[name] = Entry(raw=value, time=now)
+
+    def invalidate(self, names=None):
+        """
+        Forget the values of ``names``, all if None, such as after a
+        failed write or a device reset.
+        """
+        if names is None:
+            self.entries.clear()
+            return
+
+        for name in names:
+            self.entries.pop(name, None)
+
+    def valid(self):
+        """
+        Returns:
+            dict: Raw values not older than :attr:`max_age` keyed by name.
+        """
+        if self.max_age is None:
+            return {name: entry.raw for name, entry in self.entries.items()}
+
+        oldest = self.clock() - self.max_age
+
+        return {
+            name: entry.raw
+            for name, entry in self.entries.items()
+            if entry.time >= oldest
+        }
+
+    def to_dict(self):
+        return {
+            "version": version,
+            "entries": {
+                name: [entry.raw, entry.time] for name, entry in self.entries.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, d, **kwargs):
+        snapshot = cls(**kwargs)
+        if d.get("version") == version:
+            snapshot.entries = {
+                name: Entry(raw=raw, time=seen)
+                for name, (raw, seen) in d["entries"].items()
+            }
+
+        return snapshot
+
+    @classmethod
+    def load(cls, path, trust=None, **kwargs):
+        """
+        Args:
+            path (pathlib.Path): Where the snapshot was saved.
+            trust (bool, optional): Use the values saved by an earlier
+            process.  The device may have been changed or replaced since,
+            so defaults to only when a ``max_age`` is given.
+
+        Returns:
+            Snapshot: The snapshot at ``path``, empty if there is none, it
+            can not be read or it is not trusted.
+        """
+        if trust is None:
+            trust = kwargs.get("max_age") is not None
+
+        if not trust:
+            return cls(**kwargs)
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                d = json.load(f)
+        except FileNotFoundError:
+            d = {}
+        except Exception as e:
+            logger.debug("Ignoring parameter snapshot %s: %s", path, e)
+            d = {}
+
+        return cls.from_dict(d, **kwargs)
+
+    def save(self, path):
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name("{}.{}.tmp".format(path.name, os.getpid()))
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(temporary, path)
+
+
+@attr.s
+class SyncResult:
+    """
+    Args:
+        total (int): Parameters in the set.
+        skipped (int): Parameters already at the value in the set.
+        read (int): Parameters read because the snapshot had no valid
+        value.
+        written (int): Parameters changed.
+        verified (int): Written parameters read back with the new value.
+        failed (dict): Reasons keyed by parameter name.
+        values (dict): Human values reported by the device for the changed
+        parameters keyed by name.
+        seconds (float): Time the sync took.
+    """
+
+    total = attr.ib(default=0)
+    skipped = attr.ib(default=0)
+    read = attr.ib(default=0)
+    written = attr.ib(default=0)
+    verified = attr.ib(default=0)
+    failed = attr.ib(factory=dict)
+    values = attr.ib(factory=dict)
+    seconds = attr.ib(default=0.0)
+
+    def summary(self):
+        return (
+            "{total} parameters, {skipped} writes skipped, {read} read,"
+            " {written} written, {verified} verified, {failed} failed"
+            " in {seconds:.3f} s"
+        ).format(
+            failed=len(self.failed),
+            **attr.asdict(self, filter=lambda a, v: a.name != "failed"),
+        )
+
+
+def sync(transfer, snapshot, values, verify=False, clock=time.monotonic):
+    """
+    Bring a device's parameters to ``values`` writing only what differs.
+
+    Args:
+        transfer (epyq.bulkparams.Transfer): Access to the device.
+        snapshot (Snapshot): What is known of the device, updated in place.
+        values (dict): Human values, or enumeration labels, keyed by
+        parameter name.
+        verify (bool): Read the changed parameters back after writing.
+        clock (callable): Monotonic time in seconds.
+
+    Returns:
+        SyncResult: What was done.
+
+    Raises:
+        epyq.bulkparams.ParameterError: For names not in any group.
+    """
+    start = clock()
+    parameters = transfer.parameters
+    target = parameters.to_raw(values)
+    result = SyncResult(total=len(target))
+
+    known = snapshot.valid()
+    unknown = [name for name in target if name not in known]
+    if len(unknown) > 0:
+        # groups are read whole so take every value they carry
+        names = [
+            name
+            for group in parameters.groups_for(unknown)
+            for name in group.parameters
+        ]
+        read = transfer.read(names=names)
+        result.read = len(read.raw)
+        snapshot.update(read.raw)
+        snapshot.invalidate(read.failed)
+        for name in unknown:
+            if name in read.failed:
+                result.failed[name] = "unable to read: " + read.failed[name]
+        known = snapshot.valid()
+
+    changed = {
+        name: raw
+        for name, raw in target.items()
+        if name not in result.failed and known.get(name) != raw
+    }
+    result.skipped = len(target) - len(changed) - len(result.failed)
+
+    if len(changed) > 0:
+        written = transfer.write(changed, current=known, human=False)
+        snapshot.invalidate(written.failed)
+        snapshot.update(
+            {
+                name: raw
+                for name, raw in written.raw.items()
+                if name not in written.failed
+            }
+        )
+        result.failed.update(written.failed)
+        result.values.update(written.values)
+        result.written = len(changed) - len(written.failed)
+
+        if verify:
+            names = [name for name in changed if name not in written.failed]
+            check = transfer.read(names=names)
+            snapshot.update(check.raw)
+            snapshot.invalidate(check.failed)
+            for name in names:
+                if name in check.failed:
+                    result.failed[name] = "unable to verify: " + check.failed[name]
+                elif check.raw[name] != changed[name]:
+                    snapshot.invalidate([name])
+                    result.failed[name] = "read back {}".format(check.raw[name])
+                else:
+                    result.verified += 1
+            result.values.update(check.values)
+
+    result.seconds = clock() - start
+
+    return result
@@ -0,0 +1,368 @@
+"""
+Whole run profiling for ``--profile``.  Each mode covers every thread,
+including the Twisted threadpool and the CAN notifier threads, and writes
+its results to an output directory when the application exits.
+
+- ``cprofile``: a :class:`cProfile.Profile` per thread saved as pstats
+  files along with a combined file and a text summary.
+- ``yappi``: yappi's multithreaded profiler saved the same way.
+- ``tracemalloc``: the top allocating lines and tracebacks at exit.
+
+The ``cprofile`` and ``yappi`` modes also sample the stacks of all threads
+into a collapsed stack file for flame graph tools.
+"""
+
+import collections
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+import attr
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+modes = ("cprofile", "yappi", "tracemalloc")
+default_output = "profile"
+sampler_thread_name = "stack sampler"
+
+
+def _file_name(name):
+    return re.sub(r"[^\w.-]+", "_", name).strip("_")
+
+
+def _write_summary(stats, f, lines=40):
+    stats.stream = f
+    stats.sort_stats("cumulative").print_stats(lines)
+
+
+@attr.s
+class StackSampler:
+    """
+    Periodically records the stacks of all other threads.
+
+    Args:
+        interval (float): Seconds between samples.
+    """
+
+    interval = attr.ib(default=0.005)
+    counts = attr.ib(factory=collections.Counter)
+    _stop = attr.ib(factory=threading.Event, init=False)
+    _thread = attr.ib(default=None, init=False)
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run,
+            name=sampler_thread_name,
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    "{} ({}:{})".format(
+                        code.co_name,
+                        os.path.basename(code.co_filename),
+                        code.co_firstlineno,
+                    )
+                )
+                frame = frame.f_back
+
+            stack.append(names.get(ident, str(ident)))
+            self.counts[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def write(self, path):
+        """
+        Write the samples in the collapsed stack format read by
+        ``flamegraph.pl``, speedscope and similar tools.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write("{} {}\n".format(stack, count))
+
+
+@attr.s
+class CProfiler:
+    """
+    Profiles each thread with its own :class:`cProfile.Profile`.  Threads
+    started after :meth:`start` are picked up through
+    :func:`threading.setprofile`.
+
+    A profile can only be disabled by the thread it profiles, so each one
+    times with :meth:`_timer` which removes the profiler from its thread at
+    the thread's first profiled call after :meth:`stop`.  The statistics are
+    taken when stopping so threads still running don't add to them.
+
+    Args:
+        ignore (collection): Names of threads not to profile.
+    """
+
+    ignore = attr.ib(default=(sampler_thread_name,))
+    profiles = attr.ib(factory=dict)
+    stats = attr.ib(factory=dict)
+    _stopping = attr.ib(default=False, init=False)
+    _lock = attr.ib(factory=threading.Lock, init=False)
+
+    def start(self):
+        self._stopping = False
+        threading.setprofile(self._thread_started)
+        self._add()
+
+    def stop(self):
+        threading.setprofile(None)
+        self._stopping = True
+        sys.setprofile(None)
+
+        with self._lock:
+            for name, profile in self.profiles.items():
+                try:
+                    self.stats[name] = pstats.Stats(profile)
+                except TypeError:
+                    # Nothing was recorded in the thread
+                    pass
+
+    def _timer(self):
+        if self._stopping:
+            sys.setprofile(None)
+
+        return time.perf_counter()
+
+    def _thread_started(self, frame, event, arg):
+        if threading.current_thread().name in self.ignore:
+            sys.setprofile(None)
+            return
+
+        # Enabling replaces this function as the thread's profile hook
+        self._add()
+
+    def _add(self):
+        thread = threading.current_thread()
+        profile = cProfile.Profile(self._timer)
+        with self._lock:
+            self.profiles["{}-{}".format(thread.name, thread.ident)] = profile
+        profile.enable()
+
+    def write(self, directory):
+        paths = []
+
+        summary = os.path.join(directory, "cprofile.txt")
+        with open(summary, "w", encoding="utf-8") as f:
+            for name, stats in sorted(self.stats.items()):
+                path = os.path.join(
+                    directory,
+                    "cprofile-{}.pstats".format(_file_name(name)),
+                )
+                stats.dump_stats(path)
+                paths.append(path)
+
+                f.write("==== thread {}\n".format(name))
+                _write_summary(stats, f)
+
+        if len(paths) > 0:
+            combined = os.path.join(directory, "cprofile.pstats")
+            pstats.Stats(*paths).dump_stats(combined)
+            paths.append(combined)
+        paths.append(summary)
+
+        return paths
+
+
+@attr.s
+class YappiProfiler:
+    """
+    Profiles all threads with yappi's wall clock.
+    """
+
+    def start(self):
+        import yappi
+
+        yappi.set_clock_type("wall")
+        # thread names rather than classes so the sampler can be left out
+        yappi.set_context_name_callback(lambda: threading.current_thread().name)
+        yappi.start(builtins=False, profile_threads=True)
+
+    def stop(self):
+        import yappi
+
+        yappi.stop()
+
+    def write(self, directory):
+        import yappi
+
+        paths = []
+        summary = os.path.join(directory, "yappi.txt")
+        with open(summary, "w", encoding="utf-8") as f:
+            threads = yappi.get_thread_stats()
+            threads.print_all(out=f)
+            ignored = {
+                thread.id for thread in threads if thread.name == sampler_thread_name
+            }
+
+            for thread in threads:
+                if thread.id in ignored:
+                    continue
+
+                stats = yappi.get_func_stats(ctx_id=thread.id)
+                if stats.empty():
+                    continue
+
+                path = os.path.join(
+                    directory,
+                    "yappi-{}.pstats".format(
+                        _file_name("{}-{}".format(thread.name, thread.tid)),
+                    ),
+                )
+                stats.save(path, type="pstat")
+                paths.append(path)
+
+                f.write("\n==== thread {} {}\n".format(thread.name, thread.tid))
+                _write_summary(pstats.Stats(path), f)
+
+        combined = os.path.join(directory, "yappi.pstats")
+        yappi.get_func_stats(
+            filter_callback=lambda stat: stat.ctx_id not in ignored,
+        ).save(combined, type="pstat")
+        paths.extend([combined, summary])
+
+        return paths
+
+
+@attr.s
+class TracemallocProfiler:
+    """
+    Args:
+        frames (int): Frames kept for each allocation's traceback.
+        top (int): Number of allocators reported.
+    """
+
+    frames = attr.ib(default=25)
+    top = attr.ib(default=50)
+    snapshot = attr.ib(default=None)
+
+    def start(self):
+        tracemalloc.start(self.frames)
+
+    def stop(self):
+        self.snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)],
+        )
+        tracemalloc.stop()
+
+    def write(self, directory):
+        snapshot_path = os.path.join(directory, "tracemalloc.snapshot")
+        self.snapshot.dump(snapshot_path)
+
+        summary = os.path.join(directory, "tracemalloc.txt")
+        with open(summary, "w", encoding="utf-8") as f:
+            statistics = self.snapshot.statistics("lineno")
+            total = sum(statistic.size for statistic in statistics)
+            f.write(
+                "{:.1f} KiB in {} allocation sites\n\n".format(
+                    total / 1024,
+                    len(statistics),
+                )
+            )
+
+            f.write("==== top lines\n")
+            for statistic in statistics[: self.top]:
+                f.write("{}\n".format(statistic))
+
+            f.write("\n==== top tracebacks\n")
+            for statistic in self.snapshot.statistics("traceback")[:10]:
+                f.write(
+                    "\n{} blocks, {:.1f} KiB\n".format(
+                        statistic.count,
+                        statistic.size / 1024,
+                    )
+                )
+                for line in statistic.traceback.format():
+                    f.write("{}\n".format(line))
+
+        return [summary, snapshot_path]
+
+
+profilers = {
+    "cprofile": CProfiler,
+    "yappi": YappiProfiler,
+    "tracemalloc": TracemallocProfiler,
+}
+
+
+@attr.s
+class Session:
+    """
+    Args:
+        mode (str): One of :data:`modes`.
+        directory (str): Where results are written, created as needed.
+    """
+
+    mode = attr.ib(validator=attr.validators.in_(modes))
+    directory = attr.ib(default=default_output)
+    profiler = attr.ib(default=None)
+    sampler = attr.ib(default=None)
+    started = attr.ib(default=None)
+
+    def __attrs_post_init__(self):
+        if self.profiler is None:
+            self.profiler = profilers[self.mode]()
+
+        if self.sampler is None and self.mode != "tracemalloc":
+            self.sampler = StackSampler()
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.profiler.start()
+        if self.sampler is not None:
+            self.sampler.start()
+
+    def stop(self):
+        """
+        Stop profiling and write the results.
+
+        Returns:
+            list: Paths of the written files.
+        """
+        if self.sampler is not None:
+            self.sampler.stop()
+        self.profiler.stop()
+        seconds = time.perf_counter() - self.started
+
+        os.makedirs(self.directory, exist_ok=True)
+        paths = self.profiler.write(self.directory)
+
+        if self.sampler is not None:
+            path = os.path.join(self.directory, "stacks.collapsed")
+            self.sampler.write(path)
+            paths.append(path)
+
+        with open(os.path.join(self.directory, "README.txt"), "w") as f:
+            f.write("{} profile of {:.1f} s\n\n".format(self.mode, seconds))
+            f.writelines("{}\n".format(os.path.basename(path)) for path in paths)
+
+        return paths
@@ -0,0 +1,304 @@
+"""
+Device lookup and batched parameter access for scripting.  A
+:class:`DeviceRegistry` indexes the devices of a device tree by nickname,
+node ID and bus and follows the model's row and data change signals so a
+lookup never walks the tree.  A :class:`Batch` collects parameter reads and
+writes for one device and queues them with the device's parameter protocol
+all at once so each request follows the previous one without waiting for
+the script in between.
+"""
+
+import collections
+import types
+
+import attr
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+@attr.s(frozen=True)
+class Entry:
+    """
+    Args:
+        device (epyqlib.device.Device): The registered device.
+        node (epyqlib.devicetree.Device): Its device tree node.
+        bus (str): The name of the bus node it is on.
+    """
+
+    device = attr.ib()
+    node = attr.ib()
+    bus = attr.ib()
+
+
+@attr.s
+class DeviceRegistry:
+    """
+    Args:
+        model (epyqlib.devicetree.Model): Bus nodes are the children of its
+        root and device nodes are their children.
+    """
+
+    model = attr.ib()
+    _entries = attr.ib(factory=dict, init=False)
+    _by_nickname = attr.ib(factory=dict, init=False)
+    _by_node_id = attr.ib(factory=lambda: collections.defaultdict(dict), init=False)
+    _by_bus = attr.ib(factory=lambda: collections.defaultdict(dict), init=False)
+    _nicknames = attr.ib(factory=dict, init=False)
+
+    def connect(self):
+        """
+        Register the devices already in the tree and follow later changes.
+        """
+        for bus_node in self.model.root.children:
+            for node in bus_node.children:
+                self.add(node)
+
+        self.model.rowsInserted.connect(self._rows_inserted)
+        self.model.dataChanged.connect(self._data_changed)
+        self.model.device_removed.connect(self.remove)
+
+    def disconnect(self):
+        self.model.rowsInserted.disconnect(self._rows_inserted)
+        self.model.dataChanged.disconnect(self._data_changed)
+        self.model.device_removed.disconnect(self.remove)
+
+    def add(self, node):
+        device = node.device
+        if device in self._entries:
+            return
+
+        entry = Entry(device=device, node=node, bus=node.tree_parent.fields.name)
+        self._entries[device] = entry
+        self._by_node_id[device.node_id][device] = entry.bus
+        self._by_bus[entry.bus][device] = None
+        self._index_nickname(device)
+
+    def remove(self, device):
+        entry = self._entries.pop(device, None)
+        if entry is None:
+            return
+
+        self._unindex_nickname(device)
+
+        by_node_id = self._by_node_id[device.node_id]
+        by_node_id.pop(device, None)
+        if len(by_node_id) == 0:
+            del self._by_node_id[device.node_id]
+
+        by_bus = self._by_bus[entry.bus]
+        by_bus.pop(device, None)
+        if len(by_bus) == 0:
+            del self._by_bus[entry.bus]
+
+    def rename(self, device):
+        """
+        Update the index after ``device.nickname`` changed.
+        """
+        if device in self._entries:
+            self._unindex_nickname(device)
+            self._index_nickname(device)
+
+    def _index_nickname(self, device):
+        nickname = device.nickname
+        if len(nickname) > 0:
+            self._nicknames[device] = nickname
+            self._by_nickname[nickname] = device
+
+    def _unindex_nickname(self, device):
+        nickname = self._nicknames.pop(device, None)
+        if nickname is not None and self._by_nickname.get(nickname) is device:
+            del self._by_nickname[nickname]
+
+            # another device may share the old nickname
+            for other, other_nickname in self._nicknames.items():
+                if other_nickname == nickname:
+                    self._by_nickname[nickname] = other
+
+    def _rows_inserted(self, parent, first, last):
+        for node in self.model.node_from_index(parent).children[first : last + 1]:
+            if getattr(node, "device", None) is not None:
+                self.add(node)
+
+    def _data_changed(self, top_left, bottom_right, roles=()):
+        device = getattr(self.model.node_from_index(top_left), "device", None)
+        if device is not None:
+            self.rename(device)
+
+    def by_nickname(self):
+        """
+        Returns:
+            Mapping: A read only view of the devices with a nickname keyed by
+            it, as ``get_devices`` of :class:`epyqlib.scripting.Model`.
+        """
+        return types.MappingProxyType(self._by_nickname)
+
+    def get(self, nickname):
+        """
+        Returns:
+            epyqlib.device.Device: The device, None if there is none by that
+            nickname.
+        """
+        return self._by_nickname.get(nickname)
+
+    def by_node_id(self, node_id, bus=None):
+        """
+        Args:
+            node_id (int): The device node ID.
+            bus (str, optional): Only on the bus with this name.
+
+        Returns:
+            list: The matching devices.
+        """
+        devices = self._by_node_id.get(node_id, {})
+
+        return [
+            device
+            for device, device_bus in devices.items()
+            if bus is None or device_bus == bus
+        ]
+
+    def on_bus(self, bus):
+        """
+        Returns:
+            list: The devices on the bus with this name.
+        """
+        return list(self._by_bus.get(bus, ()))
+
+    def entry(self, device):
+        return self._entries.get(device)
+
+    def batch(self, nickname):
+        """
+        Returns:
+            Batch: An empty batch for the device with this nickname.
+
+        Raises:
+            KeyError: If there is no such device.
+        """
+        return Batch(device=self._by_nickname[nickname])
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+
+@attr.s
+class Request:
+    """
+    One parameter protocol request of a :class:`Batch`.
+
+    Args:
+        read (bool): A read, otherwise a write.
+        frame (epyqlib.nv.Frame): The parameter frame of all the signals.
+        signals (dict): Values to write keyed by signal, None for reads.
+    """
+
+    read = attr.ib()
+    frame = attr.ib()
+    signals = attr.ib()
+
+
+@attr.s
+class Batch:
+    """
+    Parameter reads and writes of one device sent together.
+
+    Args:
+        device (epyqlib.device.Device): The device whose ``nvs`` are
+        accessed.
+    """
+
+    device = attr.ib()
+    reads = attr.ib(factory=list)
+    writes = attr.ib(factory=list)
+
+    def signal(self, path):
+        return self.device.nvs.neo.signal_by_path(*path)
+
+    def read(self, *path):
+        """
+        Read the parameter at ``path`` such as ``("Frame", "Signal")``.
+        """
+        self.reads.append((path, self.signal(path)))
+
+        return self
+
+    def write(self, value, *path):
+        """
+        Write the human ``value`` to the parameter at ``path``.
+        """
+        self.writes.append((path, self.signal(path), value))
+
+        return self
+
+    def requests(self):
+        """
+        Returns:
+            list: The reads and then the writes as one :class:`Request` per
+            parameter frame.
+        """
+        reads = collections.OrderedDict()
+        for path, signal in self.reads:
+            reads.setdefault(signal.frame, {})[signal] = None
+
+        writes = collections.OrderedDict()
+        for path, signal, value in self.writes:
+            writes.setdefault(signal.frame, {})[signal] = signal.from_human(value)
+
+        return [
+            Request(read=True, frame=frame, signals=signals)
+            for frame, signals in reads.items()
+        ] + [
+            Request(read=False, frame=frame, signals=signals)
+            for frame, signals in writes.items()
+        ]
+
+    def run(self):
+        """
+        Queue every request with the device's parameter protocol at once.
+
+        Returns:
+            twisted.internet.defer.Deferred: Fires with the values the device
+            responded with keyed by path, reads and writes alike.
+        """
+        import epyqlib.nv
+        import epyqlib.twisted.nvs
+        import twisted.internet.defer
+
+        protocol = self.device.nvs.protocol
+        deferreds = []
+        for request in self.requests():
+            method = protocol.read_multiple if request.read else protocol.write_multiple
+            signals = request.signals
+            if request.read:
+                signals = tuple(signals)
+
+            deferreds.append(
+                method(
+                    nv_signals=signals,
+                    meta=epyqlib.nv.MetaEnum.value,
+                    priority=epyqlib.twisted.nvs.Priority.user,
+                    passive=True,
+                    all_values=True,
+                )
+            )
+
+        paths = [(path, signal) for path, signal in self.reads] + [
+            (path, signal) for path, signal, value in self.writes
+        ]
+
+        def collect(results):
+            values = {}
+            for result, meta in results:
+                values.update(result)
+
+            return {path: values.get(signal.status_signal) for path, signal in paths}
+
+        d = twisted.internet.defer.gatherResults(deferreds, consumeErrors=True)
+        d.addCallback(collect)
+
+        return d
@@ -0,0 +1,317 @@
+"""
+Replay of recorded CAN traffic into a bus so devices can be exercised without
+hardware.  Frames from a TRC or native log are paced against their recorded
+timestamps and sent on a python-can virtual bus whose other end is handed to
+a :class:`epyqlib.busproxy.BusProxy`, so they arrive through the same notifier
+path as frames from an adapter.
+"""
+
+import itertools
+import logging
+import math
+import threading
+import time
+
+import attr
+import can
+
+import epyq.binlog
+import epyq.canrecord
+import epyq.trc
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+logger = logging.getLogger(__name__)
+
+_channels = itertools.count()
+
+
+def read_frames(path, include_tx=False):
+    """
+    Args:
+        path (str): A TRC file or a native ``.epcl`` log.
+        include_tx (bool): Also yield frames that were transmitted by the
+        recording application.
+
+    Yields:
+        tuple: ``(time, bus, id, flags, dlc, data)`` in recorded order.
+    """
+    if str(path).lower().endswith(".trc"):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            frames = epyq.trc.parse(f)
+            yield from _filter(frames, include_tx=include_tx)
+    else:
+        with epyq.binlog.Reader(path) as reader:
+            yield from _filter(reader.frames(), include_tx=include_tx)
+
+
+def _filter(frames, include_tx):
+    for frame in frames:
+        time_, bus, id, flags, dlc, data = frame
+        if not include_tx and flags & epyq.canrecord.flag_tx:
+            continue
+        if math.isnan(time_):
+            continue
+
+        yield frame
+
+
+def to_message(frame):
+    """
+    Returns:
+        can.Message: The message for a ``(time, bus, id, flags, dlc, data)``
+        frame.
+    """
+    time_, bus, id, flags, dlc, data = frame
+
+    return can.Message(
+        timestamp=time_,
+        arbitration_id=id,
+        is_extended_id=bool(flags & epyq.canrecord.flag_extended),
+        is_remote_frame=bool(flags & epyq.canrecord.flag_remote),
+        is_error_frame=bool(flags & epyq.canrecord.flag_error),
+        dlc=dlc,
+        data=bytes(data[:dlc]),
+    )
+
+
+@attr.s
+class Statistics:
+    """
+    Args:
+        frames (int): Frames sent.
+        received (int): Frames delivered to the bus notifier.
+        seconds (float): Time from the first to the last frame sent.
+        late (int): Frames sent later than their scheduled time by more than
+        the replayer's tolerance.
+        max_lag (float): Largest delay of a frame behind its scheduled time.
+    """
+
+    frames = attr.ib(default=0)
+    received = attr.ib(default=0)
+    seconds = attr.ib(default=0.0)
+    late = attr.ib(default=0)
+    max_lag = attr.ib(default=0.0)
+
+    @property
+    def dropped(self):
+        return max(0, self.frames - self.received)
+
+    def frames_per_second(self):
+        if self.seconds == 0:
+            return 0
+
+        return self.frames / self.seconds
+
+    def summary(self):
+        return (
+            "{frames} frames in {seconds:.3f} s ({rate:.0f} frames/s),"
+            " {dropped} dropped, {late} late, max lag {lag:.1f} ms"
+        ).format(
+            frames=self.frames,
+            seconds=self.seconds,
+            rate=self.frames_per_second(),
+            dropped=self.dropped,
+            late=self.late,
+            lag=1000 * self.max_lag,
+        )
+
+
+@attr.s
+class Replayer:
+    """
+    Args:
+        frames (iterable): ``(time, bus, id, flags, dlc, data)`` tuples in
+        recorded order.
+        send (callable): Called with each :class:`can.Message`.
+        speed (float): Replay rate relative to the recording, ``1`` for real
+        time.  ``0`` sends frames as fast as possible.
+        tolerance (float): Seconds a frame may be sent behind schedule
+        before it is counted as late.
+        clock (callable): Returns the current time in seconds.
+    """
+
+    frames = attr.ib()
+    send = attr.ib()
+    speed = attr.ib(default=1)
+    tolerance = attr.ib(default=0.010)
+    clock = attr.ib(default=time.perf_counter)
+    statistics = attr.ib(factory=Statistics)
+    _stop = attr.ib(factory=threading.Event, init=False)
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        """
+        Send all frames, sleeping between them as needed to keep pace.
+
+        Returns:
+            Statistics: The statistics of the replay.
+        """
+        statistics = self.statistics
+        start = None
+        first = None
+
+        for frame in self.frames:
+            if self._stop.is_set():
+                break
+
+            message = to_message(frame)
+            now = self.clock()
+
+            if start is None:
+                start = now
+                first = message.timestamp
+            elif self.speed:
+                due = start + (message.timestamp - first) / self.speed
+                lag = now - due
+                if lag < 0:
+                    if self._stop.wait(-lag):
+                        break
+                    now = self.clock()
+                    lag = now - due
+
+                if lag > self.tolerance:
+                    statistics.late += 1
+                statistics.max_lag = max(statistics.max_lag, lag)
+
+            self.send(message)
+            statistics.frames += 1
+
+        if start is not None:
+            statistics.seconds = self.clock() - start
+
+        return statistics
+
+
+class Counter(can.Listener):
+    """
+    Counts the messages received by a :class:`can.Notifier`.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def on_message_received(self, msg):
+        with self._lock:
+            self.count += 1
+
+
+@attr.s
+class Replay:
+    """
+    Replays a log into a bus proxy on a background thread.  The proxy is set
+    to a virtual bus for the duration of the replay and then back to the bus
+    it had before.
+
+    Args:
+        path (str): A TRC file or a native ``.epcl`` log.
+        proxy (epyqlib.busproxy.BusProxy): Receives the replayed frames.  It
+        must not be on a real bus since setting another one shuts it down.
+        speed (float): As for :class:`Replayer`.
+        finished (callable, optional): Called with the :class:`Statistics`
+        from the replay thread when the replay ends.
+        drain_timeout (float): Seconds to wait for sent frames to reach the
+        notifier before counting the rest as dropped.
+        call (callable): Calls a function on the thread owning the proxy,
+        such as :meth:`twisted.internet.reactor.callFromThread`.  Used to set
+        the proxy back when the replay ends on its own.
+    """
+
+    path = attr.ib()
+    proxy = attr.ib()
+    speed = attr.ib(default=1)
+    finished = attr.ib(default=None)
+    drain_timeout = attr.ib(default=1)
+    call = attr.ib(default=lambda f: f())
+    replayer = attr.ib(default=None, init=False)
+    thread = attr.ib(default=None, init=False)
+    _transmit_bus = attr.ib(default=None, init=False)
+    _previous_bus = attr.ib(default=None, init=False)
+    _replaying = attr.ib(default=False, init=False)
+    _lock = attr.ib(factory=threading.Lock, init=False)
+    _counter = attr.ib(factory=Counter, init=False)
+
+    def start(self):
+        previous_bus = self.proxy.bus
+        if isinstance(previous_bus, can.BusABC):
+            raise ValueError("Unable to replay into a proxy on a real bus")
+
+        channel = "epyq-replay-{}".format(next(_channels))
+        receive_bus = can.interface.Bus(bustype="virtual", channel=channel)
+        self._transmit_bus = can.interface.Bus(bustype="virtual", channel=channel)
+
+        self._previous_bus = previous_bus
+        self._replaying = True
+        self.proxy.set_bus(bus=receive_bus)
+        self.proxy.real_notifier.add_listener(self._counter)
+
+        self.replayer = Replayer(
+            frames=read_frames(self.path),
+            send=self._transmit_bus.send,
+            speed=self.speed,
+        )
+        self.thread = threading.Thread(
+            target=self._run,
+            name="replay",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def stop(self, timeout=None):
+        """
+        End the replay and set the proxy back to its previous bus.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the replay thread,
+            defaults to the drain timeout and a second.
+        """
+        if self.replayer is not None:
+            self.replayer.stop()
+
+        if timeout is None:
+            timeout = self.drain_timeout + 1
+        self.join(timeout)
+        self._restore()
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _restore(self):
+        with self._lock:
+            if not self._replaying:
+                return
+            self._replaying = False
+
+        notifier = self.proxy.real_notifier
+        if notifier is not None:
+            notifier.remove_listener(self._counter)
+
+        # shuts down the receiving virtual bus
+        self.proxy.set_bus(bus=self._previous_bus)
+
+    def _run(self):
+        try:
+            statistics = self.replayer.run()
+
+            deadline = time.monotonic() + self.drain_timeout
+            while self._counter.count < statistics.frames:
+                if time.monotonic() > deadline:
+                    break
+                time.sleep(0.01)
+
+            statistics.received = self._counter.count
+        finally:
+            self._transmit_bus.shutdown()
+            self.call(self._restore)
+
+        logger.info("Replay of %s: %s", self.path, statistics.summary())
+
+        if self.finished is not None:
+            self.finished(statistics)
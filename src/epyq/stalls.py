@@ -0,0 +1,261 @@
+"""
+Detection of stalls of the combined Qt and Twisted event loop.  A heartbeat
+timer in the Qt thread records each beat while a watchdog thread checks how
+long ago the last beat was.  Once that passes the threshold the watchdog
+samples the Qt thread's stack until the loop beats again, then the stall
+with its duration and most common stacks is appended to a rolling report.
+The lateness of every beat also goes into a histogram of loop lag.
+"""
+
+import collections
+import json
+import logging
+import os
+import pathlib
+import sys
+import threading
+import time
+import traceback
+
+import appdirs
+import attr
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+logger = logging.getLogger(__name__)
+
+# upper bounds in seconds, the last bucket is unbounded
+lag_buckets = (0.005, 0.010, 0.025, 0.050, 0.100, 0.250, 0.500, 1.0, 2.5)
+
+
+def default_report_path():
+    return pathlib.Path(
+        appdirs.user_log_dir(appname="EPyQ", appauthor="EPC Power Corp.")
+    ).joinpath("stalls.jsonl")
+
+
+@attr.s
+class LagHistogram:
+    """
+    Counts of loop lag by :data:`lag_buckets`.
+    """
+
+    bounds = attr.ib(default=lag_buckets)
+    counts = attr.ib(default=None)
+    maximum = attr.ib(default=0.0)
+
+    def __attrs_post_init__(self):
+        if self.counts is None:
+            self.counts = [0] * (len(self.bounds) + 1)
+
+    def add(self, lag):
+        for index, bound in enumerate(self.bounds):
+            if lag < bound:
+                break
+        else:
+            index = len(self.bounds)
+
+        self.counts[index] += 1
+        if lag > self.maximum:
+            self.maximum = lag
+
+    def total(self):
+        return sum(self.counts)
+
+    def labels(self):
+        """
+        Returns:
+            list: A label for each bucket such as ``"10-25 ms"``.
+        """
+        edges = [0] + [round(1000 * bound) for bound in self.bounds]
+        labels = ["{}-{} ms".format(a, b) for a, b in zip(edges, edges[1:])]
+        labels.append(">{} ms".format(edges[-1]))
+
+        return labels
+
+    def to_dict(self):
+        return {
+            "buckets": dict(zip(self.labels(), self.counts)),
+            "max_ms": 1000 * self.maximum,
+        }
+
+
+@attr.s
+class Stall:
+    """
+    Args:
+        started (float): Wall clock time of the last beat before the stall.
+        duration (float): Seconds between that beat and the next, None
+        while the stall continues.
+        stacks (collections.Counter): Samples of the Qt thread's formatted
+        stack.
+    """
+
+    started = attr.ib()
+    duration = attr.ib(default=None)
+    stacks = attr.ib(factory=collections.Counter)
+
+    def to_dict(self, stacks=3):
+        samples = sum(self.stacks.values())
+
+        return {
+            "started": self.started,
+            "duration": self.duration,
+            "samples": samples,
+            "stacks": [
+                {"samples": count, "stack": stack}
+                for stack, count in self.stacks.most_common(stacks)
+            ],
+        }
+
+
+def append_report(path, record, max_bytes=1024 * 1024, backups=3):
+    """
+    Append a JSON line to ``path``, first rotating it to ``path.1`` and so
+    on when it would grow past ``max_bytes``.
+    """
+    path = pathlib.Path(path)
+    line = json.dumps(record) + "\n"
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists() and path.stat().st_size + len(line) > max_bytes:
+        for index in range(backups - 1, 0, -1):
+            older = path.with_name("{}.{}".format(path.name, index))
+            if older.exists():
+                os.replace(older, path.with_name("{}.{}".format(path.name, index + 1)))
+        if backups > 0:
+            os.replace(path, path.with_name(path.name + ".1"))
+        else:
+            path.unlink()
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+
+
+@attr.s
+class StallDetector:
+    """
+    Args:
+        threshold (float): Seconds without a beat counted as a stall.
+        interval (float): Seconds between heartbeats.
+        poll (float): Seconds between watchdog checks.
+        report_path (str, optional): JSON lines report of the stalls, not
+        written when None.
+        timer (QTimer, optional): Drives the heartbeat.  A timer is created
+        if not given.
+        clock (callable): Monotonic time in seconds.
+    """
+
+    threshold = attr.ib(default=0.25)
+    interval = attr.ib(default=0.05)
+    poll = attr.ib(default=0.02)
+    report_path = attr.ib(default=None)
+    timer = attr.ib(default=None)
+    clock = attr.ib(default=time.monotonic)
+    histogram = attr.ib(factory=LagHistogram)
+    stalls = attr.ib(factory=lambda: collections.deque(maxlen=100))
+    stall_count = attr.ib(default=0)
+    thread_id = attr.ib(factory=threading.get_ident)
+    _last_beat = attr.ib(default=None, init=False)
+    _current = attr.ib(default=None, init=False)
+    _lock = attr.ib(factory=threading.Lock, init=False)
+    _stop = attr.ib(factory=threading.Event, init=False)
+    _thread = attr.ib(default=None, init=False)
+
+    def start(self):
+        if self.timer is None:
+            from PyQt5 import QtCore
+
+            self.timer = QtCore.QTimer()
+
+        self.timer.setInterval(round(1000 * self.interval))
+        self.timer.timeout.connect(self.beat)
+        self.timer.start()
+
+        self._last_beat = self.clock()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="stall watchdog",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.timer.stop()
+
+    def beat(self):
+        """
+        Record a heartbeat.  Called from the Qt thread.
+        """
+        now = self.clock()
+
+        with self._lock:
+            gap = now - self._last_beat
+            self._last_beat = now
+            stall = self._current
+            self._current = None
+
+        self.histogram.add(max(0, gap - self.interval))
+
+        if stall is None and gap > self.threshold:
+            # ended before the watchdog looked
+            stall = Stall(started=time.time() - gap)
+
+        if stall is not None:
+            stall.duration = gap
+            self._finish(stall)
+
+    def check(self):
+        """
+        Sample the Qt thread's stack if it is stalled.  Called from the
+        watchdog thread.
+        """
+        now = self.clock()
+
+        with self._lock:
+            since = now - self._last_beat
+            if since <= self.threshold:
+                return
+
+            stall = self._current
+            if stall is None:
+                stall = Stall(started=time.time() - since)
+                self._current = stall
+
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+
+        stack = "".join(traceback.format_stack(frame))
+        with self._lock:
+            stall.stacks[stack] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.poll):
+            self.check()
+
+    def _finish(self, stall):
+        self.stall_count += 1
+        self.stalls.append(stall)
+
+        logger.warning("Event loop stalled for %.3f s", stall.duration)
+
+        if self.report_path is not None:
+            try:
+                append_report(path=self.report_path, record=stall.to_dict())
+            except OSError:
+                logger.exception("Unable to write the stall report")
+
+    def to_dict(self):
+        return {
+            "threshold": self.threshold,
+            "stalls": self.stall_count,
+            "lag": self.histogram.to_dict(),
+            "report": None if self.report_path is None else str(self.report_path),
+        }
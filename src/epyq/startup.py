@@ -0,0 +1,99 @@
+"""
+Startup phase timing for ``--startup-profile``.  Importing this module starts
+the clock so it should be imported first.  Each :meth:`Profile.mark` closes a
+phase recording its duration and the modules imported during it.
+"""
+
+import collections
+import sys
+import time
+
+import attr
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+@attr.s(frozen=True)
+class Phase:
+    name = attr.ib()
+    seconds = attr.ib()
+    modules = attr.ib()
+
+    def packages(self):
+        """
+        Returns:
+            collections.Counter: Count of modules imported per top level
+            package.
+        """
+        return collections.Counter(name.partition(".")[0] for name in self.modules)
+
+
+class Profile:
+    """
+    Args:
+        clock (callable): Returns the current time in seconds.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.phases = []
+        self._last_time = clock()
+        self._last_modules = set(sys.modules)
+
+    def mark(self, name):
+        """
+        End the current phase.
+
+        Args:
+            name (str): Describes the work done since the previous mark.
+
+        Returns:
+            Phase: The completed phase.
+        """
+        now = self.clock()
+        modules = set(sys.modules)
+
+        phase = Phase(
+            name=name,
+            seconds=now - self._last_time,
+            modules=sorted(modules - self._last_modules),
+        )
+        self.phases.append(phase)
+
+        self._last_time = now
+        self._last_modules = modules
+
+        return phase
+
+    def report(self, packages=5):
+        """
+        Args:
+            packages (int): Number of top level packages to list per phase,
+            those with the most modules imported.
+
+        Returns:
+            str: A table of the phases.
+        """
+        lines = ["{:<24} {:>9} {:>9} {:>8}".format("phase", "s", "total s", "modules")]
+        total = 0
+
+        for phase in self.phases:
+            total += phase.seconds
+            lines.append(
+                "{:<24} {:>9.3f} {:>9.3f} {:>8}".format(
+                    phase.name,
+                    phase.seconds,
+                    total,
+                    len(phase.modules),
+                )
+            )
+
+            for package, count in phase.packages().most_common(packages):
+                lines.append("    {:<20} {:>8}".format(package, count))
+
+        return "\n".join(lines)
+
+
+profile = Profile()
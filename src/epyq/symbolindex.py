@@ -0,0 +1,550 @@
+"""
+Persistent index of the variables and types of a firmware binary.
+:func:`epyqlib.cmemoryparser.process_file` walks every DWARF entry of a TI
+COFF ``.out`` file through :mod:`elftools` each time a binary is loaded.
+The objects it returns are instead stored once in an SQLite database in the
+user cache directory keyed by a hash of the binary, one row per variable,
+type and struct or union member with its name and address indexed.  Loading
+a known binary only reads the variable rows and each ``type`` is built from
+its row the first time it is looked up.
+"""
+
+import collections
+import collections.abc
+import enum
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+
+import appdirs
+import attr
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+logger = logging.getLogger(__name__)
+
+version = 1
+suffix = ".sqlite"
+
+schema = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE objects (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT,
+    parent INTEGER,
+    address INTEGER,
+    fields TEXT NOT NULL
+);
+CREATE TABLE variables (position INTEGER PRIMARY KEY, object INTEGER NOT NULL);
+CREATE TABLE names (name TEXT, position INTEGER, object INTEGER NOT NULL);
+CREATE INDEX objects_name ON objects (name);
+CREATE INDEX objects_parent ON objects (parent, name);
+CREATE INDEX objects_address ON objects (address);
+CREATE INDEX names_name ON names (name, position);
+"""
+
+
+@attr.s
+class Statistics:
+    hits = attr.ib(default=0)
+    misses = attr.ib(default=0)
+    errors = attr.ib(default=0)
+    resolved = attr.ib(default=0)
+    hit_seconds = attr.ib(default=0.0)
+    miss_seconds = attr.ib(default=0.0)
+
+    def summary(self):
+        return (
+            "{hits} hits ({hit_seconds:.3f} s), {misses} misses"
+            " ({miss_seconds:.3f} s), {errors} errors, {resolved} types resolved"
+        ).format(**attr.asdict(self))
+
+
+statistics = Statistics()
+_lock = threading.Lock()
+
+
+def default_directory():
+    return pathlib.Path(
+        appdirs.user_cache_dir(appname="EPyQ", appauthor="EPC Power Corp.")
+    ).joinpath("symbols")
+
+
+def key(path):
+    """
+    Returns:
+        str: Hex digest of the binary's content and the index format.
+    """
+    sha = hashlib.sha256()
+    sha.update("{}\0".format(version).encode("utf-8"))
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+
+    return sha.hexdigest()
+
+
+def _classes():
+    import epyqlib.cmemoryparser
+
+    return epyqlib.cmemoryparser
+
+
+class _Writer:
+    def __init__(self, connection):
+        self.connection = connection
+        self.ids = {}
+        self.pending = collections.deque()
+        self.rows = []
+
+    def id(self, item, parent=None):
+        identity = id(item)
+        if identity not in self.ids:
+            self.ids[identity] = len(self.ids) + 1
+            self.pending.append((item, self.ids[identity], parent))
+
+        return self.ids[identity]
+
+    def encode(self, value, parent=None):
+        if attr.has(type(value)):
+            return {"ref": self.id(value, parent=parent)}
+        if isinstance(value, enum.Enum):
+            return {"enum": type(value).__name__, "value": value.value}
+        if isinstance(value, dict):
+            return {
+                "items": [[k, self.encode(v, parent=parent)] for k, v in value.items()]
+            }
+        if isinstance(value, tuple) and "value" in getattr(value, "_fields", ()):
+            # an elftools AttributeValue such as an array's DW_AT_count
+            return self.encode(value.value)
+        if isinstance(value, (list, tuple)):
+            return [self.encode(v, parent=parent) for v in value]
+
+        return value
+
+    def flush(self):
+        while len(self.pending) > 0:
+            item, identity, parent = self.pending.popleft()
+            fields = {}
+            for field in attr.fields(type(item)):
+                value = getattr(item, field.name)
+                # members of a struct or union are indexed under it
+                fields[field.name] = self.encode(
+                    value,
+                    parent=identity if field.name == "members" else None,
+                )
+
+            name = getattr(item, "name", None)
+            self.rows.append(
+                (
+                    identity,
+                    type(item).__name__,
+                    name if isinstance(name, str) else None,
+                    parent,
+                    getattr(item, "address", None),
+                    json.dumps(fields),
+                )
+            )
+
+        self.connection.executemany(
+            "INSERT INTO objects VALUES (?, ?, ?, ?, ?, ?)", self.rows
+        )
+        self.rows = []
+
+
+def write(path, binary_info, source_key=""):
+    """
+    Store the result of :func:`epyqlib.cmemoryparser.process_file`.
+
+    Args:
+        path (pathlib.Path): The index file to create.
+        binary_info (tuple): The names, variables and bits per byte.
+        source_key (str): The :func:`key` of the binary.
+    """
+    names, variables, bits_per_byte = binary_info
+
+    connection = sqlite3.connect(os.fspath(path))
+    try:
+        with connection:
+            connection.executescript(schema)
+            writer = _Writer(connection)
+            connection.executemany(
+                "INSERT INTO variables VALUES (?, ?)",
+                [
+                    (position, writer.id(variable))
+                    for position, variable in enumerate(variables)
+                ],
+            )
+            connection.executemany(
+                "INSERT INTO names VALUES (?, ?, ?)",
+                [
+                    (name, position, writer.id(item))
+                    for name, items in names.items()
+                    for position, item in enumerate(items)
+                ],
+            )
+            writer.flush()
+            connection.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [
+                    ("version", str(version)),
+                    ("key", source_key),
+                    ("bits_per_byte", str(bits_per_byte)),
+                ],
+            )
+    finally:
+        connection.close()
+
+
+@attr.s
+class Reference:
+    index = attr.ib()
+    id = attr.ib()
+
+    def resolve(self):
+        return self.index.object(self.id)
+
+
+def _lazy_type(cls):
+    """
+    Returns:
+        type: A subclass of ``cls`` building ``type`` from its row on first
+        access.
+    """
+
+    def get(self):
+        value = self.__dict__["type"]
+        if isinstance(value, Reference):
+            value = value.resolve()
+            self.__dict__["type"] = value
+
+        return value
+
+    def set(self, value):
+        self.__dict__["type"] = value
+
+    return type(
+        cls.__name__,
+        (cls,),
+        {"type": property(get, set), "__module__": cls.__module__},
+    )
+
+
+class Names(collections.abc.Mapping):
+    """
+    The ``names`` of :func:`epyqlib.cmemoryparser.process_file`, each
+    looked up in the index when accessed.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def __getitem__(self, name):
+        rows = self.index.query(
+            "SELECT object FROM names WHERE name IS ? ORDER BY position",
+            (name,),
+        )
+        if len(rows) == 0:
+            raise KeyError(name)
+
+        return [self.index.object(object_id) for (object_id,) in rows]
+
+    def __iter__(self):
+        rows = self.index.query("SELECT DISTINCT name FROM names")
+
+        return iter([name for (name,) in rows])
+
+    def __len__(self):
+        ((count,),) = self.index.query("SELECT COUNT(DISTINCT name) FROM names")
+
+        return count
+
+
+class Index:
+    """
+    Args:
+        path (pathlib.Path): The index file.
+        classes (module): Where the object classes are defined, by default
+        :mod:`epyqlib.cmemoryparser`.
+    """
+
+    def __init__(self, path, classes=None):
+        if classes is None:
+            classes = _classes()
+
+        self.path = path
+        self.classes = classes
+        # queried from whichever thread looks a type up first
+        self._connection = sqlite3.connect(os.fspath(path), check_same_thread=False)
+        self._lock = threading.RLock()
+        self._objects = {}
+        self._ids = {}
+        self._lazy_classes = {}
+
+        self.meta = dict(self.query("SELECT key, value FROM meta"))
+        if self.meta.get("version") != str(version):
+            raise ValueError("Unsupported symbol index version")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def query(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def _class(self, kind):
+        cls = self._lazy_classes.get(kind)
+        if cls is None:
+            cls = getattr(self.classes, kind)
+            if "type" in attr.fields_dict(cls):
+                cls = _lazy_type(cls)
+            self._lazy_classes[kind] = cls
+
+        return cls
+
+    def _decode(self, value, lazy=False):
+        if isinstance(value, dict):
+            if "ref" in value:
+                if lazy:
+                    return Reference(index=self, id=value["ref"])
+                return self.object(value["ref"])
+            if "enum" in value:
+                return getattr(self.classes, value["enum"])(value["value"])
+            if "items" in value:
+                return collections.OrderedDict(
+                    (k, self._decode(v)) for k, v in value["items"]
+                )
+        if isinstance(value, list):
+            return [self._decode(v) for v in value]
+
+        return value
+
+    def object(self, object_id):
+        """
+        Returns:
+            object: The object stored with this ID, built once.
+        """
+        with self._lock:
+            item = self._objects.get(object_id)
+            if item is not None:
+                return item
+
+            ((kind, fields),) = self._connection.execute(
+                "SELECT kind, fields FROM objects WHERE id = ?", (object_id,)
+            ).fetchall()
+            fields = json.loads(fields)
+            cls = self._class(kind)
+
+            # registered before decoding the fields so cycles through
+            # members come back to this object
+            item = cls.__new__(cls)
+            self._objects[object_id] = item
+            self._ids[id(item)] = object_id
+            kwargs = {
+                name: self._decode(value, lazy=name == "type")
+                for name, value in fields.items()
+            }
+            cls.__init__(
+                item,
+                **{
+                    field.name: kwargs[field.name]
+                    for field in attr.fields(cls)
+                    if field.init and field.name in kwargs
+                },
+            )
+            for field in attr.fields(cls):
+                if not field.init and field.name in kwargs:
+                    setattr(item, field.name, kwargs[field.name])
+
+        with _lock:
+            statistics.resolved += 1
+
+        return item
+
+    def variables(self):
+        rows = self.query(
+            "SELECT object FROM variables ORDER BY position",
+        )
+
+        return [self.object(object_id) for (object_id,) in rows]
+
+    def load(self):
+        """
+        Returns:
+            tuple: The names, variables and bits per byte as from
+            :func:`epyqlib.cmemoryparser.process_file`.
+        """
+        return Names(self), self.variables(), int(self.meta["bits_per_byte"])
+
+    def lookup(self, name):
+        """
+        Returns:
+            list: The variables, types and members with this name.
+        """
+        rows = self.query("SELECT id FROM objects WHERE name = ? ORDER BY id", (name,))
+
+        return [self.object(object_id) for (object_id,) in rows]
+
+    def at(self, address):
+        """
+        Returns:
+            list: The variables at this address.
+        """
+        rows = self.query(
+            "SELECT id FROM objects WHERE address = ? AND kind = 'Variable'",
+            (address,),
+        )
+
+        return [self.object(object_id) for (object_id,) in rows]
+
+    def member(self, parent, name):
+        """
+        Returns:
+            object: The member of the struct or union with this name, None
+            if it has none.
+        """
+        object_id = self._id(parent)
+        rows = self.query(
+            "SELECT id FROM objects WHERE parent = ? AND name = ?",
+            (object_id, name),
+        )
+        if len(rows) == 0:
+            return None
+
+        ((member_id,),) = rows
+
+        return self.object(member_id)
+
+    def _id(self, item):
+        with self._lock:
+            object_id = self._ids.get(id(item))
+
+        if object_id is None:
+            raise ValueError("{!r} is not from this index".format(item))
+
+        return object_id
+
+
+def _open(path, directory, classes, process_file):
+    start = time.perf_counter()
+    path = pathlib.Path(path)
+
+    if directory is None:
+        directory = default_directory()
+
+    source_key = key(path)
+    index_path = pathlib.Path(directory) / (source_key + suffix)
+
+    if index_path.exists():
+        try:
+            index = Index(index_path, classes=classes)
+        except Exception as e:
+            logger.debug("Ignoring symbol index %s: %s", index_path, e)
+            with _lock:
+                statistics.errors += 1
+        else:
+            with _lock:
+                statistics.hits += 1
+                statistics.hit_seconds += time.perf_counter() - start
+
+            return index, None
+
+    if process_file is None:
+        process_file = _original_process_file
+        if process_file is None:
+            process_file = _classes().process_file
+
+    binary_info = process_file(os.fspath(path))
+
+    index = None
+    temporary = index_path.with_name(
+        "{}.{}.{}.tmp".format(index_path.name, os.getpid(), threading.get_ident())
+    )
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        write(temporary, binary_info, source_key=source_key)
+        os.replace(temporary, index_path)
+        index = Index(index_path, classes=classes)
+    except Exception as e:
+        logger.debug("Unable to write symbol index %s: %s", index_path, e)
+        with _lock:
+            statistics.errors += 1
+        try:
+            os.remove(temporary)
+        except FileNotFoundError:
+            pass
+
+    with _lock:
+        statistics.misses += 1
+        statistics.miss_seconds += time.perf_counter() - start
+
+    return index, binary_info
+
+
+def open_index(path, directory=None, classes=None, process_file=None):
+    """
+    Open the index of a binary, building it first if there is none.
+
+    Args:
+        path (str or pathlib.Path): The firmware ``.out`` file.
+        directory (pathlib.Path, optional): The cache directory.  Defaults
+        to :func:`default_directory`.
+        classes (module, optional): See :class:`Index`.
+        process_file (callable, optional): Parses the binary, by default
+        :func:`epyqlib.cmemoryparser.process_file`.
+
+    Returns:
+        Index: The binary's index, None if it could not be written.
+    """
+    index, binary_info = _open(
+        path=path,
+        directory=directory,
+        classes=classes,
+        process_file=process_file,
+    )
+
+    return index
+
+
+def process_file(filename, directory=None):
+    """
+    A drop in replacement for :func:`epyqlib.cmemoryparser.process_file`
+    through the index.
+    """
+    index, binary_info = _open(
+        path=filename,
+        directory=directory,
+        classes=None,
+        process_file=None,
+    )
+    if index is None:
+        # parsed anyways
+        return binary_info
+
+    return index.load()
+
+
+_original_process_file = None
+
+
+def install():
+    """
+    Route binary loading in :mod:`epyqlib.cmemoryparser` through the index.
+    """
+    global _original_process_file
+
+    classes = _classes()
+    if _original_process_file is None:
+        _original_process_file = classes.process_file
+    classes.process_file = process_file
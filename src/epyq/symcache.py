@@ -0,0 +1,163 @@
+"""
+Persistent cache of parsed CAN databases.  Parsing a ``.sym`` file through
+:mod:`canmatrix` is done in pure Python text processing on every device load.
+The parsed matrix is instead pickled to the user cache directory keyed by a
+hash of the file content, the :mod:`canmatrix` version and the cache format
+version so a warm load only unpickles the message and signal tables.
+"""
+
+import hashlib
+import logging
+import os
+import pathlib
+import pickle
+import threading
+import time
+
+import appdirs
+import attr
+import canmatrix
+import canmatrix.formats
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+logger = logging.getLogger(__name__)
+
+version = 1
+suffix = ".pickle"
+
+
+@attr.s
+class Statistics:
+    hits = attr.ib(default=0)
+    misses = attr.ib(default=0)
+    errors = attr.ib(default=0)
+    hit_seconds = attr.ib(default=0.0)
+    miss_seconds = attr.ib(default=0.0)
+
+    def summary(self):
+        return (
+            "{hits} hits ({hit_seconds:.3f} s), {misses} misses"
+            " ({miss_seconds:.3f} s), {errors} errors"
+        ).format(**attr.asdict(self))
+
+
+statistics = Statistics()
+_lock = threading.Lock()
+
+
+def default_directory():
+    return pathlib.Path(
+        appdirs.user_cache_dir(appname="EPyQ", appauthor="EPC Power Corp.")
+    ).joinpath("sym")
+
+
+def key(path):
+    """
+    Returns:
+        str: Hex digest of the file content and everything affecting how it
+        is parsed.
+    """
+    sha = hashlib.sha256()
+    sha.update(
+        "{}\0{}\0{}\0".format(
+            version, canmatrix.__version__, path.suffix.casefold()
+        ).encode("utf-8")
+    )
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+
+    return sha.hexdigest()
+
+
+def parse(path):
+    """
+    Parse a CAN database without the cache.
+
+    Raises:
+        Exception: If :mod:`canmatrix` reported load errors.
+    """
+    matrix = list(canmatrix.formats.loadp(os.fspath(path)).values())[0]
+
+    if hasattr(matrix, "load_errors"):
+        # https://github.com/ebroecker/canmatrix/pull/199
+        if len(matrix.load_errors) > 0:
+            first_error = matrix.load_errors[0]
+            raise Exception(
+                f"{type(first_error).__name__}: {first_error}",
+            ) from first_error
+
+    return matrix
+
+
+def load_matrix(path, directory=None):
+    """
+    Load a CAN database through the cache.  A drop in replacement for
+    :func:`epyqlib.device.load_matrix`.
+
+    Args:
+        path (str or pathlib.Path): The CAN database to load.
+        directory (pathlib.Path, optional): The cache directory.  Defaults to
+        :func:`default_directory`.
+
+    Returns:
+        canmatrix.CanMatrix: The parsed database.
+    """
+    start = time.perf_counter()
+    path = pathlib.Path(path)
+
+    if directory is None:
+        directory = default_directory()
+
+    cache_path = pathlib.Path(directory) / (key(path) + suffix)
+
+    try:
+        with open(cache_path, "rb") as f:
+            matrix = pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.debug("Ignoring CAN database cache %s: %s", cache_path, e)
+        with _lock:
+            statistics.errors += 1
+    else:
+        with _lock:
+            statistics.hits += 1
+            statistics.hit_seconds += time.perf_counter() - start
+
+        return matrix
+
+    matrix = parse(path)
+
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = cache_path.with_name(
+            "{}.{}.{}.tmp".format(cache_path.name, os.getpid(), threading.get_ident())
+        )
+        with open(temporary, "wb") as f:
+            pickle.dump(matrix, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, cache_path)
+    except Exception as e:
+        logger.debug("Unable to write CAN database cache %s: %s", cache_path, e)
+        with _lock:
+            statistics.errors += 1
+
+    with _lock:
+        statistics.misses += 1
+        statistics.miss_seconds += time.perf_counter() - start
+
+    return matrix
+
+
+def install():
+    """
+    Route device loading in :mod:`epyqlib.device` through the cache.
+    """
+    import epyqlib.device
+
+    epyqlib.device.load_matrix = load_matrix
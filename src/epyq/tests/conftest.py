@@ -1,6 +1,23 @@
 import pytest
 
 
+class Clock:
+    """
+    A settable replacement for ``time.monotonic()`` and the like.
+    """
+
+    def __init__(self, now=0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
 def pytest_addoption(parser):
     parser.addoption(
         "--run-manual",
@@ -9,6 +9,8 @@ import epyqlib.device
 import epyqlib.tests.common
 import epyqlib.twisted.busproxy
 
+import epyq.symcache
+
 
 def run():
     app = PyQt5.QtWidgets.QApplication(sys.argv)
@@ -25,6 +27,8 @@ def run():
 
     from twisted.internet import reactor
 
+    epyq.symcache.install()
+
     device = epyqlib.device.Device(
         file=epyqlib.tests.common.devices["customer"],
         node_id=247,
@@ -0,0 +1,81 @@
+import gzip
+import io
+import logging
+import queue
+import sys
+
+import epyq.asynclog
+
+
+def record(name="noisy", level=logging.DEBUG, message="frame %d", args=(1,)):
+    return logging.LogRecord(name, level, __file__, 1, message, args, None)
+
+
+def test_rate_limit_per_logger(clock):
+    limit = epyq.asynclog.RateLimitFilter(rate=10, burst=5, clock=clock)
+
+    passed = [limit.filter(record()) for _ in range(8)]
+    assert passed == [True] * 5 + [False] * 3
+    assert limit.statistics.suppressed == 3
+
+    # other loggers and errors are unaffected
+    assert limit.filter(record(name="quiet"))
+    assert limit.filter(record(level=logging.ERROR))
+
+    clock.now = 0.1
+    late = record(message="frame %d", args=(9,))
+    assert limit.filter(late)
+    assert late.getMessage() == "[3 earlier messages suppressed] frame 9"
+
+
+def test_full_queue_drops():
+    statistics = epyq.asynclog.Statistics()
+    handler = epyq.asynclog.QueueHandler(
+        queue=queue.Queue(2),
+        statistics=statistics,
+    )
+
+    for _ in range(5):
+        handler.handle(record())
+
+    assert statistics.queued == 2
+    assert statistics.dropped == 3
+
+
+def test_rotates_compresses_and_copies_streams(tmp_path, monkeypatch):
+    path = tmp_path / "epyq.log"
+    console = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", console)
+    monkeypatch.setattr(sys, "stderr", console)
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "level", logging.DEBUG)
+
+    async_logging = epyq.asynclog.setup(
+        path=path,
+        max_bytes=2000,
+        backups=2,
+        compress=True,
+        rate=0,
+    )
+    try:
+        print("printed", end="")
+        print(" line")
+        for i in range(200):
+            logging.getLogger("epyq.test").debug("record %d", i)
+    finally:
+        async_logging.stop()
+
+    assert sys.stdout is console
+    assert console.getvalue().startswith("printed line\n")
+    assert "record 199" in console.getvalue()
+
+    rotated = sorted(tmp_path.glob("epyq.log.*.gz"))
+    assert [p.name for p in rotated] == ["epyq.log.1.gz", "epyq.log.2.gz"]
+    text = path.read_text()
+    assert "record 199" in text
+    assert len(text) <= 2000
+    with gzip.open(rotated[0], "rt") as f:
+        assert "record" in f.read()
+
+    assert async_logging.statistics.dropped == 0
+    assert async_logging.queue_handler not in root.handlers
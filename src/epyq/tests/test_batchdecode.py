@@ -0,0 +1,229 @@
+import math
+import pathlib
+import random
+
+import canmatrix.formats
+import pytest
+
+import epyq.batchdecode
+import epyq.binlog
+import epyq.canrecord
+
+
+example_sym = pathlib.Path(__file__).parents[3] / "example.sym"
+
+
+def load_example():
+    (matrix,) = canmatrix.formats.loadp(str(example_sym)).values()
+    return matrix
+
+
+def random_frames(matrix, count, seed=0):
+    generator = random.Random(seed)
+    frames = []
+
+    for i in range(count):
+        frame = generator.choice(matrix.frames)
+        data = bytes(generator.getrandbits(8) for _ in range(frame.size))
+        if frame.is_multiplexed:
+            # keep the multiplexer on a defined branch
+            value = generator.choice([0, 1, 3, 12])
+            data = bytes([0, value << 2 | data[1] & 0x03]) + data[2:]
+        frames.append((i / 1000, frame.arbitration_id.id, data))
+
+    return frames
+
+
+def test_matches_per_frame_decode():
+    matrix = load_example()
+    database = epyq.batchdecode.Database.from_matrix(matrix)
+    frames = random_frames(matrix, count=2000)
+
+    columns = epyq.batchdecode.decode_frames(database=database, frames=frames)
+
+    by_id = {frame.arbitration_id.id: frame for frame in matrix.frames}
+    expected = {}
+    for time, id, data in frames:
+        frame = by_id[id]
+        decoded = frame.decode(data)
+        message = database.messages[id]
+        value = None
+        if message.multiplexer is not None:
+            multiplexer = message.multiplexer.name
+            value = decoded.pop(multiplexer).raw_value
+
+        for name, signal in decoded.items():
+            layouts = {
+                (s.start_bit, s.size, s.factor, s.offset)
+                for s in frame.signals
+                if s.name == name
+            }
+            if len(layouts) > 1:
+                # canmatrix mixes up names reused differently in other branches
+                continue
+
+            path = [frame.name, name]
+            if value is not None:
+                path.insert(1, message.branch_names[value])
+
+            expected.setdefault(tuple(path), []).append(
+                (time, signal.raw_value, float(signal.phys_value))
+            )
+
+    multiplexed = ("CommandSetNVParam", "Param0", "ReadParam_command")
+    assert multiplexed in columns
+
+    for path, values in expected.items():
+        # softwareRev is defined for two IDs so sort before comparing
+        column = columns[path]
+        decoded = sorted(zip(column.times, column.raw, column.values))
+        assert [(time, raw) for time, raw, value in decoded] == [
+            (time, raw) for time, raw, phys in sorted(values)
+        ]
+        assert [value for time, raw, value in decoded] == pytest.approx(
+            [phys for time, raw, phys in sorted(values)]
+        )
+
+
+def test_enumerations_and_binlog(tmp_path):
+    matrix = load_example()
+    database = epyq.batchdecode.Database.from_matrix(matrix)
+    (frame,) = [f for f in matrix.frames if f.name == "CommandModeControl"]
+    id = frame.arbitration_id.id
+
+    path = tmp_path / "log.epcl"
+    with open(path, "wb") as f:
+        with epyq.binlog.Writer(f=f, buses={1: "a"}) as writer:
+            writer.write_frames(
+                [
+                    (0.5, 1, id, 1, 8, bytes([0x01]) + bytes(7)),
+                    (0.6, 1, id, 1, 8, bytes(8)),
+                    (0.7, 1, 0x123, 0, 8, bytes(8)),
+                ]
+            )
+
+    with epyq.binlog.Reader(path) as reader:
+        columns = epyq.batchdecode.decode_binlog(database=database, reader=reader)
+
+    column = columns[("CommandModeControl", "Enable_command")]
+    assert list(column.times) == [0.5, 0.6]
+    assert column.labels == ["Enable", "Disable"]
+
+
+def test_binlog_flags_and_buses(tmp_path):
+    matrix = load_example()
+    database = epyq.batchdecode.Database.from_matrix(matrix)
+    (frame,) = [f for f in matrix.frames if f.name == "CommandModeControl"]
+    id = frame.arbitration_id.id
+    extended = epyq.canrecord.flag_extended
+    enable = bytes([0x01]) + bytes(7)
+
+    path = tmp_path / "log.epcl"
+    with open(path, "wb") as f:
+        with epyq.binlog.Writer(f=f, buses={1: "a", 2: "b"}) as writer:
+            writer.write_frames(
+                [
+                    # transmitted before anything was received
+                    (math.nan, 1, id, extended | epyq.canrecord.flag_tx, 8, enable),
+                    (0.5, 1, id, extended, 8, bytes(8)),
+                    (math.nan, 1, id, extended | epyq.canrecord.flag_tx, 8, enable),
+                    (0.6, 1, id, extended | epyq.canrecord.flag_remote, 0, bytes(8)),
+                    (0.7, 1, id, extended | epyq.canrecord.flag_error, 8, enable),
+                    # a standard frame with the same ID number
+                    (0.8, 1, id, 0, 8, enable),
+                    (0.9, 2, id, extended, 8, enable),
+                ]
+            )
+
+    with epyq.binlog.Reader(path) as reader:
+        with pytest.raises(ValueError, match="buses 1, 2"):
+            epyq.batchdecode.decode_binlog(database=database, reader=reader)
+
+        columns = epyq.batchdecode.decode_binlog(
+            database=database, reader=reader, bus=1
+        )
+        column = columns[("CommandModeControl", "Enable_command")]
+        assert list(column.times) == [0.5, 0.5, 0.5]
+        assert column.labels == ["Enable", "Disable", "Enable"]
+
+        columns = epyq.batchdecode.decode_binlog(
+            database=database, reader=reader, bus=2
+        )
+        column = columns[("CommandModeControl", "Enable_command")]
+        assert list(column.times) == [0.9]
+
+    decoder = epyq.batchdecode.Decoder(database=database, bus=1)
+    decoder.feed(
+        times=[math.nan, 1.0],
+        ids=[id, id],
+        data=enable * 2,
+        flags=bytes([extended | epyq.canrecord.flag_tx, 0]),
+        buses=bytes([1, 1]),
+    )
+    assert (decoder.skipped, decoder.unknown, decoder.columns) == (1, 1, {})
+
+
+def test_benchmark():
+    matrix = load_example()
+    seconds = epyq.batchdecode.benchmark(
+        matrix=matrix,
+        frames=random_frames(matrix, count=500),
+    )
+
+    assert set(seconds) == {"compile", "batch", "dispatch", "per_frame"}
+
+
+def test_decode_frame_dispatch():
+    matrix = load_example()
+    database = epyq.batchdecode.Database.from_matrix(matrix)
+    frames = random_frames(matrix, count=500, seed=1)
+    columns = epyq.batchdecode.decode_frames(database=database, frames=frames)
+
+    (frame,) = [f for f in matrix.frames if f.name == "StatusNVParam"]
+    id = frame.arbitration_id.id
+    assert (id, 3) in database.branches
+
+    # LFM_Limits
+    decoded = database.decode_frame(id, bytes([0x00, 0x0C, 0x02, 0x58]) + bytes(4))
+    assert decoded[("StatusNVParam", "ActLFM_Limits", "FreqHi")] == pytest.approx(60)
+    assert database.decode_frame(id, bytes([0x00, 0x28]) + bytes(6)) is None
+    assert database.decode_frame(0x7FF, bytes(8)) is None
+    data = bytes([0x00, 0x0C, 0x02, 0x58]) + bytes(4)
+    assert frame.arbitration_id.extended
+    assert database.decode_frame(id, data, extended=True) == decoded
+    assert database.decode_frame(id, data, extended=False) is None
+
+    for time, id, data in frames:
+        for path, value in database.decode_frame(id, data).items():
+            column = columns[path]
+            index = list(column.times).index(time)
+            assert column.values[index] == pytest.approx(value)
+
+    statistics = database.statistics
+    assert statistics.frames == 505
+    assert statistics.unknown == 3
+    assert statistics.multiplexed > 2
+    assert statistics.frames_per_second() > 0
+
+
+def test_renumbered_unscaled_decode():
+    database = epyq.batchdecode.Database.from_matrix(load_example())
+    message = next(iter(database.messages.values()))
+    renumbered = database.renumbered(ids={message.name: 0x1FFFFFF0})
+
+    data = bytes(range(8))
+    decoded = database.decode_frame(message.id, data, scale=False)
+    assert renumbered.decode_frame(0x1FFFFFF0, data, scale=False) == decoded
+    assert renumbered.decode_frame(message.id, data) is None
+    assert renumbered.messages[0x1FFFFFF0].id == 0x1FFFFFF0
+
+    layouts = {
+        path: layout
+        for branch in database.branches.values()
+        if branch.message.id == message.id
+        for path, layout in branch.signals
+    }
+    scaled = database.decode_frame(message.id, data)
+    for path, value in decoded.items():
+        layout = layouts[path]
+        assert scaled[path] == value * layout.factor + layout.offset
@@ -0,0 +1,70 @@
+import pathlib
+
+import pytest
+
+import epyq.batchdecode
+import epyq.benchmark
+import epyq.symcache
+
+
+afe_sym = pathlib.Path(epyq.__file__).parent / "AFE_CAN_ID247_FACTORY.sym"
+
+
+def test_percentile():
+    values = list(range(1, 101))
+
+    assert epyq.benchmark.percentile(values, 0.5) == 50
+    assert epyq.benchmark.percentile(values, 0.99) == 99
+    assert epyq.benchmark.percentile(values, 1) == 100
+    assert epyq.benchmark.percentile([3], 0.5) == 3
+    assert epyq.benchmark.percentile([], 0.5) is None
+
+
+def test_regressions():
+    baseline = {
+        "receive_frames_per_second": 10000,
+        "latency_p99_ms": 10,
+        "memory_growth_kib": 0,
+    }
+
+    assert epyq.benchmark.regressions(results=baseline, baseline=baseline) == []
+    assert (
+        epyq.benchmark.regressions(
+            results={"latency_p99_ms": 17, "memory_growth_kib": 200},
+            baseline=baseline,
+        )
+        == []
+    )
+
+    found = epyq.benchmark.regressions(
+        results={
+            "receive_frames_per_second": 5000,
+            "latency_p99_ms": 30,
+            "tx_jitter_p99_ms": 100,
+        },
+        baseline=baseline,
+    )
+    assert [regression.split(":")[0] for regression in found] == [
+        "receive_frames_per_second",
+        "latency_p99_ms",
+    ]
+
+
+def test_traffic_uses_defined_multiplexer_values():
+    matrix = epyq.symcache.parse(afe_sym)
+    database = epyq.batchdecode.Database.from_matrix(matrix)
+    frames = epyq.benchmark.traffic(matrix=matrix, count=500)
+
+    assert frames == epyq.benchmark.traffic(matrix=matrix, count=500)
+    assert {id for id, flags, data in frames} & set(database.multiplexers)
+
+    for id, flags, data in frames:
+        assert flags == epyq.canrecord.flag_extended
+        assert database.decode_frame(id, data) is not None
+
+
+def test_run():
+    pytest.importorskip("PyQt5")
+    pytest.importorskip("epyqlib")
+
+    assert epyq.benchmark.main([str(afe_sym), "--count", "200"]) == 0
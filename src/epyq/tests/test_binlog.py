@@ -0,0 +1,128 @@
+import math
+
+import pytest
+
+import epyq.binlog
+import epyq.canrecord
+import epyq.trc
+
+
+def records(count, first_time=0):
+    return b"".join(
+        epyq.canrecord.record.pack(
+            first_time + i if i % 5 != 4 else math.nan,
+            0x18FF0000 + i,
+            epyq.canrecord.flag_extended
+            | (epyq.canrecord.flag_tx if i % 5 == 4 else 0),
+            i % 9,
+            i.to_bytes(8, "little"),
+        )
+        for i in range(count)
+    )
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "log.epcl"
+
+    with open(path, "wb") as f:
+        with epyq.binlog.Writer(f=f, buses={1: "CAN0", 2: "CAN1"}) as writer:
+            writer.write_records(records(10), bus=1)
+            writer.write_records(records(3, first_time=100), bus=2)
+            writer.write_frames([(0.5, 2, 0x123, 0, 2, b"\x01\x02")])
+
+    with epyq.binlog.Reader(path) as reader:
+        assert reader.buses == {1: "CAN0", 2: "CAN1"}
+        assert len(reader) == 14
+        assert [chunk.count for chunk in reader.index] == [10, 3, 1]
+        assert reader.index[1].first_time == 100
+        assert reader.first_time() == 0
+
+        columns = reader.columns(0)
+        assert columns.ids[3] == 0x18FF0003
+        assert columns.dlcs[3] == 3
+        assert math.isnan(columns.times[4])
+        assert columns.flags[4] & epyq.canrecord.flag_tx
+        assert bytes(columns.data[8:16]) == (1).to_bytes(8, "little")
+        del columns
+
+        frames = list(reader.frames())
+
+    assert frames[10][:3] == (100, 2, 0x18FF0000)
+    assert frames[-1] == (0.5, 2, 0x123, 0, 2, b"\x01\x02" + bytes(6))
+
+
+def test_not_a_log(tmp_path):
+    path = tmp_path / "log.epcl"
+    path.write_bytes(b"not a log at all, no sir")
+
+    with pytest.raises(epyq.binlog.FormatError):
+        epyq.binlog.Reader(path)
+
+
+def test_trc_conversion(tmp_path):
+    path = tmp_path / "log.epcl"
+    with open(path, "wb") as f:
+        with epyq.binlog.Writer(f=f, buses={1: "CAN0"}) as writer:
+            writer.write_records(records(20), bus=1)
+
+    trc_path = tmp_path / "log.trc"
+    assert epyq.binlog.to_trc(path, trc_path) == 20
+
+    with open(trc_path) as f:
+        parsed = list(epyq.trc.parse(f))
+
+    assert len(parsed) == 20
+    time, bus, id, flags, dlc, data = parsed[4]
+    assert (time, bus, id, dlc) == (3, 1, 0x18FF0004, 4)
+    assert flags == epyq.canrecord.flag_extended | epyq.canrecord.flag_tx
+    assert data == (4).to_bytes(4, "little")
+
+    converted_path = tmp_path / "converted.epcl"
+    assert epyq.binlog.from_trc(trc_path, converted_path) == 20
+
+    with epyq.binlog.Reader(converted_path) as reader:
+        assert reader.buses == {1: "CAN0"}
+        assert [frame[2] for frame in reader.frames()] == [
+            0x18FF0000 + i for i in range(20)
+        ]
+
+
+def test_parse_trc_v1_1():
+    lines = [
+        ";$FILEVERSION=1.1",
+        ";   comment",
+        "     1)         0.6  Rx         0300  8  00 01 02 03 04 05 06 07 ",
+        "     2)         1.5  Tx     18FF00F7  2  AA BB ",
+    ]
+
+    assert list(epyq.trc.parse(lines)) == [
+        (0.0006, 0, 0x300, 0, 8, bytes(range(8))),
+        (
+            0.0015,
+            0,
+            0x18FF00F7,
+            epyq.canrecord.flag_extended | epyq.canrecord.flag_tx,
+            2,
+            b"\xaa\xbb",
+        ),
+    ]
+
+
+def test_trc_v1_1_round_trip():
+    chunk = epyq.canrecord.record.pack(
+        10.5, 0x102, 0, 2, b"\x01\x02" + bytes(6)
+    ) + epyq.canrecord.record.pack(11, 0x102, epyq.canrecord.flag_extended, 1, bytes(8))
+    lines = (
+        epyq.trc.format_header_v1_1(path="log.trc")
+        + epyq.trc.format_records_v1_1(chunk, first_number=1, time_offset=10)
+    ).splitlines()
+
+    assert list(epyq.trc.parse(lines)) == [
+        (0.5, 0, 0x102, 0, 2, b"\x01\x02"),
+        (1, 0, 0x102, epyq.canrecord.flag_extended, 1, b"\x00"),
+    ]
+
+
+def test_parse_trc_without_version():
+    with pytest.raises(epyq.trc.ParseError):
+        list(epyq.trc.parse(["     1)  1841  0001  8  00 00 00 00 00 00 00 00"]))
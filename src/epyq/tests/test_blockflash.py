@@ -0,0 +1,134 @@
+import can
+import pytest
+
+import epyq.blockflash
+
+
+def sections():
+    return epyq.blockflash.synthetic_sections(size=2001)
+
+
+def test_split_into_checksummed_blocks():
+    blocks = epyq.blockflash.split([(0x100, b"\x01\x02\x03")], block_size=2)
+
+    assert blocks == [
+        epyq.blockflash.Block(address=0x100, data=b"\x01\x02"),
+        epyq.blockflash.Block(address=0x101, data=b"\x03\x00"),
+    ]
+
+    block = epyq.blockflash.split([(0x100, bytes(range(14)))], block_size=14)[0]
+    codes = [code for code, payload in block.commands()]
+    assert codes == [
+        epyq.blockflash.CommandCode.set_mta,
+        epyq.blockflash.CommandCode.download_6,
+        epyq.blockflash.CommandCode.download_6,
+        epyq.blockflash.CommandCode.download,
+        epyq.blockflash.CommandCode.build_checksum,
+    ]
+    checksum = block.commands()[-1][1]
+    assert checksum[:4] == (14).to_bytes(4, "big")
+    assert int.from_bytes(checksum[4:], "big") == epyq.blockflash.crc(
+        epyq.blockflash.swap(bytes(range(14)))
+    )
+
+    with pytest.raises(ValueError):
+        epyq.blockflash.split([], block_size=7)
+
+
+@pytest.mark.parametrize("window", [1, 8])
+def test_flashes_virtual_target(window):
+    (progress,) = epyq.blockflash.benchmark(
+        sections=sections(),
+        windows=[window],
+        block_size=60,
+    ).values()
+
+    assert progress.bytes == progress.total_bytes == 2002
+    assert progress.blocks == progress.total_blocks
+    assert progress.resumes == 0
+
+
+def drop_nth(*indexes):
+    seen = []
+
+    def drop(message):
+        seen.append(message)
+        return len(seen) in indexes
+
+    return drop
+
+
+def test_resumes_from_first_unverified_block():
+    blocks = epyq.blockflash.split(sections(), block_size=60)
+    rig = epyq.blockflash.Rig(
+        flasher_kwargs={"window": 8, "timeout": 0.1},
+        # past the setup commands, into the blocks
+        target_kwargs={"drop": drop_nth(20, 90)},
+    )
+    try:
+        progress = rig.flasher.flash(blocks)
+    finally:
+        rig.shutdown()
+
+    assert (progress.resumes, progress.restarts) == (2, 0)
+    assert progress.blocks == len(blocks)
+    assert rig.target.verified
+    for block in blocks:
+        assert rig.target.read(block.address, len(block.data)) == block.data
+
+
+def test_restarts_when_image_checksum_rejected_after_resume():
+    # short blocks so later blocks are accepted before the resume sends
+    # them again
+    blocks = epyq.blockflash.split(sections(), block_size=12)
+    rig = epyq.blockflash.Rig(
+        flasher_kwargs={"window": 8, "timeout": 0.1},
+        target_kwargs={"drop": drop_nth(20), "recount": True},
+    )
+    try:
+        progress = rig.flasher.flash(blocks)
+    finally:
+        rig.shutdown()
+
+    assert (progress.resumes, progress.restarts) == (1, 1)
+    assert progress.blocks == len(blocks)
+    assert rig.target.verified
+
+
+def test_resumes_after_bus_error():
+    blocks = epyq.blockflash.split(sections(), block_size=60)
+    rig = epyq.blockflash.Rig(flasher_kwargs={"window": 8, "timeout": 0.1})
+    send = rig.flasher.send
+    sent = []
+
+    def flaky_send(message):
+        sent.append(message)
+        if len(sent) == 30:
+            raise can.CanError("bus off")
+        send(message)
+
+    rig.flasher.send = flaky_send
+    try:
+        progress = rig.flasher.flash(blocks)
+    finally:
+        rig.shutdown()
+
+    assert (progress.bus_errors, progress.resumes) == (1, 1)
+    assert rig.target.verified
+
+
+def test_gives_up_on_a_block():
+    blocks = epyq.blockflash.split(sections(), block_size=60)
+    rig = epyq.blockflash.Rig(
+        flasher_kwargs={"window": 4, "timeout": 0.05, "retries": 2},
+        target_kwargs={
+            "drop": lambda message: (
+                message.data[0] == epyq.blockflash.CommandCode.download_6
+            ),
+        },
+    )
+    try:
+        with pytest.raises(epyq.blockflash.FlashError, match="Block 0 "):
+            rig.flasher.flash(blocks)
+    finally:
+        rig.shutdown()
@@ -0,0 +1,200 @@
+import json
+import pathlib
+import threading
+
+import can
+import pytest
+
+import epyq.batchdecode
+import epyq.bulkparams
+import epyq.tests.test_batchdecode
+
+
+test_json = pathlib.Path(epyq.__file__).parent / "test.json"
+
+
+@pytest.fixture
+def parameters():
+    return epyq.bulkparams.ParameterMap.from_matrix(
+        epyq.tests.test_batchdecode.load_example(),
+    )
+
+
+class Device:
+    """
+    Answers parameter requests from a dict of raw values, ignoring the first
+    request of each multiplexer value listed in ``drop``.
+    """
+
+    def __init__(self, parameters, send, drop=(), errors=()):
+        self.parameters = parameters
+        self.send = send
+        self.values = {name: 1 for name in parameters.by_name}
+        self.drop = set(drop)
+        self.errors = set(errors)
+        self.lock = threading.Lock()
+
+    def __call__(self, message):
+        request = self.parameters.request
+        if (
+            message.arbitration_id != request.id
+            or message.is_extended_id != request.extended
+        ):
+            return
+
+        payload = bytes(message.data)
+        big_word = int.from_bytes(payload, "big")
+        little_word = int.from_bytes(payload, "little")
+        value = request.multiplexer.raw_one(big_word, little_word)
+        group = self.parameters.groups[value]
+        command = group.command.raw_one(big_word, little_word)
+        label = group.command.enumeration[command]
+
+        with self.lock:
+            if value in self.drop:
+                self.drop.discard(value)
+                return
+
+        if value in self.errors:
+            label = epyq.bulkparams.error_label
+        elif label == epyq.bulkparams.write_label:
+            for name, layout in group.parameters.items():
+                self.values[name] = layout.raw_one(big_word, little_word)
+
+        response = self.parameters.response
+        raw = [
+            (response.multiplexer, value),
+            (
+                group.status_command,
+                epyq.bulkparams._raw(group.status_command.enumeration, label),
+            ),
+        ]
+        raw.extend((layout, self.values[name]) for name, layout in group.status.items())
+        self.send(
+            can.Message(
+                arbitration_id=response.id,
+                is_extended_id=response.extended,
+                data=epyq.batchdecode.encode(raw),
+            )
+        )
+
+
+class Rig:
+    def __init__(self, parameters, **kwargs):
+        channel = "epyq-bulkparams-{}".format(id(self))
+        self.host = can.interface.Bus(bustype="virtual", channel=channel)
+        self.target = can.interface.Bus(bustype="virtual", channel=channel)
+        self.device = Device(parameters=parameters, send=self.target.send, **kwargs)
+        self.progress = []
+        self.transfer = epyq.bulkparams.Transfer(
+            parameters=parameters,
+            send=self.host.send,
+            timeout=0.1,
+            progress=self.progress.append,
+        )
+        self.notifiers = [
+            can.Notifier(self.host, [self.transfer]),
+            can.Notifier(self.target, [self.device]),
+        ]
+
+    def shutdown(self):
+        for notifier in self.notifiers:
+            notifier.stop()
+        self.host.shutdown()
+        self.target.shutdown()
+
+
+@pytest.fixture
+def rig(parameters, request):
+    kwargs = getattr(request, "param", {})
+    rig = Rig(parameters=parameters, **kwargs)
+    yield rig
+    rig.shutdown()
+
+
+def test_encode_round_trip(parameters):
+    group = parameters.by_name["FreqHi"]
+    values = {"FreqHi": 605, "FreqLo": 598, "FreqVeryLo": 570}
+    message = parameters.encode(group, read=False, values=values)
+
+    database = epyq.batchdecode.Database.from_matrix(
+        epyq.tests.test_batchdecode.load_example(),
+    )
+    decoded = database.decode_frame(message.arbitration_id, message.data, scale=False)
+    assert decoded[("CommandSetNVParam", "LFM_Limits", "FreqHi")] == 605
+    assert decoded[("CommandSetNVParam", "LFM_Limits", "ReadParam_command")] == 0
+    assert group.parameters["FreqHi"].from_human("60.5") == 605
+
+
+def test_extended_flag_from_database():
+    parameters = epyq.bulkparams.ParameterMap.from_matrix(
+        epyq.tests.test_batchdecode.load_example(),
+        request_id=0x123,
+        response_id=0x124,
+    )
+    assert parameters.request.extended
+    assert parameters.response.extended
+
+    group = parameters.by_name["FreqHi"]
+    message = parameters.encode(group, read=True)
+    assert (message.arbitration_id, message.is_extended_id) == (0x123, True)
+
+    raw = [
+        (parameters.response.multiplexer, group.value),
+        (group.status_command, 0),
+    ]
+    response = can.Message(
+        arbitration_id=0x124,
+        is_extended_id=True,
+        data=epyq.batchdecode.encode(raw),
+    )
+    assert parameters.decode(response)[0] == group.value
+
+    response.is_extended_id = False
+    assert parameters.decode(response) is None
+
+
+def test_writes_parameter_set(rig, parameters):
+    values = {
+        name: value
+        for name, value in json.loads(test_json.read_text()).items()
+        if name in parameters.by_name
+    }
+    values["FreqHi"] = "60.5"
+
+    result = rig.transfer.write(values)
+
+    assert result.failed == {}
+    assert result.values["FreqHi"] == pytest.approx(60.5)
+    assert rig.device.values["FreqHi"] == 605
+    assert rig.device.values["MX1Open"] == 0
+    assert result.progress.done == len(values)
+    assert rig.progress[-1].done == len(values)
+    assert result.progress.parameters_per_second() > 0
+    assert rig.device.values["ClearingTime_FreqHi"] == 1
+
+
+def test_partial_group_write_keeps_others(rig):
+    result = rig.transfer.write({"FreqHi": 60})
+
+    assert result.failed == {}
+    assert result.values == {"FreqHi": pytest.approx(60)}
+    assert rig.device.values["FreqHi"] == 600
+    assert rig.device.values["FreqLo"] == 1
+    assert result.progress.requests == 1
+
+
+@pytest.mark.parametrize("rig", [{"drop": {3, 5}, "errors": {6}}], indirect=True)
+def test_retries_only_timed_out_requests(rig, parameters):
+    result = rig.transfer.read()
+
+    assert set(result.failed) == set(parameters.groups[6].parameters)
+    assert result.progress.retries == 2
+    assert result.progress.requests == len(parameters.groups) + 2
+    assert result.values["FreqHi"] == pytest.approx(0.1)
+    assert "ThermalOverload" not in result.values
+
+
+def test_unknown_parameter(rig):
+    with pytest.raises(epyq.bulkparams.ParameterError, match="Bogus"):
+        rig.transfer.write({"Bogus": 1})
@@ -0,0 +1,172 @@
+import types
+
+import can
+
+import epyq.batchdecode
+import epyq.busthreads
+import epyq.metrics
+import epyq.tests.test_batchdecode
+import epyq.tests.test_metrics
+
+
+class Frame:
+    last_received = None
+
+
+class Signal:
+    def __init__(self, frame):
+        self.frame = frame
+        self.values = []
+
+    def set_value(self, value):
+        self.values.append(value)
+
+
+def decoder():
+    matrix = epyq.tests.test_batchdecode.load_example()
+    database = epyq.batchdecode.Database.from_matrix(matrix)
+    (message,) = [
+        message
+        for message in database.messages.values()
+        if len(message.branches.get(None, ())) > 0
+    ][:1]
+    frame = Frame()
+    signals = {
+        message.path(None, layout): (Signal(frame), frame)
+        for layout in message.branches[None]
+    }
+
+    return (
+        message,
+        epyq.busthreads.DeviceDecoder(database=database, signals=signals),
+    )
+
+
+def setup(monkeypatch, capacity=epyq.busthreads.default_capacity):
+    tree = epyq.tests.test_metrics.model()
+    (bus_node,) = tree.root.children
+    device = bus_node.children[0].device
+    message, device_decoder = decoder()
+    monkeypatch.setattr(
+        epyq.busthreads.DeviceDecoder,
+        "from_device",
+        classmethod(lambda cls, device: device_decoder),
+    )
+
+    dispatcher = epyq.busthreads.Dispatcher(
+        model=tree,
+        capacity=capacity,
+        timer=types.SimpleNamespace(
+            setInterval=lambda interval: None,
+            timeout=types.SimpleNamespace(connect=lambda slot: None),
+            start=lambda: None,
+            stop=lambda: None,
+        ),
+    )
+
+    return tree, bus_node.bus, device, message, device_decoder, dispatcher
+
+
+def frame(message, data, timestamp=0):
+    return can.Message(
+        arbitration_id=message.id,
+        is_extended_id=message.extended,
+        data=data,
+        timestamp=timestamp,
+    )
+
+
+def test_batches_latest_values(monkeypatch):
+    tree, bus, device, message, device_decoder, dispatcher = setup(monkeypatch)
+    dispatcher.start()
+
+    bus.receive(frame(message, bytes(8), timestamp=1))
+    bus.receive(frame(message, bytes([0xFF] * 8), timestamp=2))
+    bus.receive(can.Message(arbitration_id=0x7FF, data=bytes(8)))
+    # same ID with the other format is another message
+    bus.receive(
+        can.Message(
+            arbitration_id=message.id,
+            is_extended_id=not message.extended,
+            data=bytes([0x0F] * 8),
+            timestamp=3,
+        )
+    )
+
+    # the device still forwards frames but its neo no longer decodes them
+    device.process()
+    assert device.neo_frames.received == []
+
+    signals = [signal for signal, frame in device_decoder.signals.values()]
+    expected = device_decoder.database.decode_frame(
+        message.id, bytes([0xFF] * 8), scale=False
+    )
+    assert dispatcher.drain() == len(signals) + 1
+    for path, (signal, frame_) in device_decoder.signals.items():
+        assert signal.values == [expected[path]]
+    assert frame_.last_received == 2
+    assert dispatcher.drain() == 0
+
+    result = dispatcher.to_dict()
+    assert result["applied"] == len(signals) + 1
+    assert result["coalesced"] == len(signals) + 1
+    assert result["dropped"] == 0
+    assert result["batches"] == 1
+    (bus_result,) = result["buses"]
+    assert bus_result["frames"] == 4
+    assert bus_result["decoded"] == 2
+
+    dispatcher.stop()
+    assert bus.real_notifier.listeners == [bus.notifier.message_received]
+    assert device.bus.notifier.listeners == {device.neo_frames}
+    assert type(next(iter(device.bus.notifier.listeners))) is not (
+        epyq.busthreads.Decoupled
+    )
+
+
+def test_overflow_is_counted(monkeypatch):
+    tree, bus, device, message, device_decoder, dispatcher = setup(
+        monkeypatch,
+        capacity=1,
+    )
+    dispatcher.sync()
+
+    bus.receive(frame(message, bytes(8)))
+
+    statistics = dispatcher.queue.statistics
+    assert statistics.dropped == len(device_decoder.signals)
+    assert dispatcher.drain() == 1
+
+    titles = dict(
+        epyq.metrics.sections(
+            {
+                "buses": [],
+                "devices": [],
+                "widgets": None,
+                "bus_threads": dispatcher.to_dict(),
+            }
+        )
+    )
+    assert ("Dropped on overflow", str(statistics.dropped)) in titles["Bus threads"]
+
+
+def test_shares_listeners_with_metrics(monkeypatch):
+    tree, bus, device, message, device_decoder, dispatcher = setup(monkeypatch)
+    metrics = epyq.metrics.Metrics(model=tree, dispatcher=dispatcher)
+    metrics.start()
+    dispatcher.sync()
+
+    (listener,) = device.bus.notifier.listeners
+    assert isinstance(listener, epyq.metrics.TimedListener)
+    assert isinstance(listener.wrapped, epyq.busthreads.Decoupled)
+
+    bus.receive(frame(message, bytes(8)))
+    device.process()
+    assert device.neo_frames.received == []
+    assert metrics.devices[device].pending() == 0
+
+    dispatcher.stop()
+    metrics.stop()
+    assert device.bus.notifier.listeners == {device.neo_frames}
+    assert next(iter(device.bus.notifier.listeners)) is device.neo_frames
+    assert bus.real_notifier.listeners == [bus.notifier.message_received]
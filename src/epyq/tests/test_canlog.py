@@ -0,0 +1,209 @@
+import math
+
+import pytest
+
+can = pytest.importorskip("can")
+pytest.importorskip("epyqlib")
+
+import epyq.canlog
+
+
+def message(i, timestamp=None):
+    return can.Message(
+        timestamp=timestamp,
+        arbitration_id=0x100 + (i % 16),
+        is_extended_id=i % 2 == 0,
+        dlc=8,
+        data=i.to_bytes(8, "little"),
+    )
+
+
+def test_round_trip_through_segments(tmp_path):
+    log = epyq.canlog.StreamingLog(
+        name="test",
+        directory=tmp_path,
+        batch_records=7,
+        batch_count=32,
+        segment_bytes=10 * epyq.canlog.record.size,
+    )
+    log.start()
+
+    for i in range(100):
+        log.message_received_signal.emit(message(i, timestamp=10 + i))
+    log.message_received_signal.emit(message(100))
+
+    frames = list(log.frames())
+
+    assert len(log) == 101
+    assert len(frames) == 101
+    assert log.minimum_timestamp() == 10
+    assert len(list(tmp_path.iterdir())) > 1
+
+    time, id, flags, dlc, data = frames[3]
+    assert time == 13
+    assert id == 0x103
+    assert flags & epyq.canlog.flag_extended == 0
+    assert int.from_bytes(data[:dlc], "little") == 3
+
+    time, id, flags, dlc, data = frames[-1]
+    assert math.isnan(time)
+    assert flags & epyq.canlog.flag_tx
+
+    log.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_inactive_log_ignores_messages():
+    log = epyq.canlog.StreamingLog(name="test")
+    log.message_received_signal.emit(message(0, timestamp=1))
+
+    assert len(log) == 0
+    assert list(log.frames()) == []
+
+    log.close()
+    assert not log.directory.exists()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_trc_export(tmp_path, workers):
+    import epyq.canlogexport
+
+    log = epyq.canlog.StreamingLog(name="test", directory=tmp_path / "segments")
+    log.start()
+    for i in range(50):
+        log.message_received_signal.emit(message(i, timestamp=10 + i / 1000))
+    log.message_received_signal.emit(message(50))
+    log.flush()
+
+    path = tmp_path / "log.trc"
+    progress = []
+    job = epyq.canlogexport.TrcExport(
+        targets=[epyq.canlogexport.Target(log=log, path=str(path), count=len(log))],
+        time_offset=log.minimum_timestamp(),
+        chunk_records=8,
+        workers=workers,
+        progress=lambda done, total: progress.append((done, total)),
+    )
+    statistics = job.run()
+
+    lines = [line for line in path.read_text().splitlines() if line[:1] != ";"]
+    assert len(lines) == 51
+    assert (
+        lines[2] == "     3)         2.0  Rx     00000102  8  02 00 00 00 00 00 00 00 "
+    )
+    assert lines[-1].split()[1:3] == ["0.0", "Tx"]
+    assert statistics.records == 51
+    assert statistics.bytes == path.stat().st_size
+    assert progress[-1] == (51, 51)
+
+    log.close()
+
+
+def test_trc_export_cancel(tmp_path):
+    import epyq.canlogexport
+
+    log = epyq.canlog.StreamingLog(name="test")
+    log.start()
+    log.message_received_signal.emit(message(0, timestamp=1))
+    log.flush()
+
+    path = tmp_path / "log.trc"
+    job = epyq.canlogexport.TrcExport(
+        targets=[epyq.canlogexport.Target(log=log, path=str(path), count=len(log))],
+        time_offset=0,
+    )
+    job.cancel()
+
+    with pytest.raises(epyq.canlogexport.CanceledError):
+        job.run()
+
+    assert not path.exists()
+
+    log.close()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_merged_trc_export(tmp_path, workers):
+    import epyq.canlogexport
+
+    logs = []
+    for n, name in enumerate(("a", "b", "c")):
+        log = epyq.canlog.StreamingLog(name=name, directory=tmp_path / name)
+        log.start()
+        for i in range(20):
+            log.message_received_signal.emit(message(i, timestamp=n + 3 * i))
+        log.message_received_signal.emit(message(20))
+        log.flush()
+        logs.append(log)
+
+    targets = [
+        epyq.canlogexport.Target(log=log, path=None, count=len(log)) for log in logs
+    ]
+    merged = list(epyq.canlogexport.merge_frames(targets=targets, initial_time=0))
+
+    assert [frame[0] for frame in merged] == sorted(frame[0] for frame in merged)
+    assert [frame[1] for frame in merged[:6]] == [1, 2, 3, 1, 2, 3]
+    # transmitted frames take the time of the preceding received frame
+    assert merged[-1][0] == 59
+    assert merged[-1][3] & epyq.canrecord.flag_tx
+
+    path = tmp_path / "merged.trc"
+    job = epyq.canlogexport.MergedTrcExport(
+        targets=targets,
+        path=str(path),
+        time_offset=0,
+        chunk_records=7,
+        workers=workers,
+    )
+    statistics = job.run()
+
+    text = path.read_text()
+    lines = [line for line in text.splitlines() if line[:1] != ";"]
+    assert ";$FILEVERSION=2.1" in text
+    assert ";   2    b" in text
+    assert len(lines) == 63
+    assert lines[4].split() == [
+        "5",
+        "4000.000",
+        "DT",
+        "2",
+        "0101",
+        "Rx",
+        "-",
+        "8",
+        *["01"] + ["00"] * 7,
+    ]
+    assert statistics.records == 63
+
+    for log in logs:
+        log.close()
+
+
+def test_export_format_by_extension(tmp_path):
+    import epyq.binlog
+    import epyq.canlogexport
+
+    log = epyq.canlog.StreamingLog(name="CAN0")
+    log.start()
+    for i in range(30):
+        log.message_received_signal.emit(message(i, timestamp=i))
+    log.flush()
+
+    trc_path = tmp_path / "log.trc"
+    binary_path = tmp_path / "log.epcl"
+    job = epyq.canlogexport.for_targets(
+        targets=[
+            epyq.canlogexport.Target(log=log, path=str(path), count=len(log))
+            for path in (binary_path, trc_path)
+        ],
+        time_offset=0,
+    )
+    statistics = job.run()
+
+    assert statistics.records == 60
+    assert trc_path.read_text().startswith(";$FILEVERSION=1.1")
+    with epyq.binlog.Reader(binary_path) as reader:
+        assert reader.buses == {1: "CAN0"}
+        assert [frame[0] for frame in reader.frames()] == list(range(30))
+
+    log.close()
@@ -0,0 +1,61 @@
+import math
+
+import epyq.csvcache
+
+
+def write_csv(path, rows):
+    with open(path, "w") as f:
+        f.write(".time,sine,ramp\n")
+        for i in range(rows):
+            f.write("{},{},{}\n".format(i / 100, math.sin(i / 50), i))
+
+
+def test_sidecar_cache(tmp_path):
+    path = tmp_path / "log.csv"
+    write_csv(path, rows=1000)
+
+    parsed = epyq.csvcache.load(path)
+    cached = epyq.csvcache.load(path)
+
+    assert not parsed.cached
+    assert cached.cached
+    assert (tmp_path / ("log.csv" + epyq.csvcache.sidecar_suffix)).exists()
+    assert cached.rows == 1000
+    assert list(cached.columns) == [".time", "sine", "ramp"]
+    assert cached.columns == parsed.columns
+    assert cached.x() is cached.columns[".time"]
+
+    write_csv(path, rows=10)
+    assert not epyq.csvcache.load(path).cached
+
+
+def test_decimation_keeps_extremes(tmp_path):
+    path = tmp_path / "log.csv"
+    write_csv(path, rows=100000)
+    table = epyq.csvcache.load(path, cache=False)
+
+    decimator = epyq.csvcache.Decimator(x=table.x(), y=table.columns["sine"])
+    points = decimator.points(x_minimum=0, x_maximum=1000, buckets=200)
+
+    assert 200 <= len(points) <= 2 * 220
+    assert [x for x, y in points] == sorted(x for x, y in points)
+    assert max(y for x, y in points) == max(table.columns["sine"])
+    assert min(y for x, y in points) == min(table.columns["sine"])
+
+    zoomed = decimator.points(x_minimum=10, x_maximum=12, buckets=200)
+    assert len(zoomed) == 203
+    assert zoomed[1] == (10, math.sin(1000 / 50))
+
+
+def test_decimation_of_short_columns():
+    x = list(range(10))
+    decimator = epyq.csvcache.Decimator(x=x, y=x)
+
+    assert decimator.points(x_minimum=2, x_maximum=4, buckets=100) == [
+        (1, 1),
+        (2, 2),
+        (3, 3),
+        (4, 4),
+        (5, 5),
+    ]
+    assert decimator.y_range() == (0, 9)
@@ -0,0 +1,243 @@
+import epyq.dashboards
+import epyq.updatescheduler
+
+
+class FakeSignal:
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def disconnect(self, slot):
+        try:
+            self.slots.remove(slot)
+        except ValueError:
+            raise TypeError("not connected") from None
+
+    def emit(self, *args):
+        for slot in list(self.slots):
+            slot(*args)
+
+
+class FakeCanSignal:
+    def __init__(self):
+        self.value_changed = FakeSignal()
+        self.scaled_value = None
+
+    def set(self, value):
+        self.scaled_value = value
+        self.value_changed.emit(value)
+
+
+class FakeWidget:
+    def __init__(self, signal):
+        self.signal_object = signal
+        self.values = []
+        signal.value_changed.connect(self.meta_set_value)
+
+    def meta_set_value(self, value):
+        self.values.append(value)
+
+
+class FakeTabs:
+    def __init__(self, pages):
+        self.pages = pages
+        self.current = 0
+        self.currentChanged = FakeSignal()
+
+    def count(self):
+        return len(self.pages)
+
+    def widget(self, index):
+        return self.pages[index]
+
+    def currentWidget(self):
+        return self.pages[self.current]
+
+    def setCurrentIndex(self, index):
+        self.current = index
+        self.currentChanged.emit(index)
+
+
+def test_hidden_tabs_do_not_update():
+    signal = FakeCanSignal()
+    widgets = {"a": [FakeWidget(signal)], "b": [FakeWidget(signal)]}
+    tabs = FakeTabs(pages=["a", "b"])
+
+    subscriptions = epyq.dashboards.TabSubscriptions(
+        tabs=tabs,
+        find_widgets=widgets.__getitem__,
+    )
+    (a,) = widgets["a"]
+    (b,) = widgets["b"]
+
+    signal.set(1)
+    assert a.values == [1]
+    assert b.values == []
+    assert subscriptions.paused_count() == 1
+
+    tabs.setCurrentIndex(1)
+    assert b.values == [1]
+    signal.set(2)
+    assert a.values == [1]
+    assert b.values == [1, 2]
+
+    subscriptions.set_visible(False)
+    signal.set(3)
+    assert subscriptions.paused_count() == 2
+    assert b.values == [1, 2]
+
+    subscriptions.close()
+    assert a.values == [1, 3]
+    assert b.values == [1, 2, 3]
+    assert len(signal.value_changed.slots) == 2
+
+
+class FakeTimer:
+    def __init__(self):
+        self.timeout = FakeSignal()
+        self.active = False
+        self.interval = None
+
+    def setInterval(self, interval):
+        self.interval = interval
+
+    def isActive(self):
+        return self.active
+
+    def start(self):
+        self.active = True
+
+    def fire(self):
+        self.active = False
+        self.timeout.emit()
+
+
+def test_scheduler_coalesces_updates():
+    timer = FakeTimer()
+    scheduler = epyq.updatescheduler.UpdateScheduler(rate=25, timer=timer)
+    signal = FakeCanSignal()
+    widgets = {"a": [FakeWidget(signal)], "b": [FakeWidget(signal)]}
+    tabs = FakeTabs(pages=["a", "b"])
+    (a,) = widgets["a"]
+    (b,) = widgets["b"]
+
+    subscriptions = epyq.dashboards.TabSubscriptions(
+        tabs=tabs,
+        find_widgets=widgets.__getitem__,
+        scheduler=scheduler,
+    )
+
+    assert timer.interval == 40
+    for value in range(5):
+        signal.set(value)
+
+    assert a.values == []
+    assert timer.isActive()
+    timer.fire()
+    assert a.values == [4]
+    assert b.values == []
+
+    signal.set(5)
+    tabs.setCurrentIndex(1)
+    timer.fire()
+    assert a.values == [4]
+    assert b.values == [5]
+
+    assert scheduler.statistics == epyq.updatescheduler.Statistics(
+        updates=6,
+        coalesced=4,
+        dropped=1,
+        applied=1,
+        frames=1,
+    )
+
+    subscriptions.close()
+    signal.set(6)
+    assert a.values == [4, 5, 6]
+    assert b.values == [5, 6]
+    assert len(signal.value_changed.slots) == 2
+
+
+def test_unselected_device_starts_paused():
+    signal = FakeCanSignal()
+    widgets = {"a": [FakeWidget(signal)], "b": [FakeWidget(signal)]}
+    tabs = FakeTabs(pages=["a", "b"])
+    (a,) = widgets["a"]
+
+    subscriptions = epyq.dashboards.TabSubscriptions(
+        tabs=tabs,
+        find_widgets=widgets.__getitem__,
+        visible=False,
+    )
+
+    signal.set(1)
+    assert subscriptions.paused_count() == 2
+    assert a.values == []
+    assert len(signal.value_changed.slots) == 0
+
+    subscriptions.set_visible(True)
+    assert a.values == [1]
+    signal.set(2)
+    assert a.values == [1, 2]
+
+
+class FakePage:
+    def __init__(self, name):
+        self.name = name
+
+
+def test_deferred_dashboards_build_when_shown():
+    timer = FakeTimer()
+    scheduler = epyq.updatescheduler.UpdateScheduler(rate=25, timer=timer)
+    signal = FakeCanSignal()
+    first, second = FakePage("first"), FakePage("second")
+    tabs = FakeTabs(pages=[first, second])
+    widgets = {first: [FakeWidget(signal)], second: []}
+
+    def build(page, path):
+        widgets[page].append(FakeWidget(signal))
+
+    deferred = epyq.dashboards.DeferredDashboards(tabs=tabs, build=build)
+    deferred.add(second, "second.ui")
+    assert epyq.dashboards.pending(second)
+
+    subscriptions = epyq.dashboards.TabSubscriptions(
+        tabs=tabs,
+        find_widgets=widgets.__getitem__,
+        scheduler=scheduler,
+    )
+    assert widgets[second] == []
+
+    tabs.setCurrentIndex(1)
+    assert (deferred.built, deferred.pages) == (1, {})
+    assert not epyq.dashboards.pending(second)
+    (b,) = widgets[second]
+
+    # the built widgets are adopted by the scheduler and paused when hidden
+    signal.set(1)
+    assert b.values == []
+    timer.fire()
+    assert b.values == [1]
+    tabs.setCurrentIndex(0)
+    signal.set(2)
+    timer.fire()
+    assert b.values == [1]
+
+    tabs.setCurrentIndex(1)
+    assert deferred.built == 1
+    assert b.values == [1, 2]
+
+    subscriptions.close()
+    assert len(signal.value_changed.slots) == 2
+
+
+def test_only_plain_dashboards_are_deferrable():
+    uis = {"Main": "main.ui", "Faults": "faults.ui", "Setup": "setup.ui"}
+    assert epyq.dashboards.deferrable(uis) == {
+        "Faults": "faults.ui",
+        "Setup": "setup.ui",
+    }
+    assert epyq.dashboards.deferrable({"Main": "main.ui"}) == {}
+    assert epyq.dashboards.deferrable({"Main": "main.ui", "Menu": {}}) == {}
@@ -0,0 +1,79 @@
+import types
+
+import epyq.memoryreads
+import epyq.metrics
+
+
+def spans(*ranges):
+    return [
+        epyq.memoryreads.Span(address=address, size=size) for address, size in ranges
+    ]
+
+
+def bounds(blocks):
+    return [(block.address, block.size, len(block.spans)) for block in blocks]
+
+
+def test_plan_merges_within_gap_and_chunk():
+    blocks = epyq.memoryreads.plan(
+        spans((0x110, 2), (0x100, 2), (0x104, 1), (0x102, 2), (0x120, 1)),
+        max_chunk=16,
+        max_gap=4,
+    )
+    assert bounds(blocks) == [(0x100, 5, 3), (0x110, 2, 1), (0x120, 1, 1)]
+
+    blocks = epyq.memoryreads.plan(
+        spans((0x100, 2), (0x102, 2), (0x104, 2), (0x106, 2)),
+        max_chunk=4,
+        max_gap=0,
+    )
+    assert bounds(blocks) == [(0x100, 4, 2), (0x104, 4, 2)]
+
+
+def test_plan_overlapping_and_oversized_spans():
+    blocks = epyq.memoryreads.plan(
+        # a struct, two of its members and a following variable
+        spans((0x200, 40), (0x204, 2), (0x210, 1), (0x228, 2), (0x300, 0)),
+        max_chunk=16,
+        max_gap=4,
+    )
+    assert bounds(blocks) == [(0x200, 40, 3), (0x228, 2, 1)]
+
+
+def test_block_slices_words():
+    (block,) = epyq.memoryreads.plan(
+        spans((0x100, 1), (0x103, 2), (0x105, 1)), max_chunk=8, max_gap=2
+    )
+    data = bytes(range(12))
+
+    assert block.octets(bits_per_byte=16) == 12
+    assert [data[block.slice(span, bits_per_byte=16)] for span in block.spans] == [
+        bytes([0, 1]),
+        bytes([6, 7, 8, 9]),
+        bytes([10, 11]),
+    ]
+
+
+def test_statistics_metrics_section():
+    statistics = epyq.memoryreads.Statistics()
+    statistics.read(octets=12, seconds=1.5)
+    statistics.read(octets=4, seconds=0.5)
+    statistics.variables += 4
+    statistics.refreshes.add(5)
+
+    assert statistics.bytes_per_second() == 8
+    assert statistics.summary().startswith("2 reads for 4 variables, 16 bytes")
+
+    rows = dict(
+        epyq.metrics.sections(
+            epyq.metrics.Metrics(
+                model=types.SimpleNamespace(root=types.SimpleNamespace(children=[])),
+                memory_reads=statistics,
+            ).to_dict()
+        )
+    )["Variable reads"]
+    assert rows == [
+        ("Reads", "2 for 4 variables"),
+        ("Bytes per second", "8"),
+        ("Refresh latency", "5000.0 ms mean, 5000.0 ms max"),
+    ]
@@ -0,0 +1,167 @@
+import json
+import types
+
+import can
+
+import epyq.metrics
+import epyq.updatescheduler
+
+
+class Signal:
+    def __init__(self, slot):
+        self.slot = slot
+
+    def emit(self, message):
+        self.slot(message)
+
+
+class NotifierProxy:
+    def __init__(self):
+        self.listeners = set()
+
+    def add(self, listener):
+        self.listeners.add(listener)
+
+    def discard(self, listener):
+        self.listeners.discard(listener)
+
+    def message_received(self, message):
+        for listener in tuple(self.listeners):
+            listener.message_received_signal.emit(message)
+
+
+class BusProxy:
+    def __init__(self):
+        self.notifier = NotifierProxy()
+        self.tx_notifier = NotifierProxy()
+        self.real_notifier = types.SimpleNamespace(
+            listeners=[self.notifier.message_received],
+        )
+
+    def receive(self, message):
+        for listener in self.real_notifier.listeners:
+            listener(message)
+
+
+class Neo:
+    def __init__(self):
+        self.received = []
+        self.message_received_signal = Signal(self.received.append)
+
+
+class Device:
+    def __init__(self, outer):
+        self.name = "device :247"
+        self.neo_frames = Neo()
+        self.bus = BusProxy()
+        self.bus.notifier.add(self.neo_frames)
+        self.queue = []
+        outer.notifier.add(self)
+        self.message_received_signal = Signal(self.queue.append)
+
+    def process(self):
+        for message in self.queue:
+            self.bus.notifier.message_received(message)
+        self.queue = []
+
+    def terminate(self):
+        self.bus.notifier.discard(self.neo_frames)
+        self.bus = None
+
+
+def model():
+    bus = BusProxy()
+    device = Device(outer=bus)
+    bus_node = types.SimpleNamespace(
+        bus=bus,
+        fields=types.SimpleNamespace(name="CAN0"),
+        children=[types.SimpleNamespace(device=device)],
+    )
+
+    return types.SimpleNamespace(root=types.SimpleNamespace(children=[bus_node]))
+
+
+def message(id):
+    return can.Message(arbitration_id=id, data=bytes(8))
+
+
+def test_pipeline_metrics(tmp_path, clock):
+    tree = model()
+    (bus_node,) = tree.root.children
+    bus = bus_node.bus
+    device = bus_node.children[0].device
+    scheduler = epyq.updatescheduler.UpdateScheduler(
+        timer=types.SimpleNamespace(
+            setInterval=lambda interval: None,
+            timeout=types.SimpleNamespace(connect=lambda slot: None),
+        ),
+    )
+
+    metrics = epyq.metrics.Metrics(model=tree, scheduler=scheduler, clock=clock)
+    metrics.start()
+
+    for i in range(10):
+        bus.receive(message(0x100 + i % 2))
+    bus.tx_notifier.message_received(message(0x200))
+
+    assert metrics.devices[device].pending() == 10
+    device.process()
+    assert metrics.devices[device].pending() == 0
+    assert len(device.neo_frames.received) == 10
+
+    scheduler.statistics.applied = 30
+    clock.now = 2
+    metrics.sample()
+
+    result = metrics.to_dict()
+    (bus_result,) = result["buses"]
+    assert bus_result["received"] == 10
+    assert bus_result["transmitted"] == 1
+    assert bus_result["received_per_second"] == 5
+    assert bus_result["notifier_callback"]["count"] == 10
+    (device_result,) = result["devices"]
+    assert device_result["decode"]["count"] == 10
+    assert set(device_result["decode_by_id"]) == {"0x00000100", "0x00000101"}
+    assert result["widgets"]["applied_per_second"] == 15
+
+    titles = [title for title, rows in epyq.metrics.sections(result)]
+    assert titles == ["Bus: CAN0", "Device: device :247", "Widgets"]
+
+    path = tmp_path / "metrics.json"
+    metrics.dump(path)
+    assert json.loads(path.read_text())["buses"][0]["name"] == "CAN0"
+
+    # the device can still remove its own listener
+    listeners = device.bus.notifier.listeners
+    device.terminate()
+    assert len(listeners) == 0
+
+    metrics.stop()
+    assert bus.real_notifier.listeners == [bus.notifier.message_received]
+    assert bus.notifier.listeners == {device}
+    assert len(bus.tx_notifier.listeners) == 0
+
+
+def test_uninstall_restores_device_listener():
+    tree = model()
+    (bus_node,) = tree.root.children
+    device = bus_node.children[0].device
+
+    metrics = epyq.metrics.Metrics(model=tree)
+    metrics.start()
+    (listener,) = device.bus.notifier.listeners
+    assert isinstance(listener, epyq.metrics.TimedListener)
+
+    bus_node.children = []
+    metrics.sample()
+
+    assert metrics.devices == {}
+    assert device.bus.notifier.listeners == {device.neo_frames}
+    assert not isinstance(
+        next(iter(device.bus.notifier.listeners)),
+        epyq.metrics.TimedListener,
+    )
+    assert epyq.metrics.sections(metrics.to_dict())[-1] == (
+        "Widgets",
+        [("Updates", "not rate limited")],
+    )
@@ -0,0 +1,113 @@
+import pytest
+
+import epyq.bulkparams
+import epyq.paramsync
+import epyq.tests.test_batchdecode
+import epyq.tests.test_bulkparams
+
+
+@pytest.fixture
+def rig():
+    rig = epyq.tests.test_bulkparams.Rig(
+        parameters=epyq.bulkparams.ParameterMap.from_matrix(
+            epyq.tests.test_batchdecode.load_example(),
+        ),
+    )
+    yield rig
+    rig.shutdown()
+
+
+def test_writes_only_changes(rig):
+    snapshot = epyq.paramsync.Snapshot()
+    values = {"FreqHi": "0.1", "FreqLo": "0.1", "MX1Open": "1", "MX1Close": "5"}
+
+    result = epyq.paramsync.sync(rig.transfer, snapshot, values, verify=True)
+
+    assert result.failed == {}
+    assert result.read == 6
+    assert (result.skipped, result.written, result.verified) == (3, 1, 1)
+    assert rig.device.values["MX1Close"] == 5
+    assert result.values == {"MX1Close": 5}
+    assert snapshot.valid()["MX1Close"] == 5
+
+    # known values are neither read nor written again
+    rig.device.values["MX1Close"] = 7
+    result = epyq.paramsync.sync(rig.transfer, snapshot, values)
+    assert (result.read, result.skipped, result.written) == (0, 4, 0)
+    assert rig.device.values["MX1Close"] == 7
+
+    # unchanged parameters in a written group come from the snapshot
+    values["FreqLo"] = "0.2"
+    result = epyq.paramsync.sync(rig.transfer, snapshot, values)
+    assert (result.read, result.skipped, result.written) == (0, 3, 1)
+    assert rig.device.values["FreqLo"] == 2
+    assert rig.device.values["FreqVeryLo"] == 1
+    assert rig.progress[-1].requests == 1
+    assert "3 writes skipped" in result.summary()
+
+
+def test_stale_and_failed_values_are_read(rig, clock):
+    clock.now = 1000
+    snapshot = epyq.paramsync.Snapshot(max_age=60, clock=clock)
+    snapshot.update({"FreqHi": 5})
+
+    clock.now += 61
+    assert snapshot.valid() == {}
+    result = epyq.paramsync.sync(rig.transfer, snapshot, {"FreqHi": "0.1"})
+    assert (result.read, result.skipped, result.written) == (3, 1, 0)
+
+    snapshot.invalidate(["FreqHi"])
+    assert "FreqHi" not in snapshot.valid()
+    assert "FreqLo" in snapshot.valid()
+
+
+def test_snapshot_persists(tmp_path, clock):
+    database = tmp_path / "device.sym"
+    database.write_text("FormatVersion=5.0\n")
+    path = epyq.paramsync.snapshot_path(
+        database=database,
+        interface="virtual",
+        channel="0",
+        request_id=0x0CFFAA41,
+        directory=tmp_path,
+    )
+    assert path != epyq.paramsync.snapshot_path(
+        database=database,
+        interface="virtual",
+        channel="1",
+        request_id=0x0CFFAA41,
+        directory=tmp_path,
+    )
+
+    clock.now = 1000
+    snapshot = epyq.paramsync.Snapshot(clock=clock)
+    snapshot.update({"FreqHi": 605})
+    snapshot.save(path)
+
+    loaded = epyq.paramsync.Snapshot.load(path, trust=True, clock=clock)
+    assert loaded.entries == snapshot.entries
+    loaded = epyq.paramsync.Snapshot.load(path, max_age=60, clock=clock)
+    assert loaded.entries == snapshot.entries
+
+    path.write_text("{")
+    assert epyq.paramsync.Snapshot.load(path, trust=True).entries == {}
+
+
+def test_persisted_snapshot_is_not_trusted_by_default(rig, tmp_path):
+    path = tmp_path / "snapshot.json"
+    values = {"FreqHi": "0.1", "MX1Close": "5"}
+    epyq.paramsync.sync(rig.transfer, epyq.paramsync.Snapshot(), values)
+    assert rig.device.values["MX1Close"] == 5
+
+    # the previous unit's snapshot, then another unit on the same node
+    snapshot = epyq.paramsync.Snapshot()
+    snapshot.update(rig.transfer.parameters.to_raw(values))
+    snapshot.save(path)
+    rig.device.values["MX1Close"] = 7
+
+    snapshot = epyq.paramsync.Snapshot.load(path)
+    result = epyq.paramsync.sync(rig.transfer, snapshot, values)
+
+    assert result.read > 0
+    assert (result.skipped, result.written) == (1, 1)
+    assert rig.device.values["MX1Close"] == 5
@@ -0,0 +1,100 @@
+import os
+import pstats
+import sys
+import threading
+import time
+
+import pytest
+
+import epyq.profiling
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+def run_session(tmp_path, mode):
+    session = epyq.profiling.Session(mode=mode, directory=str(tmp_path))
+    session.start()
+
+    thread = threading.Thread(target=busy, args=(0.1,), name="worker")
+    thread.start()
+    busy(0.05)
+    thread.join()
+
+    return session.stop()
+
+
+def test_cprofile_covers_threads(tmp_path):
+    paths = run_session(tmp_path, "cprofile")
+    names = [os.path.basename(path) for path in paths]
+
+    assert "cprofile.pstats" in names
+    assert "stacks.collapsed" in names
+
+    (worker,) = [name for name in names if name.startswith("cprofile-worker")]
+    stats = pstats.Stats(str(tmp_path / worker))
+    assert any(function == "busy" for _, _, function in stats.stats)
+
+    assert not any(
+        name.startswith(epyq.profiling._file_name(epyq.profiling.sampler_thread_name))
+        for name in names
+    )
+
+    with open(tmp_path / "stacks.collapsed") as f:
+        stacks = f.read().splitlines()
+    assert any(stack.startswith("worker;") for stack in stacks)
+    assert all(stack.rsplit(" ", 1)[1].isdigit() for stack in stacks)
+
+
+def test_cprofile_stops_in_every_thread():
+    profiler = epyq.profiling.CProfiler()
+    profiler.start()
+
+    stop = threading.Event()
+    profiled = []
+
+    def run():
+        while not stop.wait(0.001):
+            profiled.append(sys.getprofile() is not None)
+
+    thread = threading.Thread(target=run, name="worker")
+    thread.start()
+    time.sleep(0.05)
+    profiler.stop()
+    assert sys.getprofile() is None
+
+    (name,) = [name for name in profiler.stats if name.startswith("worker")]
+    calls = profiler.stats[name].total_calls
+    time.sleep(0.05)
+    stop.set()
+    thread.join()
+
+    assert profiled[0] and not profiled[-1]
+    assert profiler.stats[name].total_calls == calls
+
+
+def test_tracemalloc(tmp_path):
+    paths = run_session(tmp_path, "tracemalloc")
+
+    assert {os.path.basename(path) for path in paths} == {
+        "tracemalloc.txt",
+        "tracemalloc.snapshot",
+    }
+    with open(tmp_path / "tracemalloc.txt") as f:
+        assert "top lines" in f.read()
+
+
+def test_yappi(tmp_path):
+    pytest.importorskip("yappi")
+
+    paths = run_session(tmp_path, "yappi")
+
+    assert "yappi.pstats" in {os.path.basename(path) for path in paths}
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        epyq.profiling.Session(mode="perf")
@@ -0,0 +1,155 @@
+import types
+
+import epyq.registry
+
+
+class Signal:
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def disconnect(self, slot):
+        self.slots.remove(slot)
+
+    def emit(self, *args):
+        for slot in self.slots:
+            slot(*args)
+
+
+class Index:
+    def __init__(self, node):
+        self.node = node
+
+
+class Model:
+    def __init__(self, buses):
+        self.root = types.SimpleNamespace(children=[])
+        self.rowsInserted = Signal()
+        self.dataChanged = Signal()
+        self.device_removed = Signal()
+        for name in buses:
+            self.root.children.append(
+                types.SimpleNamespace(
+                    fields=types.SimpleNamespace(name=name),
+                    children=[],
+                    bus=object(),
+                ),
+            )
+
+    def node_from_index(self, index):
+        return index.node
+
+    def bus(self, name):
+        (node,) = [node for node in self.root.children if node.fields.name == name]
+        return node
+
+    def add_device(self, bus, device):
+        bus_node = self.bus(bus)
+        node = types.SimpleNamespace(device=device, tree_parent=bus_node)
+        bus_node.children.append(node)
+        row = len(bus_node.children) - 1
+        self.rowsInserted.emit(Index(bus_node), row, row)
+
+        return node
+
+    def remove_device(self, node):
+        node.tree_parent.children.remove(node)
+        self.device_removed.emit(node.device)
+
+    def set_nickname(self, node, nickname):
+        node.device.nickname = nickname
+        self.dataChanged.emit(Index(node), Index(node), [])
+
+
+class Device:
+    def __init__(self, nickname, node_id=247):
+        self.nickname = nickname
+        self.node_id = node_id
+
+
+def test_follows_model_changes():
+    model = Model(buses=["CAN0", "CAN1"])
+    existing = model.add_device("CAN0", Device("left"))
+    registry = epyq.registry.DeviceRegistry(model=model)
+    registry.connect()
+
+    right = model.add_device("CAN1", Device("right"))
+    unnamed = model.add_device("CAN1", Device("", node_id=1))
+
+    assert dict(registry.by_nickname()) == {
+        "left": existing.device,
+        "right": right.device,
+    }
+    assert registry.by_node_id(247) == [existing.device, right.device]
+    assert registry.by_node_id(247, bus="CAN1") == [right.device]
+    assert registry.on_bus("CAN1") == [right.device, unnamed.device]
+    assert registry.entry(right.device).bus == "CAN1"
+
+    model.set_nickname(right, "renamed")
+    view = registry.by_nickname()
+    assert registry.get("right") is None
+    assert registry.get("renamed") is right.device
+
+    model.remove_device(existing)
+    assert dict(view) == {"renamed": right.device}
+    assert registry.by_node_id(247) == [right.device]
+    assert registry.on_bus("CAN0") == []
+    assert len(registry) == 2
+
+    registry.disconnect()
+    model.add_device("CAN0", Device("late"))
+    assert registry.get("late") is None
+
+
+def test_shared_nickname_falls_back():
+    model = Model(buses=["CAN0"])
+    registry = epyq.registry.DeviceRegistry(model=model)
+    registry.connect()
+
+    first = model.add_device("CAN0", Device("inverter"))
+    second = model.add_device("CAN0", Device("inverter", node_id=1))
+    assert registry.get("inverter") is second.device
+
+    model.remove_device(second)
+    assert registry.get("inverter") is first.device
+
+
+class Frame:
+    pass
+
+
+class Nv:
+    def __init__(self, frame):
+        self.frame = frame
+
+    def from_human(self, value):
+        return 10 * value
+
+
+def test_batch_groups_requests_by_frame():
+    frames = [Frame(), Frame()]
+    signals = {
+        ("A", "x"): Nv(frames[0]),
+        ("A", "y"): Nv(frames[0]),
+        ("B", "z"): Nv(frames[1]),
+    }
+    device = types.SimpleNamespace(
+        nvs=types.SimpleNamespace(
+            neo=types.SimpleNamespace(signal_by_path=lambda *path: signals[path]),
+        ),
+    )
+
+    batch = epyq.registry.Batch(device=device)
+    batch.read("A", "x").read("B", "z").read("A", "y")
+    batch.write(1, "A", "x").write(2, "A", "y")
+
+    requests = batch.requests()
+    assert [(r.read, r.frame) for r in requests] == [
+        (True, frames[0]),
+        (True, frames[1]),
+        (False, frames[0]),
+    ]
+    assert list(requests[0].signals) == [signals[("A", "x")], signals[("A", "y")]]
+    assert requests[2].signals == {signals[("A", "x")]: 10, signals[("A", "y")]: 20}
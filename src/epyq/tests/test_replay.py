@@ -0,0 +1,166 @@
+import threading
+import time
+
+import can
+import pytest
+
+import epyq.binlog
+import epyq.canrecord
+import epyq.replay
+import epyq.trc
+
+
+frames = [
+    (0.00, 1, 0x100, epyq.canrecord.flag_extended, 8, bytes(range(8))),
+    (0.01, 1, 0x101, epyq.canrecord.flag_tx, 2, bytes(8)),
+    (0.02, 1, 0x102, epyq.canrecord.flag_remote, 0, bytes(8)),
+    (0.05, 1, 0x103, 0, 3, bytes([1, 2, 3]) + bytes(5)),
+]
+
+
+class Proxy:
+    """
+    Sets buses as :meth:`epyqlib.busproxy.BusProxy.set_bus` does.
+    """
+
+    def __init__(self):
+        self.bus = None
+        self.real_notifier = None
+        self.received = []
+        self.buses = []
+
+    def on_message_received(self, msg):
+        self.received.append(msg)
+
+    def set_bus(self, bus):
+        if self.bus is not None:
+            self.real_notifier.stop()
+            self.bus.shutdown()
+
+        self.bus = bus
+        self.real_notifier = None
+        if bus is not None:
+            self.buses.append(bus)
+            self.real_notifier = can.Notifier(
+                bus=bus, listeners=[self.on_message_received], timeout=0.05
+            )
+
+
+def write_log(path):
+    with open(path, "wb") as f:
+        with epyq.binlog.Writer(f=f, buses={1: "a"}) as writer:
+            writer.write_frames(frames)
+
+
+def test_read_frames_skips_transmitted(tmp_path):
+    path = tmp_path / "log.epcl"
+    write_log(path)
+
+    read = list(epyq.replay.read_frames(path))
+    assert [frame[2] for frame in read] == [0x100, 0x102, 0x103]
+    assert len(list(epyq.replay.read_frames(path, include_tx=True))) == 4
+
+    messages = [epyq.replay.to_message(frame) for frame in read]
+    assert messages[0].is_extended_id
+    assert messages[1].is_remote_frame
+    assert bytes(messages[2].data) == bytes([1, 2, 3])
+
+
+@pytest.mark.parametrize("speed", [0, 1, 5])
+def test_pacing(speed):
+    sent = []
+    replayer = epyq.replay.Replayer(frames=frames, send=sent.append, speed=speed)
+
+    start = time.perf_counter()
+    statistics = replayer.run()
+    elapsed = time.perf_counter() - start
+
+    assert statistics.frames == len(sent) == len(frames)
+    assert statistics.frames_per_second() > 0
+    if speed:
+        assert elapsed >= 0.05 / speed
+        assert statistics.seconds >= 0.05 / speed
+    else:
+        assert statistics.late == 0
+        assert statistics.max_lag == 0
+
+
+def test_stop():
+    many = [(i / 10, 1, 0x100, 0, 0, b"") for i in range(100)]
+    replayer = epyq.replay.Replayer(frames=many, send=lambda message: None)
+    replayer.stop()
+
+    assert replayer.run().frames == 0
+
+
+def replay(path, proxy):
+    finished = []
+    replay = epyq.replay.Replay(
+        path=str(path), proxy=proxy, speed=0, finished=finished.append
+    )
+    replay.start()
+    replay.join(timeout=5)
+    replay.stop()
+
+    (statistics,) = finished
+
+    return statistics
+
+
+def test_replay_through_notifier(tmp_path):
+    path = tmp_path / "log.epcl"
+    write_log(path)
+
+    proxy = Proxy()
+    statistics = replay(path, proxy)
+
+    assert statistics.frames == 3
+    assert statistics.received == 3
+    assert statistics.dropped == 0
+    assert [message.arbitration_id for message in proxy.received] == [
+        0x100,
+        0x102,
+        0x103,
+    ]
+    assert "3 frames" in statistics.summary()
+
+    # back offline with the replay's buses shut down
+    (receive_bus,) = proxy.buses
+    assert proxy.bus is None
+    assert not receive_bus._open
+    assert not any(thread.name == "replay" for thread in threading.enumerate())
+
+    # another replay into the same proxy
+    assert replay(path, proxy).received == 3
+    assert proxy.bus is None
+
+
+def test_replay_exported_trc(tmp_path):
+    chunk = b"".join(
+        epyq.canrecord.record.pack(time, id, flags, 1, bytes(8))
+        for time, id, flags in [
+            (10, 0x102, 0),
+            (10.01, 0x18FF0102, epyq.canrecord.flag_extended),
+        ]
+    )
+    path = tmp_path / "log.trc"
+    path.write_text(
+        epyq.trc.format_header_v1_1(path=str(path))
+        + epyq.trc.format_records_v1_1(chunk, first_number=1, time_offset=10)
+    )
+
+    proxy = Proxy()
+    assert replay(path, proxy).received == 2
+    assert [
+        (message.arbitration_id, message.is_extended_id) for message in proxy.received
+    ] == [(0x102, False), (0x18FF0102, True)]
+
+
+def test_replay_refuses_real_bus(tmp_path):
+    proxy = Proxy()
+    proxy.bus = can.interface.Bus(bustype="virtual", channel="epyq-replay-real")
+    try:
+        with pytest.raises(ValueError):
+            epyq.replay.Replay(path=str(tmp_path / "log.trc"), proxy=proxy).start()
+    finally:
+        proxy.bus.shutdown()
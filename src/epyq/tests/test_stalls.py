@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+import types
+
+import epyq.metrics
+import epyq.stalls
+
+
+def timer():
+    return types.SimpleNamespace(
+        setInterval=lambda interval: None,
+        timeout=types.SimpleNamespace(connect=lambda slot: None),
+        start=lambda: None,
+        stop=lambda: None,
+    )
+
+
+def test_histogram():
+    histogram = epyq.stalls.LagHistogram()
+    for lag in [0, 0.004, 0.007, 0.3, 10]:
+        histogram.add(lag)
+
+    buckets = histogram.to_dict()["buckets"]
+    assert buckets["0-5 ms"] == 2
+    assert buckets["5-10 ms"] == 1
+    assert buckets["250-500 ms"] == 1
+    assert buckets[">2500 ms"] == 1
+    assert histogram.total() == 5
+    assert histogram.maximum == 10
+
+
+def test_stall_sampled_and_reported(tmp_path, clock):
+    report = tmp_path / "stalls.jsonl"
+    detector = epyq.stalls.StallDetector(
+        threshold=0.25,
+        report_path=report,
+        timer=timer(),
+        clock=clock,
+    )
+    detector._last_beat = clock()
+
+    clock.now = 0.05
+    detector.beat()
+    clock.now = 0.1
+    detector.check()
+    assert detector._current is None
+
+    blocked = threading.Event()
+    release = threading.Event()
+
+    def blocking():
+        blocked.set()
+        release.wait()
+
+    thread = threading.Thread(target=blocking)
+    thread.start()
+    blocked.wait()
+    detector.thread_id = thread.ident
+
+    clock.now = 0.5
+    detector.check()
+    detector.check()
+    release.set()
+    thread.join()
+
+    clock.now = 0.7
+    detector.beat()
+
+    assert detector.stall_count == 1
+    (record,) = [json.loads(line) for line in report.read_text().splitlines()]
+    assert record["duration"] == 0.7 - 0.05
+    assert record["samples"] == 2
+    assert "blocking" in record["stacks"][0]["stack"]
+
+    # a stall that ends before the watchdog notices still counts
+    clock.now = 1.0
+    detector.beat()
+    assert detector.stall_count == 2
+    assert detector.stalls[-1].stacks == {}
+
+    result = epyq.metrics.sections(
+        {
+            "buses": [],
+            "devices": [],
+            "widgets": None,
+            "event_loop": detector.to_dict(),
+        }
+    )
+    title, rows = result[-1]
+    assert title == "Event loop"
+    assert rows[0] == ("Stalls over 0.25 s", "2")
+
+
+def test_watchdog_thread(tmp_path):
+    detector = epyq.stalls.StallDetector(
+        threshold=0.05,
+        poll=0.005,
+        timer=timer(),
+    )
+    detector.start()
+    time.sleep(0.2)
+    detector.beat()
+    detector.stop()
+
+    assert detector.stall_count == 1
+    assert sum(detector.stalls[0].stacks.values()) > 0
+
+
+def test_report_rotation(tmp_path):
+    path = tmp_path / "stalls.jsonl"
+    for i in range(10):
+        epyq.stalls.append_report(path=path, record={"i": i}, max_bytes=30, backups=2)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "stalls.jsonl",
+        "stalls.jsonl.1",
+        "stalls.jsonl.2",
+    ]
+    assert json.loads(path.read_text().splitlines()[-1]) == {"i": 9}
@@ -0,0 +1,24 @@
+import itertools
+import sys
+
+import epyq.startup
+
+
+def test_phases(monkeypatch):
+    clock = itertools.count(start=10, step=0.5).__next__
+    profile = epyq.startup.Profile(clock=clock)
+
+    monkeypatch.setitem(sys.modules, "fake_package.a", object())
+    monkeypatch.setitem(sys.modules, "fake_package.b", object())
+    imports = profile.mark("imports")
+    window = profile.mark("window")
+
+    assert imports.seconds == 0.5
+    assert imports.modules == ["fake_package.a", "fake_package.b"]
+    assert imports.packages() == {"fake_package": 2}
+    assert window.modules == []
+
+    report = profile.report().splitlines()
+    assert report[1].split() == ["imports", "0.500", "0.500", "2"]
+    assert report[2].split() == ["fake_package", "2"]
+    assert report[3].split() == ["window", "0.500", "1.000", "0"]
@@ -0,0 +1,161 @@
+import collections
+import enum
+import types
+
+import attr
+import pytest
+
+import epyq.symbolindex
+
+
+class TypeFormats(enum.Enum):
+    signed = 0x05
+    unsigned = 0x07
+
+
+@attr.s
+class Type:
+    name = attr.ib()
+    bytes = attr.ib()
+    format = attr.ib()
+
+
+@attr.s
+class PointerType:
+    type = attr.ib()
+
+
+@attr.s
+class Struct:
+    bytes = attr.ib()
+    name = attr.ib(default=None)
+    members = attr.ib(default=attr.Factory(collections.OrderedDict))
+
+
+@attr.s
+class StructMember:
+    name = attr.ib()
+    type = attr.ib()
+    location = attr.ib()
+    bit_offset = attr.ib(default=None)
+    bit_size = attr.ib(default=None)
+    padding = attr.ib(default=False)
+
+
+@attr.s
+class TypeDef:
+    name = attr.ib()
+    type = attr.ib()
+
+
+@attr.s(repr=False)
+class Variable:
+    name = attr.ib()
+    type = attr.ib()
+    address = attr.ib()
+    file = attr.ib(default=None)
+
+
+classes = types.SimpleNamespace(
+    **{
+        cls.__name__: cls
+        for cls in [TypeFormats, Type, PointerType, Struct, StructMember, TypeDef]
+        + [Variable]
+    }
+)
+
+
+def binary_info():
+    uint16 = Type(name="unsigned int", bytes=1, format=TypeFormats.unsigned)
+    count_t = TypeDef(name="Count", type=uint16)
+    node = Struct(bytes=3, name="Node")
+    node.members["next"] = StructMember(name="next", type=PointerType(node), location=0)
+    node.members["value"] = StructMember(name="value", type=count_t, location=2)
+    variables = [
+        Variable(name="head", type=node, address=0x100, file="list.c"),
+        Variable(name="count", type=count_t, address=0x200, file="list.c"),
+    ]
+    names = {
+        "Node": [node],
+        "Count": [count_t],
+        "unsigned int": [uint16],
+        "head": [variables[0]],
+        "count": [variables[1]],
+    }
+
+    return names, variables, 16
+
+
+@pytest.fixture
+def binary(tmp_path, monkeypatch):
+    monkeypatch.setattr(epyq.symbolindex, "statistics", epyq.symbolindex.Statistics())
+    path = tmp_path / "firmware.out"
+    path.write_bytes(b"\x7fELF firmware")
+
+    return path
+
+
+def parsed(filename):
+    parsed.calls += 1
+
+    return binary_info()
+
+
+def test_loads_lazily_from_index(binary, tmp_path):
+    parsed.calls = 0
+    directory = tmp_path / "cache"
+    epyq.symbolindex.open_index(
+        binary, directory=directory, classes=classes, process_file=parsed
+    )
+    assert (parsed.calls, epyq.symbolindex.statistics.misses) == (1, 1)
+
+    index = epyq.symbolindex.open_index(
+        binary, directory=directory, classes=classes, process_file=parsed
+    )
+    assert (parsed.calls, epyq.symbolindex.statistics.hits) == (1, 1)
+
+    names, variables, bits_per_byte = index.load()
+    assert bits_per_byte == 16
+    assert [(v.name, v.address, v.file) for v in variables] == [
+        ("head", 0x100, "list.c"),
+        ("count", 0x200, "list.c"),
+    ]
+    # only the variables were built
+    assert epyq.symbolindex.statistics.resolved == 2
+
+    head, count = variables
+    node = head.type
+    assert isinstance(node, Struct)
+    assert list(node.members) == ["next", "value"]
+    assert node.members["next"].type.type is node
+    assert count.type is node.members["value"].type
+    assert count.type.type.format is TypeFormats.unsigned
+    assert isinstance(count.type, TypeDef)
+
+    assert names["Node"] == [node]
+    assert "missing" not in names
+    assert sorted(names) == sorted(binary_info()[0])
+    assert index.lookup("value") == [node.members["value"]]
+    assert index.member(node, "value") is node.members["value"]
+    assert index.member(node, "missing") is None
+    assert index.at(0x200) == [count]
+
+
+def test_rebuilds_for_changed_or_corrupt_binary(binary, tmp_path):
+    parsed.calls = 0
+    directory = tmp_path / "cache"
+    kwargs = dict(directory=directory, classes=classes, process_file=parsed)
+
+    first = epyq.symbolindex.open_index(binary, **kwargs)
+    first.close()
+    binary.write_bytes(b"\x7fELF rebuilt firmware")
+    epyq.symbolindex.open_index(binary, **kwargs)
+    assert parsed.calls == 2
+    assert len(list(directory.glob("*.sqlite"))) == 2
+
+    first.path.write_bytes(b"not a database")
+    binary.write_bytes(b"\x7fELF firmware")
+    index = epyq.symbolindex.open_index(binary, **kwargs)
+    assert parsed.calls == 3
+    assert epyq.symbolindex.statistics.errors == 1
+    assert [v.name for v in index.load()[1]] == ["head", "count"]
@@ -0,0 +1,51 @@
+import pathlib
+import shutil
+
+import epyq.symcache
+
+
+example_sym = pathlib.Path(__file__).parents[3] / "example.sym"
+
+
+def frame_summary(matrix):
+    return sorted(
+        (frame.name, frame.arbitration_id.id, [signal.name for signal in frame.signals])
+        for frame in matrix.frames
+    )
+
+
+def test_cache_hit_matches_parse(tmp_path, monkeypatch):
+    monkeypatch.setattr(epyq.symcache, "statistics", epyq.symcache.Statistics())
+    path = tmp_path / "example.sym"
+    shutil.copy(example_sym, path)
+    directory = tmp_path / "cache"
+
+    parsed = epyq.symcache.load_matrix(path, directory=directory)
+    cached = epyq.symcache.load_matrix(path, directory=directory)
+
+    assert epyq.symcache.statistics.misses == 1
+    assert epyq.symcache.statistics.hits == 1
+    assert epyq.symcache.statistics.errors == 0
+    assert frame_summary(cached) == frame_summary(parsed)
+    assert frame_summary(cached) == frame_summary(epyq.symcache.parse(path))
+
+    with open(path, "a") as f:
+        f.write("\n")
+
+    epyq.symcache.load_matrix(path, directory=directory)
+    assert epyq.symcache.statistics.misses == 2
+
+
+def test_corrupt_cache_is_replaced(tmp_path, monkeypatch):
+    monkeypatch.setattr(epyq.symcache, "statistics", epyq.symcache.Statistics())
+    directory = tmp_path / "cache"
+    directory.mkdir()
+    cache_path = directory / (epyq.symcache.key(example_sym) + epyq.symcache.suffix)
+    cache_path.write_bytes(b"not a pickle")
+
+    epyq.symcache.load_matrix(example_sym, directory=directory)
+    epyq.symcache.load_matrix(example_sym, directory=directory)
+
+    assert epyq.symcache.statistics.errors == 1
+    assert epyq.symcache.statistics.misses == 1
+    assert epyq.symcache.statistics.hits == 1
@@ -0,0 +1,326 @@
+"""
+PEAK PCAN TRC formatting of packed CAN log records, see :mod:`epyq.canrecord`.
+Chunks of records are formatted directly from their packed form so that
+batches can be handed to worker processes without building a message object
+per frame.  TRC v1.1 is used for single bus logs and TRC v2.1, which has a
+bus column, for logs merged across buses.
+"""
+
+import math
+import textwrap
+
+import epyq.canrecord
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+# TODO: CAMPid 0794376543298743297845439824
+#       matches epyqlib.utils.canlog.to_trc_v1_1() except that standard IDs
+#       are written with four digits so they read back as standard
+header_v1_1 = textwrap.dedent(
+    """\
+    ;$FILEVERSION=1.1
+    ;$STARTTIME={start_time}
+    ;
+    ;   {path}
+    ;
+    ;   Start time: {start_string}
+    ;   Generated by EPyQ {version_string}
+    ;
+    ;   Message Number
+    ;   |         Time Offset (ms)
+    ;   |         |        Type
+    ;   |         |        |        ID (hex)
+    ;   |         |        |        |     Data Length
+    ;   |         |        |        |     |   Data Bytes (hex) ...
+    ;   |         |        |        |     |   |
+    ;---+--   ----+----  --+--  ----+---  +  -+ -- -- -- -- -- -- --"""
+)
+
+line_v1_1 = "{: 6d})  {: 10.1f}  {:<5s}  {:>8s}  {:1d}  {} \n"
+
+
+def format_header_v1_1(path, version_string=""):
+    header = header_v1_1.format(
+        start_time=0,
+        path=path,
+        start_string="",
+        version_string=version_string,
+    )
+
+    return "".join(line.rstrip() + "\n" for line in header.splitlines())
+
+
+def format_records_v1_1(chunk, first_number, time_offset):
+    """
+    Format a chunk of packed records as TRC v1.1 message lines.
+
+    Args:
+        chunk (bytes-like): Whole records as packed by
+        :data:`epyq.canrecord.record`.
+        first_number (int): Message number of the first record in the chunk.
+        time_offset (float): Subtracted from each received timestamp.
+        Transmitted frames have no timestamp and are written at time zero.
+
+    Returns:
+        str: The formatted lines.
+    """
+    line = line_v1_1.format
+    extended_flag = epyq.canrecord.flag_extended
+    tx_flag = epyq.canrecord.flag_tx
+    isnan = math.isnan
+
+    lines = []
+    append = lines.append
+
+    for number, (time, id, flags, dlc, data) in enumerate(
+        epyq.canrecord.iter_records(chunk),
+        start=first_number,
+    ):
+        if flags & tx_flag or isnan(time):
+            ms = 0
+            type = "Tx"
+        else:
+            ms = (time - time_offset) * 1000
+            type = "Rx"
+
+        if flags & extended_flag:
+            id = "{:08X}".format(id)
+        else:
+            id = "{:04X}".format(id)
+
+        append(line(number, ms, type, id, dlc, data[:dlc].hex(" ").upper()))
+
+    return "".join(lines)
+
+
+header_v2_1 = textwrap.dedent(
+    """\
+    ;$FILEVERSION=2.1
+    ;$STARTTIME={start_time}
+    ;$COLUMNS=N,O,T,B,I,d,R,L,D
+    ;
+    ;   {path}
+    ;
+    ;   Start time: {start_string}
+    ;   Generated by EPyQ {version_string}
+    ;-------------------------------------------------------------------------------
+    ;   Bus  Name
+    {buses}
+    ;-------------------------------------------------------------------------------
+    ;   Message   Time    Type    ID     Rx/Tx
+    ;   Number    Offset  |  Bus  [hex]  |  Reserved
+    ;   |         [ms]    |  |    |      |  |  Data Length Code
+    ;   |         |       |  |    |      |  |  |    Data [hex] ...
+    ;   |         |       |  |    |      |  |  |    |
+    ;---+-- ------+------ +- +- --+----- +- +- +--- +- -- -- -- -- -- -- --"""
+)
+
+line_v2_1 = "{:7d} {:13.3f} {} {:<2d} {:>8s} {} -  {:<4d} {}\n"
+
+
+def format_header_v2_1(path, buses, version_string=""):
+    """
+    Args:
+        path (str): Written as a comment in the header.
+        buses (dict): Bus names keyed by their TRC bus number.
+        version_string (str): Written as a comment in the header.
+    """
+    header = header_v2_1.format(
+        start_time=0,
+        path=path,
+        start_string="",
+        version_string=version_string,
+        buses="\n".join(
+            ";   {:<4d} {}".format(number, name)
+            for number, name in sorted(buses.items())
+        ),
+    )
+
+    return "".join(line.rstrip() + "\n" for line in header.splitlines())
+
+
+def format_frames_v2_1(frames, first_number, time_offset):
+    """
+    Format frames from multiple buses as TRC v2.1 message lines.
+
+    Args:
+        frames (iterable): ``(time, bus, id, flags, dlc, data)`` tuples.  The
+        time is used as is, including for transmitted frames.
+        first_number (int): Message number of the first frame.
+        time_offset (float): Subtracted from each timestamp.
+
+    Returns:
+        str: The formatted lines.
+    """
+    line = line_v2_1.format
+    extended_flag = epyq.canrecord.flag_extended
+    tx_flag = epyq.canrecord.flag_tx
+    remote_flag = epyq.canrecord.flag_remote
+    error_flag = epyq.canrecord.flag_error
+
+    lines = []
+    append = lines.append
+
+    for number, (time, bus, id, flags, dlc, data) in enumerate(
+        frames,
+        start=first_number,
+    ):
+        if flags & error_flag:
+            type = "ER"
+        elif flags & remote_flag:
+            type = "RR"
+        else:
+            type = "DT"
+
+        if flags & extended_flag:
+            id = "{:08X}".format(id)
+        else:
+            id = "{:04X}".format(id)
+
+        append(
+            line(
+                number,
+                (time - time_offset) * 1000,
+                type,
+                bus,
+                id,
+                "Tx" if flags & tx_flag else "Rx",
+                dlc,
+                data[:dlc].hex(" ").upper(),
+            )
+        )
+
+    return "".join(lines)
+
+
+class ParseError(Exception):
+    pass
+
+
+def parse_buses(lines):
+    """
+    Parse the bus table in the header of a TRC v2.1 file as written by
+    :func:`format_header_v2_1`.
+
+    Args:
+        lines (iterable): The lines of the file such as an open text file.
+        Reading stops at the first message line.
+
+    Returns:
+        dict: Bus names keyed by their TRC bus number, empty for files
+        without a bus table.
+    """
+    buses = {}
+    in_table = False
+
+    for line in lines:
+        line = line.strip()
+
+        if len(line) == 0:
+            continue
+
+        if not line.startswith(";"):
+            break
+
+        tokens = line[1:].split(maxsplit=1)
+        if tokens == ["Bus", "Name"]:
+            in_table = True
+        elif line.startswith(";---"):
+            if in_table:
+                break
+        elif in_table and len(tokens) == 2 and tokens[0].isdigit():
+            buses[int(tokens[0])] = tokens[1]
+
+    return buses
+
+
+def parse(lines):
+    """
+    Parse the messages in a TRC v1.1 or v2.x file.  Status and event lines of
+    v2.x files are skipped.
+
+    Args:
+        lines (iterable): The lines of the file such as an open text file.
+
+    Yields:
+        tuple: ``(time, bus, id, flags, dlc, data)`` with the time in seconds
+        since the start of the trace and bus zero when the file has no bus
+        column.
+
+    Raises:
+        ParseError: For unsupported versions or malformed message lines.
+    """
+    version = None
+    columns = None
+    extended_flag = epyq.canrecord.flag_extended
+    types = {
+        "DT": 0,
+        "FD": 0,
+        "FB": 0,
+        "RR": epyq.canrecord.flag_remote,
+        "ER": epyq.canrecord.flag_error,
+    }
+
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+
+        if line.startswith(";$FILEVERSION="):
+            version = line.partition("=")[2]
+            if version != "1.1" and not version.startswith("2."):
+                raise ParseError("Unsupported TRC version {}".format(version))
+
+            if version.startswith("2.") and columns is None:
+                columns = "N,O,T,B,I,d,R,L,D" if version != "2.0" else "N,O,T,I,d,l,D"
+            continue
+
+        if line.startswith(";$COLUMNS="):
+            columns = line.partition("=")[2]
+            continue
+
+        if len(line) == 0 or line.startswith(";"):
+            continue
+
+        if version is None:
+            raise ParseError("Missing TRC file version")
+
+        tokens = line.split()
+
+        try:
+            if version == "1.1":
+                if tokens[2] not in ("Rx", "Tx"):
+                    continue
+
+                time = float(tokens[1]) / 1000
+                bus = 0
+                id_text = tokens[3]
+                flags = 0 if tokens[2] == "Rx" else epyq.canrecord.flag_tx
+                dlc = int(tokens[4])
+                data = bytes.fromhex("".join(tokens[5 : 5 + dlc]))
+            else:
+                names = columns.split(",")
+                fields = dict(zip(names, tokens))
+                type = types.get(fields.get("T", "DT"))
+                if type is None:
+                    continue
+
+                time = float(fields["O"]) / 1000
+                bus = int(fields.get("B", 0))
+                id_text = fields["I"]
+                flags = type
+                if fields["d"] == "Tx":
+                    flags |= epyq.canrecord.flag_tx
+                dlc = int(fields["L"] if "L" in fields else fields["l"])
+                data_start = names.index("D")
+                data = bytes.fromhex("".join(tokens[data_start : data_start + dlc]))
+
+            if len(id_text) > 4:
+                flags |= extended_flag
+
+            yield (time, bus, int(id_text, 16), flags, dlc, data)
+        except (IndexError, KeyError, ValueError) as e:
+            raise ParseError(
+                "Unable to parse TRC line {}: {!r}".format(line_number, line)
+            ) from e
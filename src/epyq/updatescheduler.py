@@ -0,0 +1,140 @@
+"""
+Frame rate capped delivery of received signal values to widgets.  Widgets
+adopted by an :class:`UpdateScheduler` are only marked dirty when their
+signal changes and the latest value of each dirty widget is applied at most
+once per display frame.
+"""
+
+import functools
+
+import attr
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2026, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+default_rate = 30
+
+_missing = object()
+
+
+@attr.s
+class Statistics:
+    """
+    Args:
+        updates (int): Values received from signals.
+        coalesced (int): Values replaced by a newer one before being applied.
+        dropped (int): Values discarded without being applied, such as for
+        widgets paused or released while dirty or no longer existing.
+        applied (int): Values applied to widgets.
+        frames (int): Scheduler passes that applied values.
+    """
+
+    updates = attr.ib(default=0)
+    coalesced = attr.ib(default=0)
+    dropped = attr.ib(default=0)
+    applied = attr.ib(default=0)
+    frames = attr.ib(default=0)
+
+
+@attr.s
+class UpdateScheduler:
+    """
+    Args:
+        rate (float): Maximum widget updates per second.
+        timer (QTimer, optional): Used to schedule passes.  A single shot
+        timer is created if not given.
+    """
+
+    rate = attr.ib(default=default_rate)
+    timer = attr.ib(default=None)
+    statistics = attr.ib(factory=Statistics)
+    _pending = attr.ib(factory=dict, init=False)
+    _slots = attr.ib(factory=dict, init=False)
+
+    def __attrs_post_init__(self):
+        if self.timer is None:
+            from PyQt5 import QtCore
+
+            self.timer = QtCore.QTimer()
+            self.timer.setSingleShot(True)
+
+        self.timer.setInterval(round(1000 / self.rate))
+        self.timer.timeout.connect(self.flush)
+
+    def slot(self, widget):
+        """
+        Returns:
+            callable: The slot to connect to the widget's signal so its values
+            go through the scheduler.  The same object is returned for each
+            call so it can be disconnected.
+        """
+        slot = self._slots.get(widget)
+        if slot is None:
+            slot = functools.partial(self.mark, widget)
+            self._slots[widget] = slot
+
+        return slot
+
+    def adopt(self, widget):
+        """
+        Route the values of the widget's current signal through the scheduler.
+        """
+        signal = widget.signal_object
+        signal.value_changed.disconnect(widget.meta_set_value)
+        signal.value_changed.connect(self.slot(widget))
+
+    def release(self, widget, signal):
+        """
+        Connect the widget directly to ``signal`` again, applying any pending
+        value first.  ``signal`` must still be connected to :meth:`slot`.
+        """
+        value = self._pending.pop(widget, _missing)
+        if value is not _missing:
+            self._apply(widget, value)
+
+        signal.value_changed.disconnect(self._slots.pop(widget, None))
+        signal.value_changed.connect(widget.meta_set_value)
+
+    def forget(self, widget):
+        """
+        Stop tracking a widget which is no longer connected to its slot.
+        """
+        self.discard(widget)
+        self._slots.pop(widget, None)
+
+    def mark(self, widget, value):
+        self.statistics.updates += 1
+
+        if widget in self._pending:
+            self.statistics.coalesced += 1
+
+        self._pending[widget] = value
+
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def discard(self, widget):
+        if self._pending.pop(widget, _missing) is not _missing:
+            self.statistics.dropped += 1
+
+    def flush(self):
+        pending = self._pending
+        if len(pending) == 0:
+            return
+
+        self._pending = {}
+        self.statistics.frames += 1
+
+        for widget, value in pending.items():
+            self._apply(widget, value)
+
+    def _apply(self, widget, value):
+        try:
+            widget.meta_set_value(value)
+        except RuntimeError:
+            # The underlying Qt widget has been deleted
+            self.statistics.dropped += 1
+        else:
+            self.statistics.applied += 1